@@ -0,0 +1,173 @@
+"""
+Adaptive question selection.
+
+Students have an ability and questions a difficulty, both on the logit
+scale of the Rasch model: a student answers a question correctly with
+probability sigmoid(ability - difficulty). After each graded answer both
+estimates take an Elo-style step towards the observed result, with a step
+size that shrinks as they accumulate answers.
+
+The next question is the unasked one whose difficulty is closest to the
+level the student should get right with probability target_success.
+Question slots are kept in an array sorted by (difficulty, slot), so the
+closest question is found by bisection; an update moves one slot within
+that array. Estimates live in flat array.array columns (32 bytes per
+question) next to a question_id -> slot dict, rather than in one Python
+object per question.
+"""
+
+import math
+from array import array
+from bisect import bisect_left, insort
+from typing import Collection, Dict, Hashable, List, Optional, Tuple
+
+
+def success_probability(ability: float, difficulty: float) -> float:
+    return 1.0 / (1.0 + math.exp(difficulty - ability))
+
+
+class AdaptiveEngine:
+    def __init__(
+        self,
+        target_success: float = 0.7,
+        k_student: float = 0.6,
+        k_question: float = 0.3,
+        k_decay: float = 0.05,
+        k_min: float = 0.05,
+    ):
+        if not 0.0 < target_success < 1.0:
+            raise ValueError("target_success must be between 0 and 1")
+        # Difficulty the student answers correctly with target_success,
+        # relative to their ability
+        self.target_offset = math.log(target_success / (1.0 - target_success))
+        self.k_student = k_student
+        self.k_question = k_question
+        self.k_decay = k_decay
+        self.k_min = k_min
+
+        # Question columns, indexed by slot
+        self._slots: Dict[int, int] = {}
+        self._question_ids = array("q")
+        self._difficulty = array("d")
+        self._question_answers = array("l")
+        # Slots sorted by (difficulty, slot)
+        self._order = array("l")
+
+        # Student columns, indexed by slot; None is a valid student key
+        self._students: Dict[Hashable, int] = {}
+        self._ability = array("d")
+        self._student_answers = array("l")
+
+        self._dirty_questions = set()
+        self._dirty_students = set()
+
+    def _order_key(self, slot: int) -> Tuple[float, int]:
+        return self._difficulty[slot], slot
+
+    def __len__(self) -> int:
+        return len(self._question_ids)
+
+    def add_question(self, question_id: int, difficulty: float = 0.0, answers: int = 0) -> None:
+        if question_id in self._slots:
+            self._set_difficulty(self._slots[question_id], difficulty)
+            self._question_answers[self._slots[question_id]] = answers
+            return
+        slot = len(self._question_ids)
+        self._slots[question_id] = slot
+        self._question_ids.append(question_id)
+        self._difficulty.append(difficulty)
+        self._question_answers.append(answers)
+        insort(self._order, slot, key=self._order_key)
+
+    def add_questions(self, params: List[Tuple[int, float, int]]) -> None:
+        """Add many (question_id, difficulty, answers) rows, sorting once."""
+        for question_id, difficulty, answers in params:
+            if question_id in self._slots:
+                continue
+            self._slots[question_id] = len(self._question_ids)
+            self._question_ids.append(question_id)
+            self._difficulty.append(difficulty)
+            self._question_answers.append(answers)
+        self._order = array("l", sorted(range(len(self._question_ids)), key=self._order_key))
+
+    def difficulty(self, question_id: int) -> float:
+        return self._difficulty[self._slots[question_id]]
+
+    def _student_slot(self, student: Hashable) -> int:
+        slot = self._students.get(student)
+        if slot is None:
+            slot = self._students[student] = len(self._ability)
+            self._ability.append(0.0)
+            self._student_answers.append(0)
+        return slot
+
+    def ability(self, student: Hashable) -> float:
+        slot = self._students.get(student)
+        return 0.0 if slot is None else self._ability[slot]
+
+    def set_ability(self, student: Hashable, ability: float, answers: int = 0) -> None:
+        slot = self._student_slot(student)
+        self._ability[slot] = ability
+        self._student_answers[slot] = answers
+
+    def next_question(self, student: Hashable, asked: Collection[int] = ()) -> Optional[int]:
+        """The unasked question closest to the student's target difficulty."""
+        order, difficulty, question_ids = self._order, self._difficulty, self._question_ids
+        target = self.ability(student) - self.target_offset
+        right = bisect_left(order, (target, -1), key=self._order_key)
+        left = right - 1
+        # Walk outwards past questions already asked
+        while left >= 0 or right < len(order):
+            if right >= len(order) or (
+                left >= 0 and target - difficulty[order[left]] <= difficulty[order[right]] - target
+            ):
+                candidate, left = order[left], left - 1
+            else:
+                candidate, right = order[right], right + 1
+            if question_ids[candidate] not in asked:
+                return question_ids[candidate]
+        return None
+
+    def update(self, student: Hashable, question_id: int, correct: bool) -> Tuple[float, float]:
+        """Apply one graded answer; returns the new (ability, difficulty)."""
+        question = self._slots[question_id]
+        student_slot = self._student_slot(student)
+        ability = self._ability[student_slot]
+        difficulty = self._difficulty[question]
+        surprise = (1.0 if correct else 0.0) - success_probability(ability, difficulty)
+
+        ability += self._step(self.k_student, self._student_answers[student_slot]) * surprise
+        difficulty -= self._step(self.k_question, self._question_answers[question]) * surprise
+        self._ability[student_slot] = ability
+        self._student_answers[student_slot] += 1
+        self._set_difficulty(question, difficulty)
+        self._question_answers[question] += 1
+
+        self._dirty_questions.add(question)
+        self._dirty_students.add(student_slot)
+        return ability, difficulty
+
+    def _step(self, k: float, answers: int) -> float:
+        return max(self.k_min, k / (1.0 + self.k_decay * answers))
+
+    def _set_difficulty(self, slot: int, difficulty: float) -> None:
+        order = self._order
+        index = bisect_left(order, self._order_key(slot), key=self._order_key)
+        del order[index]
+        self._difficulty[slot] = difficulty
+        insort(order, slot, key=self._order_key)
+
+    def take_changes(self) -> Tuple[List[Tuple[int, float, int]], List[Tuple[Hashable, float, int]]]:
+        """Question and student rows updated since the last call, for saving."""
+        questions = [
+            (self._question_ids[slot], self._difficulty[slot], self._question_answers[slot])
+            for slot in sorted(self._dirty_questions)
+        ]
+        slot_students = {slot: student for student, slot in self._students.items()}
+        students = [
+            (slot_students[slot], self._ability[slot], self._student_answers[slot])
+            for slot in sorted(self._dirty_students)
+        ]
+        self._dirty_questions.clear()
+        self._dirty_students.clear()
+        return questions, students
@@ -0,0 +1,180 @@
+import codecs
+import json
+import logging
+import queue
+import select
+import socket
+import threading
+from collections import deque
+from typing import List, Optional
+
+# Pseudo-action put on the incoming queue when the connection state changes
+STATUS_ACTION = "_connection"
+
+
+class NetworkWorker:
+    """Talk to the feedback server from a background thread.
+
+    send() only enqueues and poll() only drains what has already arrived,
+    so neither ever blocks the caller. That makes them safe to call from
+    the Tk main loop, e.g. from a root.after() callback. The worker
+    connects on start, reconnects with exponential backoff when the
+    connection drops or a reply cannot be read, and keeps unsent messages
+    queued until it is back.
+    """
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 8765,
+        reconnect_delay: float = 0.5,
+        max_reconnect_delay: float = 30.0,
+        connect_timeout: float = 5.0,
+        poll_interval: float = 0.05,
+        send_timeout: float = 30.0,
+    ):
+        self.host = host
+        self.port = port
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.connect_timeout = connect_timeout
+        self.poll_interval = poll_interval
+        self.send_timeout = send_timeout
+        self.outgoing: "queue.Queue[bytes]" = queue.Queue()
+        self.incoming: "queue.Queue[dict]" = queue.Queue()
+        self.connected = False
+        self._pending: deque = deque()
+        self._sock: Optional[socket.socket] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+
+    def start(self) -> "NetworkWorker":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="quiz-network", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._close()
+
+    def send(self, action: str, content) -> None:
+        self.outgoing.put(json.dumps({"action": action, "content": content}).encode("utf-8"))
+
+    def poll(self, limit: int = 100) -> List[dict]:
+        """Return up to `limit` messages that have arrived, without waiting."""
+        messages = []
+        while len(messages) < limit:
+            try:
+                messages.append(self.incoming.get_nowait())
+            except queue.Empty:
+                break
+        return messages
+
+    def _run(self) -> None:
+        delay = self.reconnect_delay
+        while not self._stop.is_set():
+            if self._sock is None:
+                if not self._connect():
+                    self._stop.wait(delay)
+                    delay = min(delay * 2, self.max_reconnect_delay)
+                    continue
+                delay = self.reconnect_delay
+            try:
+                self._flush_outgoing()
+                self._receive()
+            except OSError as e:
+                logging.warning(f"Connection to {self.host}:{self.port} lost: {e}")
+                self._close()
+            except Exception as e:
+                # A bad payload from the server must not kill the worker;
+                # start over on a fresh connection and a clean buffer
+                logging.exception(f"Dropping connection to {self.host}:{self.port} after an error")
+                self._close(error=str(e))
+                self._stop.wait(delay)
+
+    def _connect(self) -> bool:
+        try:
+            sock = socket.create_connection((self.host, self.port), timeout=self.connect_timeout)
+        except OSError as e:
+            logging.debug(f"Could not connect to {self.host}:{self.port}: {e}")
+            return False
+        # Reads and writes wait in select (poll_interval for replies,
+        # send_timeout without progress for sends) rather than on a socket
+        # timeout, so a large batch on a slow link is not taken for a dead
+        # connection
+        sock.setblocking(False)
+        self._sock = sock
+        self._buffer = ""
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._set_connected(True)
+        logging.info(f"Connected to server at {self.host}:{self.port}")
+        return True
+
+    def _flush_outgoing(self) -> None:
+        while True:
+            if not self._pending:
+                try:
+                    self._pending.append(self.outgoing.get_nowait())
+                except queue.Empty:
+                    return
+            # Only dropped from _pending once fully sent, so a message cut
+            # off by a disconnect is resent after reconnecting
+            self._send_all(self._pending[0])
+            self._pending.popleft()
+
+    def _send_all(self, data: bytes) -> None:
+        """Send everything, failing only after send_timeout without progress."""
+        view = memoryview(data)
+        while view:
+            _, writable, _ = select.select([], [self._sock], [], self.send_timeout)
+            if not writable:
+                raise TimeoutError(f"No send progress for {self.send_timeout}s")
+            try:
+                view = view[self._sock.send(view):]
+            except BlockingIOError:
+                continue
+
+    def _receive(self) -> None:
+        readable, _, _ = select.select([self._sock], [], [], self.poll_interval)
+        if not readable:
+            return
+        try:
+            data = self._sock.recv(65536)
+        except BlockingIOError:
+            return
+        if not data:
+            raise ConnectionResetError("Server closed the connection")
+        self._buffer += self._utf8.decode(data)
+        while True:
+            self._buffer = self._buffer.lstrip()
+            if not self._buffer:
+                return
+            try:
+                message, end = self._decoder.raw_decode(self._buffer)
+            except json.JSONDecodeError:
+                return
+            self._buffer = self._buffer[end:]
+            self.incoming.put(message)
+
+    def _close(self, error: Optional[str] = None) -> None:
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+            self._set_connected(False, error)
+
+    def _set_connected(self, connected: bool, error: Optional[str] = None) -> None:
+        self.connected = connected
+        response = {"connected": connected}
+        if error is not None:
+            response["error"] = error
+        self.incoming.put({"action": STATUS_ACTION, "response": response})
@@ -0,0 +1,212 @@
+"""
+Offline-first sync of quiz results.
+
+Answers to quizzes from the server's bank, feedback requests on them, and
+the adaptive engine's estimate changes for their questions are written to
+the Outbox table of the local quiz database first, and OutboxSync ships
+them to the server in batches whenever the network worker is connected. A
+batch is one `submit_answers` message whose items are zlib-compressed
+JSON, base64 encoded so it fits the JSON socket protocol:
+
+    {"batch_id": "...", "encoding": "zlib+base64", "count": 120, "data": "eJy..."}
+
+The server replies with the idempotency keys it has stored, including
+ones it had already seen, and only those are marked as synced. Items it
+refuses come back one by one in `rejected` with a reason; they are closed
+with that reason instead of being resent. A batch that is lost or
+rejected as a whole is sent again later, and the keys let the server drop
+the duplicates.
+"""
+
+import base64
+import json
+import logging
+import math
+import time
+import uuid
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from network_worker import STATUS_ACTION, NetworkWorker
+from quiz_db import ESTIMATES_KIND, OutboxItem, QuizDB
+
+SUBMIT_ACTION = "submit_answers"
+BATCH_ENCODING = "zlib+base64"
+ITEM_KINDS = ("answer", "feedback_request", ESTIMATES_KIND)
+# Tags items that refer to the server's question bank. Local quizzes have
+# their own ids, so their results never leave the client.
+BANK_SOURCE = "bank"
+ID_FIELDS = ("question_id", "quiz_id", "student_id")
+TEXT_FIELDS = ("selected_choice", "open_ended_response", "response")
+
+
+def encode_batch(items: List[OutboxItem]) -> dict:
+    rows = [[item.idempotency_key, item.kind, item.payload] for item in items]
+    data = zlib.compress(json.dumps(rows, separators=(",", ":")).encode("utf-8"), 6)
+    return {
+        "batch_id": str(uuid.uuid4()),
+        "encoding": BATCH_ENCODING,
+        "count": len(rows),
+        "data": base64.b64encode(data).decode("ascii"),
+    }
+
+
+def parse_item(row: Any) -> OutboxItem:
+    """Check one [key, kind, payload] row and coerce its ids to int.
+
+    Raises ValueError describing the first problem found.
+    """
+    if not isinstance(row, (list, tuple)) or len(row) != 3:
+        raise ValueError("Item is not a [key, kind, payload] row")
+    key, kind, payload = row
+    if not isinstance(key, str) or not key:
+        raise ValueError("Missing idempotency key")
+    if kind not in ITEM_KINDS:
+        raise ValueError(f"Unknown item kind {kind!r}")
+    if not isinstance(payload, dict):
+        raise ValueError("Payload is not an object")
+    if payload.get("source") != BANK_SOURCE:
+        raise ValueError("Item does not refer to the server's question bank")
+    payload = dict(payload)
+    if kind == ESTIMATES_KIND:
+        payload["questions"] = [_estimate_row(row, "questions") for row in payload.get("questions") or []]
+        if payload.get("student") is not None:
+            payload["student"] = _estimate_row(payload["student"], "student")
+    elif payload.get("question_id") is None:
+        raise ValueError("question_id is required")
+    for field in ID_FIELDS:
+        value = payload.get(field)
+        if value is None:
+            continue
+        # JSON has no int type of its own; accept "12" and 12.0 but not True or 1.5
+        if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+            raise ValueError(f"{field} is not an integer: {value!r}")
+        try:
+            payload[field] = int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{field} is not an integer: {value!r}") from None
+    for field in TEXT_FIELDS:
+        if payload.get(field) is not None and not isinstance(payload[field], str):
+            raise ValueError(f"{field} is not a string")
+    return OutboxItem(key, kind, payload)
+
+
+def _estimate_row(row: Any, field: str) -> Tuple[int, float, int]:
+    """Coerce an [id, estimate change, new answers] row."""
+    try:
+        row_id, delta, answers = row
+        if isinstance(row_id, bool) or isinstance(answers, bool):
+            raise TypeError
+        row = (int(row_id), float(delta), int(answers))
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} rows must be [id, change, answers]") from None
+    if not math.isfinite(row[1]) or row[2] < 0:
+        raise ValueError(f"{field} row out of range: {list(row)}")
+    return row
+
+
+def decode_batch(content: dict) -> Tuple[List[OutboxItem], List[Tuple[Optional[str], str]]]:
+    """Inverse of encode_batch; also accepts uncompressed `items` rows.
+
+    Returns (valid items, rejected (key, reason) pairs). Only a malformed
+    envelope raises, so one bad item cannot sink the rest of its batch.
+    """
+    if content.get("encoding") == BATCH_ENCODING:
+        rows = json.loads(zlib.decompress(base64.b64decode(content["data"])))
+    elif "items" in content:
+        rows = content["items"]
+    else:
+        raise ValueError(f"Unsupported batch encoding: {content.get('encoding')}")
+    if not isinstance(rows, list):
+        raise ValueError("Batch items are not a list")
+    items, rejected = [], []
+    for row in rows:
+        try:
+            items.append(parse_item(row))
+        except ValueError as e:
+            key = row[0] if isinstance(row, (list, tuple)) and row and isinstance(row[0], str) else None
+            rejected.append((key, str(e)))
+    return items, rejected
+
+
+class OutboxSync:
+    """Send pending Outbox items over a NetworkWorker, one batch at a time.
+
+    Driven from the caller's loop: call maybe_sync() periodically and
+    handle() with every message from the worker. Neither touches the
+    network directly, so both are safe on the Tk main thread.
+    """
+
+    def __init__(
+        self,
+        db: QuizDB,
+        network: NetworkWorker,
+        batch_size: int = 200,
+        retry_interval: float = 5.0,
+    ):
+        self.db = db
+        self.network = network
+        self.batch_size = batch_size
+        self.retry_interval = retry_interval
+        # batch_id -> keys, for the batch waiting on an ack
+        self.in_flight: Dict[str, List[str]] = {}
+        # No batch is sent before this time; pushed back after a failure
+        self._retry_at = 0.0
+        self._pending: Optional[int] = None
+
+    @property
+    def pending(self) -> int:
+        """Unsynced items; only counted in the database when unknown."""
+        if self._pending is None:
+            self._pending = self.db.count_pending_outbox()
+        return self._pending
+
+    def notify_queued(self) -> None:
+        self._pending = None
+
+    def maybe_sync(self) -> bool:
+        """Send the next batch if connected, idle and there is work to do."""
+        if not self.network.connected or not self.pending:
+            return False
+        now = time.monotonic()
+        if now < self._retry_at:
+            return False
+        # A batch whose ack never came is resent after retry_interval
+        self.in_flight.clear()
+        items = self.db.get_pending_outbox(self.batch_size)
+        if not items:
+            self._pending = 0
+            return False
+        batch = encode_batch(items)
+        self.in_flight[batch["batch_id"]] = [item.idempotency_key for item in items]
+        self._retry_at = now + self.retry_interval
+        self.network.send(SUBMIT_ACTION, batch)
+        logging.info(f"Syncing {len(items)} outbox items in batch {batch['batch_id']}")
+        return True
+
+    def handle(self, message: dict) -> None:
+        action = message.get("action")
+        if action == STATUS_ACTION:
+            # Whatever was in flight on a dropped connection is resent
+            self.in_flight.clear()
+            if message["response"]["connected"]:
+                self.notify_queued()
+                self._retry_at = 0.0
+                self.maybe_sync()
+        elif action == SUBMIT_ACTION:
+            response = message.get("response") or {}
+            self.in_flight.pop(response.get("batch_id"), None)
+            if "error" in response:
+                # Left pending; retried once retry_interval has passed
+                logging.warning(f"Outbox batch not accepted: {response['error']}")
+                return
+            # Acks for a batch already given up on still count
+            synced = self.db.mark_outbox_synced(response.get("acked", []))
+            rejected = [(key, reason) for key, reason in response.get("rejected", []) if key]
+            if rejected:
+                logging.warning(f"Server rejected {len(rejected)} outbox items, first: {rejected[0][1]}")
+                synced += self.db.mark_outbox_rejected(rejected)
+            self._pending = max(0, self.pending - synced)
+            self._retry_at = 0.0
+            # Keep going until the backlog is drained
+            self.maybe_sync()
@@ -1,84 +1,246 @@
-import socket
-import json
 import random
 import logging
 import time
-from typing import List, Optional, Tuple
-from quiz_db import QuizDB, Quiz, Question, Answer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+from quiz_db import QuizDB, Quiz, Question, Answer, QuestionStats
+from quiz_bundle import QuizBundle, read_bundle
+from adaptive import AdaptiveEngine
+from network_worker import NetworkWorker
+from outbox import BANK_SOURCE, OutboxSync
+from quiz_db import ESTIMATES_KIND
 
 logging.basicConfig(level=logging.INFO)
 
 
 class QuizApp:
-    def __init__(self, db: QuizDB = QuizDB()):
-        self.db = db
+    def __init__(self, db: Optional[QuizDB] = None, student_id: Optional[int] = None, adaptive: bool = True):
+        # Database and server connection are both opened on first use
+        self._db = db
+        self.student_id = student_id
+        # Pick each next question by ability instead of shuffling
+        self.adaptive = adaptive
+        self.engine: Optional[AdaptiveEngine] = None
+        self.asked: set = set()
+        self.network: Optional[NetworkWorker] = None
+        self.outbox: Optional[OutboxSync] = None
         self.current_question_index = 0
         self.quizzes: List[Quiz] = []
         self.questions: List[Question] = []
+        # question_id -> Question for the quiz being taken
+        self.question_index: Dict[int, Question] = {}
+        # Quizzes and bundles received from the server's question bank
+        self.remote_quizzes: List[Quiz] = []
+        self.remote_bundles: Dict[int, QuizBundle] = {}
+        # quiz_id -> the bank's latest quiz_stats response
+        self.remote_stats: Dict[int, dict] = {}
+        # The bank's (ability, answers) for student_id, once fetched
+        self.remote_ability: Optional[Tuple[float, int]] = None
+        # Question and ability estimates the engine started from, so only
+        # this attempt's changes are sent to the bank
+        self._question_baseline: Dict[int, Tuple[float, int]] = {}
+        self._ability_baseline: Tuple[float, int] = (0.0, 0)
         self.answers: List[Answer] = []
         self.current_quiz: Optional[Quiz] = None
+        # Whether current_quiz comes from the server's bank. Its ids belong
+        # to the server, so none of its data goes into the local database.
+        self.remote = False
         self.time_limit: Optional[int] = None
         self.start_time: Optional[float] = None
         self.server_host = 'localhost'
         self.server_port = 8765
-        self._connect_to_server()
 
-    def _connect_to_server(self) -> None:
-        try:
-            self.socket_client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.socket_client.connect((self.server_host, self.server_port))
-            logging.info(f"Connected to server at {self.server_host}:{self.server_port}")
-        except Exception as e:
-            logging.error(f"Failed to connect to server: {e}")
+    @property
+    def db(self) -> QuizDB:
+        if self._db is None:
+            self._db = QuizDB()
+        return self._db
+
+    @db.setter
+    def db(self, db: QuizDB) -> None:
+        self._db = db
+
+    def _connect_to_server(self) -> NetworkWorker:
+        """Start the background network worker if it is not running yet."""
+        if self.network is None:
+            self.network = NetworkWorker(self.server_host, self.server_port).start()
+            self.outbox = OutboxSync(self.db, self.network)
+        return self.network
 
     def _send_message(self, action, content):
-        if self.socket_client:
-            message = json.dumps({'action': action, 'content': content})
-            self.socket_client.send(message.encode('utf-8'))
-        else:
-            logging.error("No connection to server.")
+        # Queued for the worker thread; never waits on the server
+        self._connect_to_server().send(action, content)
+
+    def _receive_message(self) -> Optional[dict]:
+        """Return the next message from the server, or None if none has arrived."""
+        messages = self.poll_messages(limit=1)
+        return messages[0] if messages else None
 
-    def _receive_message(self):
-        if self.socket_client:
+    def poll_messages(self, limit: int = 100) -> List[dict]:
+        """Return the messages received so far without blocking."""
+        if self.network is None:
+            return []
+        messages = self.network.poll(limit)
+        for message in messages:
+            # One bad message (say a bundle of a newer version) must not
+            # lose the rest, which are already off the worker's queue
             try:
-                data = self.socket_client.recv(1024).decode('utf-8')
-                if data:
-                    message = json.loads(data)
-                    return message
-            except Exception as e:
-                logging.error(f"Error receiving message: {e}")
-        return None
+                self.outbox.handle(message)
+                self._handle_message(message)
+            except Exception:
+                logging.exception(f"Failed to handle '{message.get('action')}' message")
+        self.outbox.maybe_sync()
+        return messages
+
+    def _handle_message(self, message: dict) -> None:
+        response = message.get("response")
+        if not isinstance(response, dict) or "error" in response:
+            return
+        action = message.get("action")
+        if action == "list_quizzes":
+            self.remote_quizzes = [
+                Quiz(title, description, quiz_id) for quiz_id, title, description in response["quizzes"]
+            ]
+        elif action == "get_quiz_bundle":
+            bundle = QuizBundle.from_dict(response["bundle"])
+            self.remote_bundles[bundle.quiz.quiz_id] = bundle
+        elif action == "quiz_stats":
+            self.remote_stats[response["quiz_id"]] = response
+        elif action == "student_ability" and response.get("student_id") == self.student_id:
+            if response.get("ability") is not None:
+                self.remote_ability = (response["ability"], response["answers"])
+
+    def fetch_quizzes(self) -> None:
+        """Ask the server for its quizzes; they land in remote_quizzes."""
+        self._send_message('list_quizzes', {})
+
+    def fetch_quiz_bundle(self, quiz_id: int) -> None:
+        """Ask the server for a quiz; it lands in remote_bundles."""
+        self._send_message('get_quiz_bundle', {'quiz_id': quiz_id})
+
+    def fetch_quiz_stats(self, quiz_id: int) -> None:
+        """Ask the server for a quiz's statistics; they land in remote_stats."""
+        self._send_message('quiz_stats', {'quiz_id': quiz_id})
+
+    def fetch_ability(self) -> None:
+        """Ask the server for the student's ability; it lands in remote_ability."""
+        if self.student_id is not None:
+            self._send_message('student_ability', {'student_id': self.student_id})
+
+    def sync_outbox(self) -> None:
+        """Queue a sync of unsent results; it happens once connected."""
+        self._connect_to_server()
+        self.outbox.notify_queued()
+        self.outbox.maybe_sync()
+
+    def close(self) -> None:
+        if self.network is not None:
+            self.network.stop()
+            self.network = None
 
     def load_questions(self, quiz_id: int) -> None:
         """Load questions for a specific quiz from the database."""
-        self.questions = self.db.get_questions_by_quiz_id(quiz_id)
+        self._set_questions(self.db.get_questions_by_quiz_id(quiz_id))
+
+    def _set_questions(self, questions: List[Question]) -> None:
+        self.questions = questions
+        self.question_index = {question.question_id: question for question in questions}
 
     def start_quiz(self, quiz_id: int, time_limit: Optional[int] = None) -> None:
-        """Start the quiz."""
+        """Start a quiz from the local database."""
         logging.info("Starting the quiz...")
+        self.remote = False
         self.current_quiz = self.db.get_quiz_by_id(quiz_id)
         if not self.current_quiz:
             logging.error(f"No quiz found with ID {quiz_id}")
             return
         self.load_questions(quiz_id)
-        random.shuffle(self.questions)
+        self._begin(time_limit)
+
+    def start_remote_quiz(self, quiz_id: int, time_limit: Optional[int] = None) -> bool:
+        """Start a quiz from the server's bank; False until its bundle has arrived."""
+        # The Tk radio buttons hand over the ID as a string
+        bundle = self.remote_bundles.get(int(quiz_id))
+        if bundle is None:
+            # Never falls back to the local quiz that happens to share the ID
+            logging.info(f"Quiz {quiz_id} has not been downloaded yet")
+            self.current_quiz = None
+            self.fetch_quiz_bundle(int(quiz_id))
+            return False
+        self.start_quiz_from_bundle(bundle, time_limit, remote=True)
+        return True
+
+    def start_quiz_from_bundle(
+        self, bundle: Union[QuizBundle, str, Path], time_limit: Optional[int] = None, remote: bool = False
+    ) -> None:
+        """Start a quiz from a prepacked bundle, without querying its questions.
+
+        remote marks a bundle served from the server's bank rather than one
+        built from the local database.
+        """
+        if not isinstance(bundle, QuizBundle):
+            bundle = read_bundle(bundle)
+        logging.info("Starting the quiz from a bundle...")
+        self.remote = remote
+        self.current_quiz = bundle.quiz
+        self._set_questions(bundle.questions)
+        self._begin(time_limit, bundle.params if remote else None)
+
+    def _begin(self, time_limit: Optional[int], bank_params: Optional[Dict[int, Tuple[float, int]]] = None) -> None:
+        if self.adaptive:
+            self.engine = self._build_engine(bank_params)
+        else:
+            self.engine = None
+            random.shuffle(self.questions)
+        self.asked.clear()
         self.current_question_index = 0
         self.answers.clear()
         self.time_limit = time_limit
         self.start_time = time.time()
-        self._send_message('start_quiz', {'quiz_id': quiz_id})
+
+    def _build_engine(self, bank_params: Optional[Dict[int, Tuple[float, int]]] = None) -> AdaptiveEngine:
+        """Engine over the current questions, seeded with stored estimates.
+
+        A server quiz starts from the bank's estimates, shipped in its
+        bundle and by fetch_ability; a local quiz from the local database.
+        """
+        engine = AdaptiveEngine()
+        if self.remote:
+            params = bank_params or {}
+            ability = self.remote_ability
+        else:
+            params = self.db.get_question_params([question.question_id for question in self.questions])
+            ability = self.db.get_student_ability(self.student_id) if self.student_id is not None else None
+        self._question_baseline = {
+            question.question_id: params.get(question.question_id, (0.0, 0)) for question in self.questions
+        }
+        self._ability_baseline = tuple(ability) if ability is not None else (0.0, 0)
+        engine.add_questions([(question_id, *estimate) for question_id, estimate in self._question_baseline.items()])
+        if ability is not None and self.student_id is not None:
+            engine.set_ability(self.student_id, *ability)
+        return engine
 
     def get_next_question(self) -> Optional[Question]:
         """Get the next question."""
-        if self.current_question_index < len(self.questions):
+        if self.current_question_index >= len(self.questions):
+            return None
+        if self.engine is not None:
+            question_id = self.engine.next_question(self.student_id, self.asked)
+            if question_id is None:
+                return None
+            self.asked.add(question_id)
+            question = self.question_index[question_id]
+        else:
             question = self.questions[self.current_question_index]
-            self.current_question_index += 1
-            return question
-        return None
+        self.current_question_index += 1
+        return question
 
     def submit_answer(self, question_id: int, selected_choice: Optional[str] = None, open_ended_response: Optional[str] = None) -> None:
         """Submit an answer for a question."""
-        question = self.db.get_question_by_id(question_id)
+        question = self.question_index.get(question_id)
+        if question is None and not self.remote:
+            # Not part of the quiz being taken; look it up directly
+            question = self.db.get_question_by_id(question_id)
         if question:
             if question.is_open_ended:
                 is_correct = None  # Open-ended questions aren't automatically marked
@@ -86,6 +248,7 @@ class QuizApp:
                     question_id=question_id,
                     open_ended_response=open_ended_response,
                     is_correct=is_correct,
+                    student_id=self.student_id,
                 )
             else:
                 is_correct = selected_choice == question.correct_answer
@@ -93,7 +256,10 @@ class QuizApp:
                     question_id=question_id,
                     selected_choice=selected_choice,
                     is_correct=is_correct,
+                    student_id=self.student_id,
                 )
+                if self.engine is not None and question_id in self.question_index:
+                    self.engine.update(self.student_id, question_id, is_correct)
             self.answers.append(answer)
             logging.info(f"Submitted answer: {answer}")
         else:
@@ -107,9 +273,70 @@ class QuizApp:
         return correct_answers, incorrect_answers, unanswered
 
     def save_quiz_results(self) -> None:
-        """Save the quiz results to the database."""
-        for answer in self.answers:
-            self.db.record_answer(answer)
+        """Save a local quiz's results, or queue a server quiz's for the server."""
+        if self.remote:
+            # The outbox row is the only local copy until the server acks it
+            self.db.enqueue_outbox("answer", [self._bank_payload(answer) for answer in self.answers])
+            if self.engine is not None:
+                self._queue_estimate_changes()
+            self.sync_outbox()
+            return
+        self.db.add_answers(self.answers)
+        if self.engine is not None:
+            questions, students = self.engine.take_changes()
+            # An anonymous attempt still informs question difficulty
+            students = [row for row in students if row[0] is not None]
+            self.db.save_adaptive_params(questions, students)
+
+    def _queue_estimate_changes(self) -> None:
+        """Send the engine's changes since the quiz started to the bank."""
+        questions, students = self.engine.take_changes()
+        question_changes = []
+        for question_id, difficulty, answers in questions:
+            start_difficulty, start_answers = self._question_baseline[question_id]
+            question_changes.append([question_id, difficulty - start_difficulty, answers - start_answers])
+            self._question_baseline[question_id] = (difficulty, answers)
+        student_change = None
+        for student_id, ability, answers in students:
+            if student_id is not None and student_id == self.student_id:
+                start_ability, start_answers = self._ability_baseline
+                student_change = [student_id, ability - start_ability, answers - start_answers]
+                self._ability_baseline = self.remote_ability = (ability, answers)
+        if question_changes or student_change:
+            self.db.enqueue_outbox(
+                ESTIMATES_KIND,
+                [
+                    {
+                        "source": BANK_SOURCE,
+                        "quiz_id": self.current_quiz.quiz_id,
+                        "questions": question_changes,
+                        "student": student_change,
+                    }
+                ],
+            )
+
+    def _bank_payload(self, answer: Answer) -> dict:
+        return {
+            "source": BANK_SOURCE,
+            "quiz_id": self.current_quiz.quiz_id,
+            "question_id": answer.question_id,
+            "selected_choice": answer.selected_choice,
+            "is_correct": answer.is_correct,
+            "open_ended_response": answer.open_ended_response,
+            "student_id": answer.student_id,
+        }
+
+    def request_feedback(self, question_id: int, response: str) -> Optional[str]:
+        """Queue an open-ended response to a server quiz for feedback; returns its key."""
+        if not self.remote:
+            logging.error("Feedback requests are only sent for quizzes from the server")
+            return None
+        key = self.db.enqueue_outbox(
+            "feedback_request",
+            [{"source": BANK_SOURCE, "quiz_id": self.current_quiz.quiz_id, "question_id": question_id, "response": response}],
+        )[0]
+        self.sync_outbox()
+        return key
 
     def display_score(self) -> None:
         """Display the final score."""
@@ -122,13 +349,57 @@ class QuizApp:
         return self.quizzes
 
     def get_quiz_statistics(self) -> Optional[Tuple[int, int, float]]:
-        """Get statistics for the current quiz."""
-        if self.current_quiz:
-            return self.db.get_quiz_statistics(self.current_quiz.quiz_id)
-        return None
+        """Get statistics for the current quiz.
+
+        For a server quiz these are the bank's last reported figures, None
+        until the first arrive; every call asks the server for fresh ones.
+        """
+        if not self.current_quiz:
+            return None
+        if self.remote:
+            stats = self._remote_stats()
+            if stats is None:
+                return None
+            return stats["total_questions"], stats["total_answers"], stats["percent_correct"]
+        return self.db.get_quiz_statistics(self.current_quiz.quiz_id)
+
+    def get_question_report(self) -> List[QuestionStats]:
+        """Get per-question difficulty for the current quiz.
+
+        Like get_quiz_statistics, a server quiz reports the bank's figures.
+        """
+        if not self.current_quiz:
+            return []
+        if self.remote:
+            stats = self._remote_stats()
+            if stats is None:
+                return []
+            report = []
+            for question_id, answers, graded, percent_correct, discrimination in stats["questions"]:
+                question = self.question_index.get(question_id)
+                report.append(
+                    QuestionStats(
+                        question_id,
+                        question.question_text if question else "",
+                        answers=answers,
+                        graded=graded,
+                        correct=round((percent_correct or 0) * graded / 100),
+                        discrimination=discrimination,
+                    )
+                )
+            return report
+        return self.db.get_question_report(self.current_quiz.quiz_id)
+
+    def _remote_stats(self) -> Optional[dict]:
+        quiz_id = self.current_quiz.quiz_id
+        self.fetch_quiz_stats(quiz_id)
+        return self.remote_stats.get(quiz_id)
 
     def update_current_quiz(self, title: str, description: str) -> bool:
         """Update the current quiz information."""
+        if self.remote:
+            logging.error("Quizzes from the server cannot be changed here")
+            return False
         if self.current_quiz:
             updated_quiz = Quiz(
                 quiz_id=self.current_quiz.quiz_id, title=title, description=description
@@ -138,11 +409,15 @@ class QuizApp:
 
     def delete_current_quiz(self) -> bool:
         """Delete the current quiz and all related questions and answers."""
+        if self.remote:
+            logging.error("Quizzes from the server cannot be deleted here")
+            return False
         if self.current_quiz:
             result = self.db.delete_quiz(self.current_quiz.quiz_id)
             if result:
                 self.current_quiz = None
                 self.questions.clear()
+                self.question_index.clear()
                 self.answers.clear()
             return result
         return False
@@ -162,6 +437,9 @@ class QuizApp:
 
     def add_question_to_current_quiz(self, question: Question) -> Optional[int]:
         """Add a new question to the current quiz."""
+        if self.remote:
+            logging.error("Questions cannot be added to quizzes from the server")
+            return None
         if self.current_quiz:
             question.quiz_id = self.current_quiz.quiz_id
             return self.db.add_question(question)
@@ -0,0 +1,95 @@
+"""
+Prepacked quiz bundles.
+
+A bundle holds one quiz, all of its questions and choices, and the
+adaptive difficulty estimates of those questions, so a quiz loads with a
+single file read (or a single network message) instead of one query per
+table. On disk it is the magic bytes b"QZB1" followed by zlib-compressed
+JSON. Over the socket the same dict is sent as plain JSON.
+"""
+
+import json
+import os
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+from quiz_db import Question, Quiz, QuizDB
+
+BUNDLE_MAGIC = b"QZB1"
+BUNDLE_VERSION = 1
+
+
+@dataclass(slots=True)
+class QuizBundle:
+    quiz: Quiz
+    questions: List[Question] = field(default_factory=list)
+    # question_id -> (difficulty, answers) for questions with adaptive estimates
+    params: Dict[int, Tuple[float, int]] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        return {
+            "version": BUNDLE_VERSION,
+            "quiz": [self.quiz.title, self.quiz.description, self.quiz.quiz_id],
+            # Positional rows keep the payload small
+            "questions": [
+                [q.question_id, q.question_text, q.correct_answer, q.choices, q.is_open_ended]
+                for q in self.questions
+            ],
+            "params": [[question_id, difficulty, answers] for question_id, (difficulty, answers) in self.params.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "QuizBundle":
+        if data.get("version") != BUNDLE_VERSION:
+            raise ValueError(f"Unsupported quiz bundle version: {data.get('version')}")
+        quiz = Quiz(*data["quiz"])
+        questions = [
+            Question(quiz.quiz_id, text, correct_answer, list(choices), bool(is_open_ended), question_id)
+            for question_id, text, correct_answer, choices, is_open_ended in data["questions"]
+        ]
+        # Bundles written before estimates were shipped have no params
+        params = {question_id: (difficulty, answers) for question_id, difficulty, answers in data.get("params", [])}
+        return cls(quiz, questions, params)
+
+    def pack(self) -> bytes:
+        payload = json.dumps(self.to_dict(), separators=(",", ":")).encode("utf-8")
+        return BUNDLE_MAGIC + zlib.compress(payload, 6)
+
+    @classmethod
+    def unpack(cls, data: bytes) -> "QuizBundle":
+        if not data.startswith(BUNDLE_MAGIC):
+            raise ValueError("Not a quiz bundle")
+        return cls.from_dict(json.loads(zlib.decompress(data[len(BUNDLE_MAGIC):])))
+
+
+def build_bundle(db: QuizDB, quiz_id: int) -> QuizBundle:
+    quiz = db.get_quiz_by_id(quiz_id)
+    if quiz is None:
+        raise ValueError(f"No quiz found with ID {quiz_id}")
+    questions = db.get_questions_by_quiz_id(quiz_id)
+    return QuizBundle(quiz, questions, db.get_question_params([question.question_id for question in questions]))
+
+
+def write_bundle(bundle: QuizBundle, path: Union[str, Path]) -> Path:
+    """Write a bundle atomically, so readers never see a partial file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_bytes(bundle.pack())
+    os.replace(tmp, path)
+    return path
+
+
+def read_bundle(path: Union[str, Path]) -> QuizBundle:
+    return QuizBundle.unpack(Path(path).read_bytes())
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Usage: python quiz_bundle.py QUIZ_ID OUTPUT_PATH
+    quiz_id, output = int(sys.argv[1]), sys.argv[2]
+    bundle = build_bundle(QuizDB(), quiz_id)
+    print(f"Wrote {len(bundle.questions)} questions to {write_bundle(bundle, output)}")
@@ -1,10 +1,13 @@
 import logging
 import sqlite3
 import json
+import math
+import threading
+import uuid
 from pathlib import Path
 from contextlib import contextmanager
-from dataclasses import dataclass
-from typing import List, Optional, Tuple, Union
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Union
 
 DB_FILE = "quiz.db"
 DB_PATH = Path("data") / DB_FILE
@@ -41,15 +44,122 @@ CREATE TABLE IF NOT EXISTS Answers (
 );
 """
 
-
-@dataclass
+# Applied in order to databases whose PRAGMA user_version is below the
+# version; each entry is (version, statements)
+SCHEMA_MIGRATIONS = [
+    (
+        1,
+        (
+            "CREATE INDEX IF NOT EXISTS idx_questions_quiz_id ON Questions(quiz_id)",
+            "CREATE INDEX IF NOT EXISTS idx_answers_question_id ON Answers(question_id)",
+        ),
+    ),
+    (
+        # Choices move from the JSON Questions.choices column to their own
+        # table. The JSON column is still written so older clients can read
+        # new questions, but nothing here reads it anymore.
+        2,
+        (
+            """CREATE TABLE IF NOT EXISTS Choices (
+                question_id INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                choice_text TEXT NOT NULL,
+                PRIMARY KEY (question_id, position),
+                FOREIGN KEY (question_id) REFERENCES Questions(question_id)
+            ) WITHOUT ROWID""",
+            """INSERT OR IGNORE INTO Choices (question_id, position, choice_text)
+               SELECT Questions.question_id, choice.key, choice.value
+               FROM Questions, json_each(Questions.choices) AS choice""",
+        ),
+    ),
+    (
+        # Results waiting to be synced to the server. idempotency_key lets
+        # the server drop a batch it already stored when an ack was lost.
+        3,
+        (
+            """CREATE TABLE IF NOT EXISTS Outbox (
+                outbox_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                idempotency_key TEXT NOT NULL UNIQUE,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                synced_at TIMESTAMP
+            )""",
+            "CREATE INDEX IF NOT EXISTS idx_outbox_pending ON Outbox(outbox_id) WHERE synced_at IS NULL",
+        ),
+    ),
+    (
+        # Keys of outbox items ingested from clients, so a resent batch is
+        # acknowledged without storing its answers twice
+        4,
+        (
+            """CREATE TABLE IF NOT EXISTS IngestedKeys (
+                idempotency_key TEXT PRIMARY KEY,
+                answer_id INTEGER,
+                received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            ) WITHOUT ROWID""",
+        ),
+    ),
+    (
+        # Written back by the open-ended answer grader. grading_attempts
+        # counts failed tries so one unparseable answer cannot stall it.
+        5,
+        (
+            "ALTER TABLE Answers ADD COLUMN feedback TEXT",
+            "ALTER TABLE Answers ADD COLUMN grading_attempts INTEGER NOT NULL DEFAULT 0",
+            """CREATE INDEX IF NOT EXISTS idx_answers_ungraded ON Answers(question_id, answer_id)
+               WHERE is_correct IS NULL AND open_ended_response IS NOT NULL""",
+        ),
+    ),
+    (
+        # Who answered, and the adaptive engine's ability and difficulty
+        # estimates on the Rasch logit scale
+        6,
+        (
+            "ALTER TABLE Answers ADD COLUMN student_id INTEGER",
+            "CREATE INDEX IF NOT EXISTS idx_answers_student_id ON Answers(student_id)",
+            """CREATE TABLE IF NOT EXISTS QuestionParams (
+                question_id INTEGER PRIMARY KEY,
+                difficulty REAL NOT NULL DEFAULT 0,
+                answers INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (question_id) REFERENCES Questions(question_id)
+            )""",
+            """CREATE TABLE IF NOT EXISTS StudentAbilities (
+                student_id INTEGER PRIMARY KEY,
+                ability REAL NOT NULL DEFAULT 0,
+                answers INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )""",
+        ),
+    ),
+    (
+        # Why the server refused an outbox item. A rejected item is closed
+        # like a synced one so it cannot hold up the items queued after it.
+        7,
+        ("ALTER TABLE Outbox ADD COLUMN error TEXT",),
+    ),
+]
+
+# Outbox kind carrying a client's adaptive estimate changes for the bank
+ESTIMATES_KIND = "estimates"
+
+# SQLite's default limit on bound parameters is 999
+MAX_SQL_PARAMS = 900
+
+QUESTION_COLUMNS = "quiz_id, question_text, correct_answer, is_open_ended, question_id"
+# In the order of the Answer fields
+ANSWER_COLUMNS = "question_id, selected_choice, is_correct, open_ended_response, answer_id, feedback, student_id"
+
+
+@dataclass(slots=True)
 class Quiz:
     title: str
     description: Optional[str] = None
     quiz_id: Optional[int] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Question:
     quiz_id: int
     question_text: str
@@ -59,30 +169,97 @@ class Question:
     question_id: Optional[int] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Answer:
     question_id: int
     selected_choice: Optional[str] = None
     is_correct: Optional[bool] = None
     open_ended_response: Optional[str] = None
     answer_id: Optional[int] = None
+    feedback: Optional[str] = None
+    student_id: Optional[int] = None
+
+
+@dataclass(slots=True)
+class QuestionStats:
+    """Difficulty of one question across all recorded answers.
+
+    percent_correct is over graded answers only; open-ended answers stay
+    ungraded (is_correct NULL) until someone marks them. discrimination is
+    the point-biserial correlation between answering correctly and the
+    student's score on the rest of the quiz, over graded answers with a
+    student_id; None until there is enough variation to compute it.
+    """
+
+    question_id: int
+    question_text: str
+    answers: int = 0
+    graded: int = 0
+    correct: int = 0
+    choice_counts: Dict[Optional[str], int] = field(default_factory=dict)
+    discrimination: Optional[float] = None
+
+    @property
+    def percent_correct(self) -> Optional[float]:
+        return self.correct / self.graded * 100 if self.graded else None
+
+
+@dataclass(slots=True)
+class OutboxItem:
+    idempotency_key: str
+    kind: str
+    payload: dict
+    outbox_id: Optional[int] = None
 
 
 class QuizDB:
     def __init__(self, db_path: Optional[Union[str, Path]] = None):
         self.db_path = Path(db_path) if db_path else DB_PATH
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
         self._create_db_path()
         self._init_db()
         logging.basicConfig(level=logging.INFO)
 
+    def _connect(self) -> sqlite3.Connection:
+        """Open the shared connection in WAL mode on first use."""
+        if self._conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Safe with WAL; a power loss can only drop the most recent commits
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn = conn
+        return self._conn
+
     @contextmanager
     def _db_connection(self):
-        """Context manager for database connections."""
-        conn = sqlite3.connect(self.db_path)
-        try:
-            yield conn
-        finally:
-            conn.close()
+        """Context manager yielding the shared connection.
+
+        Calls are serialized by a lock. A transaction left open by a failed
+        call is rolled back so it cannot leak into the next one.
+        """
+        with self._lock:
+            conn = self._connect()
+            try:
+                yield conn
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
 
     def _create_db_path(self):
         """Create the directory for the database file if it doesn't exist.
@@ -105,6 +282,21 @@ class QuizDB:
             self._create_table(conn, QUIZZES_TABLE)
             self._create_table(conn, QUESTIONS_TABLE)
             self._create_table(conn, ANSWERS_TABLE)
+            conn.commit()
+            self._migrate(conn)
+
+    def _migrate(self, conn):
+        """Bring the schema up to the latest SCHEMA_MIGRATIONS version."""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for target, statements in SCHEMA_MIGRATIONS:
+            if target <= version:
+                continue
+            logging.info(f"Migrating quiz database to schema version {target}")
+            for statement in statements:
+                conn.execute(statement)
+            # PRAGMA cannot take a bound parameter
+            conn.execute(f"PRAGMA user_version = {int(target)}")
+            conn.commit()
 
     def add_quiz(self, quiz: Quiz) -> Optional[int]:
         """Add a new quiz."""
@@ -136,21 +328,201 @@ class QuizDB:
                     question.is_open_ended,
                 ),
             )
+            question_id = cursor.lastrowid
+            cursor.executemany(
+                "INSERT INTO Choices (question_id, position, choice_text) VALUES (?, ?, ?)",
+                [(question_id, position, choice) for position, choice in enumerate(question.choices)],
+            )
             conn.commit()
-            return cursor.lastrowid
+            return question_id
 
     def add_answer(self, answer: Answer) -> Optional[int]:
         """Add a new answer for a question."""
         with self._db_connection() as conn:
             cursor = conn.cursor()
-            sql = """INSERT INTO Answers (question_id, selected_choice, is_correct, open_ended_response)
-                     VALUES (?, ?, ?, ?)"""
+            sql = """INSERT INTO Answers (question_id, selected_choice, is_correct, open_ended_response, student_id)
+                     VALUES (?, ?, ?, ?, ?)"""
             cursor.execute(
-                sql, (answer.question_id, answer.selected_choice, answer.is_correct, answer.open_ended_response)
+                sql,
+                (
+                    answer.question_id,
+                    answer.selected_choice,
+                    answer.is_correct,
+                    answer.open_ended_response,
+                    answer.student_id,
+                ),
             )
             conn.commit()
             return cursor.lastrowid
 
+    def add_answers(self, answers: List[Answer]) -> List[int]:
+        """Add a whole attempt's answers in a single transaction."""
+        sql = """INSERT INTO Answers (question_id, selected_choice, is_correct, open_ended_response, student_id)
+                 VALUES (?, ?, ?, ?, ?)"""
+        with self._db_connection() as conn:
+            cursor = conn.cursor()
+            answer_ids = []
+            for answer in answers:
+                cursor.execute(
+                    sql,
+                    (
+                        answer.question_id,
+                        answer.selected_choice,
+                        answer.is_correct,
+                        answer.open_ended_response,
+                        answer.student_id,
+                    ),
+                )
+                answer_ids.append(cursor.lastrowid)
+            conn.commit()
+            return answer_ids
+
+    def _insert_outbox(self, cursor, items: List[OutboxItem]) -> None:
+        cursor.executemany(
+            "INSERT OR IGNORE INTO Outbox (idempotency_key, kind, payload) VALUES (?, ?, ?)",
+            [(item.idempotency_key, item.kind, json.dumps(item.payload)) for item in items],
+        )
+
+    def enqueue_outbox(self, kind: str, payloads: List[dict]) -> List[str]:
+        """Queue payloads for the server; returns their idempotency keys."""
+        items = [OutboxItem(str(uuid.uuid4()), kind, payload) for payload in payloads]
+        with self._db_connection() as conn:
+            self._insert_outbox(conn.cursor(), items)
+            conn.commit()
+        return [item.idempotency_key for item in items]
+
+    def get_pending_outbox(self, limit: int = 500, after_id: int = 0) -> List[OutboxItem]:
+        """Oldest unsynced items first."""
+        with self._db_connection() as conn:
+            rows = conn.execute(
+                """SELECT idempotency_key, kind, payload, outbox_id FROM Outbox
+                   WHERE synced_at IS NULL AND outbox_id > ?
+                   ORDER BY outbox_id LIMIT ?""",
+                (after_id, limit),
+            ).fetchall()
+        return [OutboxItem(key, kind, json.loads(payload), outbox_id) for key, kind, payload, outbox_id in rows]
+
+    def count_pending_outbox(self) -> int:
+        with self._db_connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM Outbox WHERE synced_at IS NULL").fetchone()[0]
+
+    def mark_outbox_synced(self, keys: List[str]) -> int:
+        with self._db_connection() as conn:
+            cursor = conn.executemany(
+                "UPDATE Outbox SET synced_at = CURRENT_TIMESTAMP WHERE idempotency_key = ? AND synced_at IS NULL",
+                [(key,) for key in keys],
+            )
+            conn.commit()
+            return cursor.rowcount
+
+    def mark_outbox_rejected(self, rejected: List[Tuple[str, str]]) -> int:
+        """Close (key, reason) items the server refused, keeping the reason."""
+        with self._db_connection() as conn:
+            cursor = conn.executemany(
+                """UPDATE Outbox SET synced_at = CURRENT_TIMESTAMP, error = ?
+                   WHERE idempotency_key = ? AND synced_at IS NULL""",
+                [(reason, key) for key, reason in rejected],
+            )
+            conn.commit()
+            return cursor.rowcount
+
+    def ingest_outbox_items(self, items: List[OutboxItem]) -> Tuple[List[str], int, List[Tuple[str, str]]]:
+        """Store answers sent by clients, skipping keys already ingested.
+
+        Items are expected to be validated already (outbox.parse_item).
+        Multiple-choice answers are re-marked against the question bank
+        rather than trusting the client's is_correct; open-ended answers
+        and feedback requests are stored ungraded. Estimates items add the
+        client's adaptive changes onto QuestionParams and
+        StudentAbilities. Everything happens in one transaction. Returns
+        (acknowledged keys, newly stored answers, rejected (key, reason)
+        pairs); only stored or previously stored keys are acknowledged.
+        """
+        if not items:
+            return [], 0, []
+        with self._db_connection() as conn:
+            cursor = conn.cursor()
+            keys = [item.idempotency_key for item in items]
+            seen = set()
+            for start in range(0, len(keys), MAX_SQL_PARAMS):
+                chunk = keys[start:start + MAX_SQL_PARAMS]
+                cursor.execute(
+                    f"SELECT idempotency_key FROM IngestedKeys WHERE idempotency_key IN ({', '.join('?' * len(chunk))})",
+                    chunk,
+                )
+                seen.update(key for (key,) in cursor.fetchall())
+
+            # Also drops a key repeated within the batch, keeping the first copy
+            first = {}
+            for item in items:
+                if item.idempotency_key not in seen:
+                    first.setdefault(item.idempotency_key, item)
+            new_items = list(first.values())
+            question_ids = sorted(
+                {item.payload["question_id"] for item in new_items if item.kind != ESTIMATES_KIND}
+                | {row[0] for item in new_items if item.kind == ESTIMATES_KIND for row in item.payload["questions"]}
+            )
+            bank: Dict[int, Tuple[str, bool]] = {}
+            for start in range(0, len(question_ids), MAX_SQL_PARAMS):
+                chunk = question_ids[start:start + MAX_SQL_PARAMS]
+                cursor.execute(
+                    f"""SELECT question_id, correct_answer, is_open_ended FROM Questions
+                        WHERE question_id IN ({', '.join('?' * len(chunk))})""",
+                    chunk,
+                )
+                bank.update((row[0], (row[1], bool(row[2]))) for row in cursor.fetchall())
+
+            acked = [key for key in dict.fromkeys(keys) if key in seen]
+            rejected = []
+            stored = 0
+            for item in new_items:
+                payload = item.payload
+                if item.kind == ESTIMATES_KIND:
+                    # Deltas for questions no longer in the bank are dropped
+                    student = payload.get("student")
+                    self._add_adaptive_deltas(
+                        cursor,
+                        [row for row in payload["questions"] if row[0] in bank],
+                        [student] if student else [],
+                    )
+                    cursor.execute("INSERT INTO IngestedKeys (idempotency_key) VALUES (?)", (item.idempotency_key,))
+                    acked.append(item.idempotency_key)
+                    continue
+                question = bank.get(payload["question_id"])
+                if question is None:
+                    logging.warning(f"Rejecting {item.kind} for unknown question {payload['question_id']}")
+                    rejected.append((item.idempotency_key, f"Unknown question {payload['question_id']}"))
+                    continue
+                correct_answer, is_open_ended = question
+                if item.kind == "feedback_request":
+                    choice, response, is_correct = None, payload.get("response"), None
+                else:
+                    choice = payload.get("selected_choice")
+                    response = payload.get("open_ended_response")
+                    is_correct = None if is_open_ended else choice == correct_answer
+                cursor.execute(
+                    """INSERT INTO Answers (question_id, selected_choice, is_correct, open_ended_response, student_id)
+                       VALUES (?, ?, ?, ?, ?)""",
+                    (payload["question_id"], choice, is_correct, response, payload.get("student_id")),
+                )
+                cursor.execute(
+                    "INSERT INTO IngestedKeys (idempotency_key, answer_id) VALUES (?, ?)",
+                    (item.idempotency_key, cursor.lastrowid),
+                )
+                acked.append(item.idempotency_key)
+                stored += 1
+            conn.commit()
+        return acked, stored, rejected
+
+    def purge_synced_outbox(self, older_than_days: int = 7) -> int:
+        with self._db_connection() as conn:
+            cursor = conn.execute(
+                "DELETE FROM Outbox WHERE synced_at IS NOT NULL AND synced_at < datetime('now', ?)",
+                (f"-{int(older_than_days)} days",),
+            )
+            conn.commit()
+            return cursor.rowcount
+
     def get_quiz_by_id(self, quiz_id: int) -> Optional[Quiz]:
         """Retrieve a quiz by its ID."""
         with self._db_connection() as conn:
@@ -168,74 +540,204 @@ class QuizDB:
             cursor.execute(sql,)
             return [Quiz(*row) for row in cursor.fetchall()]
 
-    def get_all_questions(self) -> List[Question]:
-        """Retrieve all questions."""
+    def _load_questions(self, where: str = "", params: tuple = ()) -> List[Question]:
+        """Load questions and their choices with one query each.
+
+        Choices come back ordered by question and position, so they are
+        attached in a single pass without decoding any JSON.
+        """
         with self._db_connection() as conn:
             cursor = conn.cursor()
-            sql = "SELECT * FROM Questions"
-            cursor.execute(sql)
-            questions = []
-            for row in cursor.fetchall():
-                question_id, quiz_id, question_text, correct_answer, choices_json, is_open_ended = row
-                choices = json.loads(choices_json)
-                questions.append(
-                    Question(
-                        quiz_id, question_text, correct_answer, choices, is_open_ended, question_id
-                    )
+            cursor.execute(f"SELECT {QUESTION_COLUMNS} FROM Questions {where} ORDER BY question_id", params)
+            questions = {}
+            for quiz_id, question_text, correct_answer, is_open_ended, question_id in cursor.fetchall():
+                questions[question_id] = Question(
+                    quiz_id, question_text, correct_answer, [], bool(is_open_ended), question_id
                 )
-            return questions
+            if questions:
+                cursor.execute(
+                    f"""SELECT question_id, choice_text FROM Choices
+                        WHERE question_id IN (SELECT question_id FROM Questions {where})
+                        ORDER BY question_id, position""",
+                    params,
+                )
+                for question_id, choice_text in cursor.fetchall():
+                    questions[question_id].choices.append(choice_text)
+            return list(questions.values())
+
+    def get_all_questions(self) -> List[Question]:
+        """Retrieve all questions."""
+        return self._load_questions()
 
     def get_question_by_id(self, question_id: int) -> Optional[Question]:
         """Retrieve a question by its ID."""
-        with self._db_connection() as conn:
-            cursor = conn.cursor()
-            sql = "SELECT * FROM Questions WHERE question_id = ?"
-            cursor.execute(sql, (question_id,))
-            result = cursor.fetchone()
-            if result:
-                question_id, quiz_id, question_text, correct_answer, choices_json, is_open_ended = result
-                choices = json.loads(choices_json)
-                return Question(
-                    quiz_id, question_text, correct_answer, choices, is_open_ended, question_id
-                )
-            return None
+        questions = self._load_questions("WHERE question_id = ?", (question_id,))
+        return questions[0] if questions else None
 
     def get_questions_by_quiz_id(self, quiz_id: int) -> List[Question]:
         """Retrieve all questions for a given quiz."""
+        return self._load_questions("WHERE quiz_id = ?", (quiz_id,))
+
+    def get_choice_distribution(self, quiz_id: int) -> List[Tuple[int, int, str, bool, int]]:
+        """Count how often each choice of each question in a quiz was picked.
+
+        Returns (question_id, position, choice_text, is_correct_choice,
+        times_selected) rows, including choices nobody picked.
+        """
         with self._db_connection() as conn:
             cursor = conn.cursor()
-            sql = "SELECT * FROM Questions WHERE quiz_id = ?"
-            cursor.execute(sql, (quiz_id,))
-            questions = []
-            for row in cursor.fetchall():
-                question_id, quiz_id, question_text, correct_answer, choices_json, is_open_ended = row
-                choices = json.loads(choices_json)
-                questions.append(
-                    Question(
-                        quiz_id, question_text, correct_answer, choices, is_open_ended, question_id
-                    )
-                )
-            return questions
+            cursor.execute(
+                """
+                SELECT Choices.question_id, Choices.position, Choices.choice_text,
+                       Choices.choice_text = Questions.correct_answer,
+                       COUNT(Answers.answer_id)
+                FROM Questions
+                JOIN Choices ON Choices.question_id = Questions.question_id
+                LEFT JOIN Answers ON Answers.question_id = Choices.question_id
+                                 AND Answers.selected_choice = Choices.choice_text
+                WHERE Questions.quiz_id = ?
+                GROUP BY Choices.question_id, Choices.position
+                ORDER BY Choices.question_id, Choices.position
+            """,
+                (quiz_id,),
+            )
+            return [
+                (question_id, position, text, bool(is_correct), count)
+                for question_id, position, text, is_correct, count in cursor.fetchall()
+            ]
 
     def get_answers_by_question_id(self, question_id: int) -> List[Answer]:
         """Retrieve all answers for a given question."""
         with self._db_connection() as conn:
             cursor = conn.cursor()
             # Select columns in the order expected by the Answer class
-            sql = """
-            SELECT question_id, selected_choice, is_correct, open_ended_response, answer_id
-            FROM Answers WHERE question_id = ?
-            """
+            sql = f"SELECT {ANSWER_COLUMNS} FROM Answers WHERE question_id = ?"
             cursor.execute(sql, (question_id,))
             return [Answer(*row) for row in cursor.fetchall()]
 
+    def get_ungraded_answers(self, limit: int = 1000, max_attempts: int = 3) -> List[Answer]:
+        """Open-ended answers still waiting for a grade, grouped by question."""
+        with self._db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"""SELECT {ANSWER_COLUMNS}
+                   FROM Answers
+                   WHERE is_correct IS NULL AND open_ended_response IS NOT NULL AND grading_attempts < ?
+                   ORDER BY question_id, answer_id LIMIT ?""",
+                (max_attempts, limit),
+            )
+            return [Answer(*row) for row in cursor.fetchall()]
+
+    def save_grades(self, grades: List[Tuple[int, bool, Optional[str]]]) -> int:
+        """Write back (answer_id, is_correct, feedback) in one transaction."""
+        with self._db_connection() as conn:
+            cursor = conn.executemany(
+                "UPDATE Answers SET is_correct = ?, feedback = ? WHERE answer_id = ?",
+                [(is_correct, feedback, answer_id) for answer_id, is_correct, feedback in grades],
+            )
+            conn.commit()
+            return cursor.rowcount
+
+    def record_grading_failures(self, answer_ids: List[int]) -> None:
+        with self._db_connection() as conn:
+            conn.executemany(
+                "UPDATE Answers SET grading_attempts = grading_attempts + 1 WHERE answer_id = ?",
+                [(answer_id,) for answer_id in answer_ids],
+            )
+            conn.commit()
+
+    def get_question_params(self, question_ids: Optional[List[int]] = None) -> Dict[int, Tuple[float, int]]:
+        """Map question_id to (difficulty, answers) for questions that have estimates."""
+        with self._db_connection() as conn:
+            if question_ids is None:
+                rows = conn.execute("SELECT question_id, difficulty, answers FROM QuestionParams").fetchall()
+            else:
+                rows = []
+                for start in range(0, len(question_ids), MAX_SQL_PARAMS):
+                    chunk = question_ids[start:start + MAX_SQL_PARAMS]
+                    rows += conn.execute(
+                        f"""SELECT question_id, difficulty, answers FROM QuestionParams
+                            WHERE question_id IN ({', '.join('?' * len(chunk))})""",
+                        chunk,
+                    ).fetchall()
+        return {question_id: (difficulty, answers) for question_id, difficulty, answers in rows}
+
+    def get_student_ability(self, student_id: int) -> Optional[Tuple[float, int]]:
+        with self._db_connection() as conn:
+            return conn.execute(
+                "SELECT ability, answers FROM StudentAbilities WHERE student_id = ?", (student_id,)
+            ).fetchone()
+
+    def save_adaptive_params(
+        self,
+        questions: List[Tuple[int, float, int]] = (),
+        students: List[Tuple[int, float, int]] = (),
+    ) -> None:
+        """Upsert (id, estimate, answers) rows for questions and students in one transaction."""
+        with self._db_connection() as conn:
+            conn.executemany(
+                """INSERT INTO QuestionParams (question_id, difficulty, answers) VALUES (?, ?, ?)
+                   ON CONFLICT(question_id) DO UPDATE SET
+                       difficulty = excluded.difficulty, answers = excluded.answers,
+                       updated_at = CURRENT_TIMESTAMP""",
+                questions,
+            )
+            conn.executemany(
+                """INSERT INTO StudentAbilities (student_id, ability, answers) VALUES (?, ?, ?)
+                   ON CONFLICT(student_id) DO UPDATE SET
+                       ability = excluded.ability, answers = excluded.answers,
+                       updated_at = CURRENT_TIMESTAMP""",
+                students,
+            )
+            conn.commit()
+
+    @staticmethod
+    def _add_adaptive_deltas(
+        cursor,
+        questions: List[Tuple[int, float, int]],
+        students: List[Tuple[int, float, int]],
+    ) -> None:
+        """Add (id, estimate change, new answers) rows onto the stored estimates.
+
+        Clients report changes rather than values, so updates from clients
+        answering the same question concurrently add up instead of
+        overwriting each other.
+        """
+        cursor.executemany(
+            """INSERT INTO QuestionParams (question_id, difficulty, answers) VALUES (?, ?, ?)
+               ON CONFLICT(question_id) DO UPDATE SET
+                   difficulty = difficulty + excluded.difficulty, answers = answers + excluded.answers,
+                   updated_at = CURRENT_TIMESTAMP""",
+            questions,
+        )
+        cursor.executemany(
+            """INSERT INTO StudentAbilities (student_id, ability, answers) VALUES (?, ?, ?)
+               ON CONFLICT(student_id) DO UPDATE SET
+                   ability = ability + excluded.ability, answers = answers + excluded.answers,
+                   updated_at = CURRENT_TIMESTAMP""",
+            students,
+        )
+
     def get_quiz_statistics(self, quiz_id: int) -> Tuple[int, int, float]:
         """
         Get statistics for a quiz.
         Returns: (total_questions, total_answers, correct_percentage)
         """
-        total_questions = self.get_total_questions(quiz_id)
-        total_answers, correct_answers = self.get_total_answers_and_correct_answers(quiz_id)
+        with self._db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT
+                    (SELECT COUNT(*) FROM Questions WHERE quiz_id = ?),
+                    COUNT(Answers.answer_id),
+                    COALESCE(SUM(CASE WHEN Answers.is_correct THEN 1 ELSE 0 END), 0)
+                FROM Questions
+                JOIN Answers ON Answers.question_id = Questions.question_id
+                WHERE Questions.quiz_id = ?
+            """,
+                (quiz_id, quiz_id),
+            )
+            total_questions, total_answers, correct_answers = cursor.fetchone()
 
         if total_answers == 0:
             correct_percentage = 0
@@ -244,6 +746,63 @@ class QuizDB:
 
         return total_questions, total_answers, correct_percentage
 
+    def get_question_report(self, quiz_id: int) -> List[QuestionStats]:
+        """Per-question percent correct, choice distribution and discrimination.
+
+        One grouped query over (question, selected choice), and one over
+        question for the discrimination index. That second query totals
+        each student's correct answers on the quiz and sums, per question,
+        the terms of the correlation between correct (x) and the rest
+        score (y, the total minus x), so no per-student rows reach Python.
+        """
+        with self._db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT Questions.question_id, Questions.question_text, Answers.selected_choice,
+                       COUNT(Answers.answer_id), COUNT(Answers.is_correct),
+                       COALESCE(SUM(CASE WHEN Answers.is_correct THEN 1 ELSE 0 END), 0)
+                FROM Questions
+                LEFT JOIN Answers ON Answers.question_id = Questions.question_id
+                WHERE Questions.quiz_id = ?
+                GROUP BY Questions.question_id, Answers.selected_choice
+                ORDER BY Questions.question_id
+            """,
+                (quiz_id,),
+            )
+            report: Dict[int, QuestionStats] = {}
+            for question_id, text, choice, answers, graded, correct in cursor.fetchall():
+                stats = report.setdefault(question_id, QuestionStats(question_id, text))
+                if answers:
+                    stats.answers += answers
+                    stats.graded += graded
+                    stats.correct += correct
+                    stats.choice_counts[choice] = answers
+
+            cursor.execute(
+                """
+                WITH Graded AS (
+                    SELECT Answers.question_id, Answers.student_id, CAST(Answers.is_correct AS INTEGER) AS x
+                    FROM Answers JOIN Questions ON Questions.question_id = Answers.question_id
+                    WHERE Questions.quiz_id = ? AND Answers.is_correct IS NOT NULL
+                      AND Answers.student_id IS NOT NULL
+                ),
+                Scores AS (
+                    SELECT student_id, SUM(x) AS total FROM Graded GROUP BY student_id
+                )
+                SELECT question_id, COUNT(*), SUM(x), SUM(total - x),
+                       SUM(x * (total - x)), SUM((total - x) * (total - x))
+                FROM Graded JOIN Scores USING (student_id)
+                GROUP BY question_id
+            """,
+                (quiz_id,),
+            )
+            for question_id, n, sum_x, sum_y, sum_xy, sum_yy in cursor.fetchall():
+                # x is 0/1, so sum of x squared is sum_x
+                variance = (n * sum_x - sum_x * sum_x) * (n * sum_yy - sum_y * sum_y)
+                if question_id in report and variance > 0:
+                    report[question_id].discrimination = (n * sum_xy - sum_x * sum_y) / math.sqrt(variance)
+            return list(report.values())
 
     def get_total_questions(self, quiz_id: int) -> int:
         """Get the total number of questions for a given quiz."""
@@ -295,7 +854,12 @@ class QuizDB:
                     (quiz_id,),
                 )
 
-                # Delete related questions
+                # Delete related choices, estimates and questions
+                for table in ("Choices", "QuestionParams"):
+                    cursor.execute(
+                        f"DELETE FROM {table} WHERE question_id IN (SELECT question_id FROM Questions WHERE quiz_id = ?)",
+                        (quiz_id,),
+                    )
                 cursor.execute("DELETE FROM Questions WHERE quiz_id = ?", (quiz_id,))
 
                 # Delete the quiz
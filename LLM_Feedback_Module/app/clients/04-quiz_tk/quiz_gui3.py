@@ -1,6 +1,12 @@
+import logging
+import os
 import tkinter as tk
 from tkinter import messagebox, simpledialog, ttk
 from quiz_app import QuizApp, Question
+from network_worker import STATUS_ACTION
+
+# How often the Tk loop drains messages from the network worker, in ms
+NETWORK_POLL_MS = 100
 
 
 class QuizGUI:
@@ -11,10 +17,17 @@ class QuizGUI:
         self.selected_choice = tk.StringVar()
         self.timer_value = tk.StringVar()
         self.question_number = tk.StringVar()
+        self.connection_status = tk.StringVar(value="Offline")
+        # Whether the quiz list shows the server's quizzes or local ones
+        self.showing_remote = False
         self.total_time = 30
         self.remaining_time = self.total_time
         self.create_widgets()
         self.style_widgets()
+        # Queued until the worker connects
+        self.quiz_app.fetch_quizzes()
+        self.quiz_app.fetch_ability()
+        self.poll_network()
 
     def create_widgets(self):
         self.root.title("QuizApp")
@@ -39,6 +52,11 @@ class QuizGUI:
         )
         self.timer_label.pack(side=tk.RIGHT)
 
+        self.connection_label = ttk.Label(
+            self.header_frame, textvariable=self.connection_status, font=("Arial", 10)
+        )
+        self.connection_label.pack(side=tk.RIGHT, padx=(0, 15))
+
         self.question_frame = ttk.Frame(self.main_frame)
         self.question_frame.pack(fill=tk.BOTH, expand=True)
 
@@ -100,7 +118,8 @@ class QuizGUI:
     def show_existing_quizzes(self):
         self.selected_choice.set(None)
         self.choices_frame.pack(fill=tk.BOTH, expand=True)
-        choices = self.quiz_app.get_all_quizzes()
+        self.showing_remote = bool(self.quiz_app.remote_quizzes)
+        choices = self.quiz_app.remote_quizzes or self.quiz_app.get_all_quizzes()
         for rb, choice in zip(self.radio_buttons, choices):
             rb.config(text=choice.title, value=choice.quiz_id)
 
@@ -116,7 +135,12 @@ class QuizGUI:
 
         if quiz_id:
             try:
-                self.quiz_app.start_quiz(quiz_id)
+                if self.showing_remote:
+                    if not self.quiz_app.start_remote_quiz(quiz_id):
+                        messagebox.showinfo("Start Quiz", "This quiz is still downloading, try again shortly.")
+                        return
+                else:
+                    self.quiz_app.start_quiz(quiz_id)
                 if self.quiz_app.current_quiz:
                     self.start_button.pack_forget()
                     self.show_quiz_buttons()  # Show the next and submit buttons
@@ -179,6 +203,31 @@ class QuizGUI:
                         "No selection", "Please select an answer before proceeding."
                     )
 
+    def poll_network(self):
+        # Only drains what the worker thread has already received, so the
+        # Tk loop (and update_timer) keeps running while the server is slow
+        try:
+            for message in self.quiz_app.poll_messages():
+                try:
+                    self.handle_server_message(message)
+                except Exception:
+                    logging.exception(f"Failed to handle '{message.get('action')}' message")
+        except Exception:
+            logging.exception("Polling the network worker failed")
+        finally:
+            # Polling must survive any one failure for the rest of the session
+            self.root.after(NETWORK_POLL_MS, self.poll_network)
+
+    def handle_server_message(self, message: dict):
+        if message.get("action") == STATUS_ACTION:
+            connected = message["response"]["connected"]
+            self.connection_status.set("Online" if connected else "Offline")
+        elif message.get("action") == "list_quizzes" and self.current_question is None:
+            self.show_existing_quizzes()
+            # Prefetch the quizzes on offer so starting one needs no round trip
+            for quiz in self.quiz_app.remote_quizzes[: len(self.radio_buttons)]:
+                self.quiz_app.fetch_quiz_bundle(quiz.quiz_id)
+
     def start_timer(self):
         self.update_timer()
 
@@ -207,9 +256,14 @@ class QuizGUI:
 
 def main():
     root = tk.Tk()
-    quiz_app = QuizApp()
+    # Abilities are tracked per student when one is given
+    student_id = os.getenv("QUIZ_STUDENT_ID")
+    quiz_app = QuizApp(student_id=int(student_id) if student_id else None)
     app = QuizGUI(root, quiz_app)
-    root.mainloop()
+    try:
+        root.mainloop()
+    finally:
+        quiz_app.close()
 
 
 if __name__ == "__main__":
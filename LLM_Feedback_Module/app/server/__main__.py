@@ -3,9 +3,16 @@ import logging
 import os
 import signal
 import sys
+import threading
 
 from llm_feedback import LLMFeedback
 from database import Database
+from hedging import HedgePolicy
+from log_config import configure_logging
+from metrics import serve_prometheus, stats_handler
+from model_router import ModelRouter
+from quiz_grader import QuizGrader
+from quiz_service import QuizService
 from socket_server import SocketServer
 
 
@@ -16,10 +23,12 @@ def signal_handler(sig, frame):
 
 
 async def main():
-    # Setup logging
-    logging.getLogger(__file__)
-    log_format = "%(levelname)s:%(name)s:%(asctime)s - %(message)s"
-    logging.basicConfig(level=logging.DEBUG, format=log_format)
+    # Setup logging; records are formatted and written on a background thread
+    configure_logging(
+        level=os.getenv("LOG_LEVEL", "INFO").upper(),
+        log_file=os.getenv("LOG_FILE"),
+        payload_sample_rate=float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.01")),
+    )
 
     # Handle keyboard interrupt
     signal.signal(signal.SIGINT, signal_handler)
@@ -28,24 +37,86 @@ async def main():
     api_key = os.getenv("AIML_API_KEY", "54a34a43333f47119e47424176f69cf8")
     base_url = "https://api.aimlapi.com"
     model = "mistralai/Mistral-7B-Instruct-v0.2"
+    # Models the router may choose from, with their concurrency caps
+    routed_models = {
+        model: 8,
+        "meta-llama/Llama-3-8b-chat-hf": 8,
+        "meta-llama/Llama-3-70b-chat-hf": 4,
+    }
+    action_preferences = {
+        "evaluate_effort": [model, "meta-llama/Llama-3-8b-chat-hf"],
+        "validate_answer": [model, "meta-llama/Llama-3-8b-chat-hf"],
+        "get_feedback": ["meta-llama/Llama-3-70b-chat-hf"],
+        "suggest_enhancements": ["meta-llama/Llama-3-70b-chat-hf"],
+    }
     system_prompt = "You are an AI assistant who knows everything about education and can provide feedback on student work."
     db_path = "data/education_feedback.db"
 
-    # Initialize the Database
-    db = Database(db_path)
+    # Initialize the Database; cached reference data is re-validated every
+    # 5s in case another server process shares the file
+    db = Database(db_path, generation_check_interval=5.0)
+
+    # Shared quiz question bank for the Tk quiz clients
+    quiz_service = QuizService(os.getenv("QUIZ_DB_PATH", "data/quiz_bank.db"))
+
+    # Initialize the model router
+    router = ModelRouter(routed_models, action_preferences)
+
+    # Hedge requests slower than the p95, adding at most 5% extra requests
+    hedge_policy = HedgePolicy(budget_ratio=0.05)
 
     # Initialize LLMFeedback with the database
-    llm_feedback = LLMFeedback(api_key, base_url, model, system_prompt, db)
+    llm_feedback = LLMFeedback(
+        api_key, base_url, model, system_prompt, db, router, hedge_policy
+    )
+
+    # Grade open-ended quiz answers in the background; 0 disables it
+    quiz_grader = QuizGrader(
+        quiz_service.db, llm_feedback, concurrency=int(os.getenv("QUIZ_GRADE_CONCURRENCY", "4"))
+    )
+    grade_interval = float(os.getenv("QUIZ_GRADE_INTERVAL", "60"))
+    if grade_interval > 0:
+        quiz_grader.start(grade_interval)
 
     # Initialize SocketServer and register handlers
-    server = SocketServer()
-    server.register_handler("get_feedback", llm_feedback.get_feedback)
-    server.register_handler("validate_answer", llm_feedback.validate_answer)
-    server.register_handler("suggest_enhancements", llm_feedback.generate_suggested_enhancements)
-    server.register_handler("peer_comparison", llm_feedback.provide_peer_comparison)
-    server.register_handler("resource_links", llm_feedback.generate_resource_links)
-    server.register_handler("evaluate_effort", llm_feedback.evaluate_effort)
+    # Profiling is opt-in: PROFILE_DIR enables the `profile` admin action
+    profile_dir = os.getenv("PROFILE_DIR")
+    profiler = None
+    if profile_dir:
+        from profiling import Profiler, profile_handler
+
+        profiler = Profiler(profile_dir, request_profiling=os.getenv("PROFILE_REQUESTS") == "1")
+        sample_interval = os.getenv("PROFILE_SAMPLE_INTERVAL")
+        if sample_interval:
+            profiler.start_sampling(float(sample_interval))
+
+    server = SocketServer(profiler=profiler)
+    llm_feedback.register_handlers(server)
+    quiz_service.register_handlers(server)
     # server.register_handler("student_opinion", llm_feedback.get_student_opinion)
+    server.register_handler(
+        "stats",
+        stats_handler(
+            {
+                "routing": router.metrics,
+                "hedging": hedge_policy.metrics,
+                "reference_cache": db.cache.stats,
+                "quiz_cache": quiz_service.cache.stats,
+                "quiz_grader": quiz_grader.stats,
+            }
+        ),
+    )
+
+    if profiler is not None:
+        server.register_handler("profile", profile_handler(profiler))
+
+    # Optional Prometheus scrape endpoint
+    metrics_port = os.getenv("METRICS_PORT")
+    if metrics_port:
+        serve_prometheus(int(metrics_port))
+
+    # Load the OpenAI client while the server starts listening
+    threading.Thread(target=llm_feedback.warm_up, daemon=True).start()
 
     try:
         # Start the server
@@ -0,0 +1,219 @@
+"""
+Batch recalibration of question difficulty and student ability.
+
+Meant to run nightly against the quiz question bank. Every graded answer
+with a known student is loaded into flat NumPy arrays (student index,
+question index, correct). A Rasch model is then fitted to them by
+alternating Newton steps, each a handful of vectorized passes over all
+responses. A weak normal prior on both parameters keeps students and
+questions with all-correct or all-wrong answers finite.
+
+The estimates are on the same logit scale as the live AdaptiveEngine and
+are written back to QuestionParams and StudentAbilities in one
+transaction. Clients start from these values: question difficulties
+travel in quiz bundles and abilities come from `student_ability`. The
+changes a client's engine makes during a quiz come back as `estimates`
+outbox items, which the server adds on until the next refit replaces
+them.
+
+Requires NumPy, which the server itself does not need; it is declared as
+the `calibration` extra in pyproject.toml.
+
+    python app/server/calibration.py --db data/quiz_bank.db
+"""
+
+import argparse
+import logging
+import time
+from dataclasses import dataclass
+from operator import itemgetter
+from typing import Optional
+
+try:
+    import numpy as np
+except ImportError as e:
+    raise ImportError(
+        "Calibration needs numpy: pip install numpy (or the project's 'calibration' extra)"
+    ) from e
+
+import quiz_service  # noqa: F401  (puts the quiz client on sys.path)
+from quiz_db import QuizDB
+
+DEFAULT_CHUNK_ROWS = 500_000
+
+
+@dataclass(slots=True)
+class ResponseData:
+    student_ids: np.ndarray
+    question_ids: np.ndarray
+    # Per response: index into student_ids / question_ids, and 0.0 or 1.0
+    students: np.ndarray
+    questions: np.ndarray
+    correct: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.correct)
+
+
+@dataclass(slots=True)
+class CalibrationResult:
+    student_ids: np.ndarray
+    abilities: np.ndarray
+    student_counts: np.ndarray
+    question_ids: np.ndarray
+    difficulties: np.ndarray
+    question_counts: np.ndarray
+    iterations: int
+    converged: bool
+    max_change: float
+
+
+def load_responses(db: QuizDB, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> ResponseData:
+    """Read every graded, attributed answer into arrays.
+
+    While both ids fit in 31 bits, SQLite packs each row into a single
+    integer, so the arrays are filled straight from the cursor without
+    building a tuple per row.
+    """
+    where = "WHERE is_correct IS NOT NULL AND student_id IS NOT NULL"
+    with db._db_connection() as conn:
+        # Separate subqueries so each MAX is answered from its index
+        max_student, max_question = conn.execute(
+            "SELECT (SELECT MAX(student_id) FROM Answers), (SELECT MAX(question_id) FROM Answers)"
+        ).fetchone()
+        if max(max_student or 0, max_question or 0) < 2**31:
+            cursor = conn.execute(
+                f"SELECT (student_id << 32) | (question_id << 1) | (is_correct != 0) FROM Answers {where}"
+            )
+            packed = np.fromiter(map(itemgetter(0), cursor), dtype=np.int64)
+            raw = np.column_stack((packed >> 32, (packed >> 1) & 0x7FFFFFFF, packed & 1))
+        else:
+            cursor = conn.execute(f"SELECT student_id, question_id, is_correct FROM Answers {where}")
+            chunks = []
+            while True:
+                rows = cursor.fetchmany(chunk_rows)
+                if not rows:
+                    break
+                chunks.append(np.array(rows, dtype=np.int64))
+            raw = np.concatenate(chunks) if chunks else np.empty((0, 3), dtype=np.int64)
+    student_ids, students = np.unique(raw[:, 0], return_inverse=True)
+    question_ids, questions = np.unique(raw[:, 1], return_inverse=True)
+    return ResponseData(
+        student_ids,
+        question_ids,
+        students.astype(np.int64),
+        questions.astype(np.int64),
+        (raw[:, 2] != 0).astype(np.float64),
+    )
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-np.clip(x, -35.0, 35.0)))
+
+
+def fit_rasch(
+    data: ResponseData,
+    max_iter: int = 100,
+    tol: float = 1e-4,
+    prior_sd: float = 3.0,
+    max_step: float = 1.0,
+    initial_abilities: Optional[np.ndarray] = None,
+    initial_difficulties: Optional[np.ndarray] = None,
+) -> CalibrationResult:
+    """Fit abilities and difficulties by penalized joint maximum likelihood."""
+    n_students, n_questions = len(data.student_ids), len(data.question_ids)
+    students, questions, correct = data.students, data.questions, data.correct
+    ability = np.zeros(n_students) if initial_abilities is None else initial_abilities.astype(np.float64)
+    difficulty = np.zeros(n_questions) if initial_difficulties is None else initial_difficulties.astype(np.float64)
+    precision = 1.0 / prior_sd**2
+
+    iterations, max_change, converged = 0, 0.0, False
+    for iterations in range(1, max_iter + 1):
+        p = _sigmoid(ability[students] - difficulty[questions])
+        gradient = np.bincount(students, correct - p, n_students) - precision * ability
+        information = np.bincount(students, p * (1.0 - p), n_students) + precision
+        ability_step = np.clip(gradient / information, -max_step, max_step)
+        ability += ability_step
+
+        p = _sigmoid(ability[students] - difficulty[questions])
+        gradient = np.bincount(questions, p - correct, n_questions) - precision * difficulty
+        information = np.bincount(questions, p * (1.0 - p), n_questions) + precision
+        difficulty_step = np.clip(gradient / information, -max_step, max_step)
+        difficulty += difficulty_step
+
+        max_change = float(
+            max(np.abs(ability_step).max(initial=0.0), np.abs(difficulty_step).max(initial=0.0))
+        )
+        if max_change < tol:
+            converged = True
+            break
+
+    return CalibrationResult(
+        data.student_ids,
+        ability,
+        np.bincount(students, minlength=n_students),
+        data.question_ids,
+        difficulty,
+        np.bincount(questions, minlength=n_questions),
+        iterations,
+        converged,
+        max_change,
+    )
+
+
+def write_back(db: QuizDB, result: CalibrationResult) -> None:
+    db.save_adaptive_params(
+        list(zip(result.question_ids.tolist(), result.difficulties.tolist(), result.question_counts.tolist())),
+        list(zip(result.student_ids.tolist(), result.abilities.tolist(), result.student_counts.tolist())),
+    )
+
+
+def calibrate(db: QuizDB, write: bool = True, **fit_options) -> Optional[CalibrationResult]:
+    """Load, fit and (unless write=False) save; None when there is nothing to fit."""
+    start = time.perf_counter()
+    data = load_responses(db)
+    loaded = time.perf_counter()
+    if not len(data):
+        logging.info("No graded answers with a student to calibrate on")
+        return None
+    result = fit_rasch(data, **fit_options)
+    fitted = time.perf_counter()
+    if write:
+        write_back(db, result)
+    logging.info(
+        "Calibrated %d questions and %d students on %d answers in %d iterations "
+        "(load %.2fs, fit %.2fs, write %.2fs)",
+        len(result.question_ids),
+        len(result.student_ids),
+        len(data),
+        result.iterations,
+        loaded - start,
+        fitted - loaded,
+        time.perf_counter() - fitted,
+    )
+    if not result.converged:
+        logging.warning("Calibration stopped after %d iterations, last change %.2g", result.iterations, result.max_change)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=str(quiz_service.QUIZ_BANK_PATH))
+    parser.add_argument("--max-iter", type=int, default=100)
+    parser.add_argument("--tol", type=float, default=1e-4)
+    parser.add_argument("--prior-sd", type=float, default=3.0)
+    parser.add_argument("--dry-run", action="store_true", help="fit without writing the estimates back")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with QuizDB(args.db) as db:
+        result = calibrate(db, write=not args.dry_run, max_iter=args.max_iter, tol=args.tol, prior_sd=args.prior_sd)
+    if result is not None:
+        print(
+            f"{len(result.question_ids)} questions, {len(result.student_ids)} students, "
+            f"{result.iterations} iterations, converged={result.converged}"
+        )
+
+
+if __name__ == "__main__":
+    main()
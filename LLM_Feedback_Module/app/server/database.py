@@ -3,7 +3,9 @@ import sqlite3
 from pathlib import Path
 from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import List, Optional, Tuple, Union
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from reference_cache import ReferenceCache
 
 DB_FILE = "llm_fb.db"
 DB_PATH = Path("data") / DB_FILE
@@ -52,6 +54,7 @@ CREATE TABLE IF NOT EXISTS Feedback (
     feedback_type TEXT NOT NULL,
     content TEXT NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    effort_rating INTEGER,
     FOREIGN KEY (work_id) REFERENCES StudentWork(work_id)
 );
 """
@@ -70,24 +73,154 @@ LLM_REQUESTS_TABLE = """
         prompt TEXT NOT NULL,
         response TEXT,
         model TEXT NOT NULL,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        prompt_tokens INTEGER,
+        truncation_count INTEGER NOT NULL DEFAULT 0,
+        template_id TEXT
     );
 """
 
+# Columns added after the initial schema, applied to existing databases.
+LLM_REQUESTS_MIGRATIONS = {
+    "prompt_tokens": "INTEGER",
+    "truncation_count": "INTEGER NOT NULL DEFAULT 0",
+    "template_id": "TEXT",
+}
+
+FEEDBACK_MIGRATIONS = {
+    "effort_rating": "INTEGER",
+}
+
+# Dashboard aggregates, kept current by the triggers below
+ASSIGNMENT_STATS_TABLE = """
+CREATE TABLE IF NOT EXISTS AssignmentStats (
+    assignment_id INTEGER PRIMARY KEY,
+    submissions INTEGER NOT NULL DEFAULT 0,
+    feedback_count INTEGER NOT NULL DEFAULT 0,
+    effort_count INTEGER NOT NULL DEFAULT 0,
+    effort_sum INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+STUDENT_STATS_TABLE = """
+CREATE TABLE IF NOT EXISTS StudentStats (
+    student_id INTEGER PRIMARY KEY,
+    submissions INTEGER NOT NULL DEFAULT 0,
+    feedback_count INTEGER NOT NULL DEFAULT 0,
+    effort_count INTEGER NOT NULL DEFAULT 0,
+    effort_sum INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+def _stats_triggers(stats_table: str, key: str) -> List[str]:
+    """Triggers keeping one aggregate table in step with StudentWork and Feedback."""
+    name = stats_table.lower()
+    work_key = f"(SELECT {key} FROM StudentWork WHERE work_id = {{ref}}.work_id)"
+    return [
+        f"""CREATE TRIGGER IF NOT EXISTS {name}_work_insert AFTER INSERT ON StudentWork
+            WHEN NEW.{key} IS NOT NULL BEGIN
+            INSERT INTO {stats_table} ({key}, submissions) VALUES (NEW.{key}, 1)
+            ON CONFLICT({key}) DO UPDATE SET submissions = submissions + 1;
+        END;""",
+        f"""CREATE TRIGGER IF NOT EXISTS {name}_work_delete AFTER DELETE ON StudentWork BEGIN
+            UPDATE {stats_table} SET submissions = submissions - 1 WHERE {key} = OLD.{key};
+        END;""",
+        f"""CREATE TRIGGER IF NOT EXISTS {name}_feedback_insert AFTER INSERT ON Feedback BEGIN
+            INSERT INTO {stats_table} ({key}, feedback_count, effort_count, effort_sum)
+            SELECT {key}, 1, NEW.effort_rating IS NOT NULL, COALESCE(NEW.effort_rating, 0)
+            FROM StudentWork WHERE work_id = NEW.work_id AND {key} IS NOT NULL
+            ON CONFLICT({key}) DO UPDATE SET
+                feedback_count = feedback_count + 1,
+                effort_count = effort_count + excluded.effort_count,
+                effort_sum = effort_sum + excluded.effort_sum;
+        END;""",
+        f"""CREATE TRIGGER IF NOT EXISTS {name}_feedback_delete AFTER DELETE ON Feedback BEGIN
+            UPDATE {stats_table} SET
+                feedback_count = feedback_count - 1,
+                effort_count = effort_count - (OLD.effort_rating IS NOT NULL),
+                effort_sum = effort_sum - COALESCE(OLD.effort_rating, 0)
+            WHERE {key} = {work_key.format(ref="OLD")};
+        END;""",
+        f"""CREATE TRIGGER IF NOT EXISTS {name}_feedback_rating AFTER UPDATE OF effort_rating ON Feedback BEGIN
+            UPDATE {stats_table} SET
+                effort_count = effort_count - (OLD.effort_rating IS NOT NULL) + (NEW.effort_rating IS NOT NULL),
+                effort_sum = effort_sum - COALESCE(OLD.effort_rating, 0) + COALESCE(NEW.effort_rating, 0)
+            WHERE {key} = {work_key.format(ref="NEW")};
+        END;""",
+    ]
+
 
-@dataclass
+STATS_TRIGGERS = _stats_triggers("AssignmentStats", "assignment_id") + _stats_triggers(
+    "StudentStats", "student_id"
+)
+
+STATS_REBUILD = """
+INSERT INTO {stats_table} ({key}, submissions, feedback_count, effort_count, effort_sum)
+SELECT w.{key},
+       COUNT(DISTINCT w.work_id),
+       COUNT(f.feedback_id),
+       COUNT(f.effort_rating),
+       COALESCE(SUM(f.effort_rating), 0)
+FROM StudentWork w
+LEFT JOIN Feedback f ON f.work_id = w.work_id
+WHERE w.{key} IS NOT NULL
+GROUP BY w.{key};
+"""
+
+# Bumped by triggers on every write to a cached reference table, so other
+# processes sharing the database can tell their caches are stale
+CACHE_GENERATIONS_TABLE = """
+CREATE TABLE IF NOT EXISTS CacheGenerations (
+    name TEXT PRIMARY KEY,
+    generation INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+CACHED_TABLES = ("AssessmentTypes", "Assignments")
+
+GENERATION_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS {table.lower()}_{event.lower()}_generation AFTER {event} ON {table} BEGIN
+        UPDATE CacheGenerations SET generation = generation + 1 WHERE name = '{table}';
+    END;"""
+    for table in CACHED_TABLES
+    for event in ("INSERT", "UPDATE", "DELETE")
+]
+
+# Reference cache namespace -> table it is read from
+REFERENCE_NAMESPACES = {
+    "assessment_type_id": "AssessmentTypes",
+    "assessment_type_name": "AssessmentTypes",
+    "correct_answer": "Assignments",
+}
+
+LLM_REQUEST_COLUMNS = (
+    "prompt, response, model, request_id, created_at, prompt_tokens, truncation_count, "
+    "template_id"
+)
+
+# Explicit select lists in dataclass field order; SELECT * follows table order
+STUDENT_COLUMNS = "name, student_id"
+ASSIGNMENT_COLUMNS = "title, description, assessment_type_id, correct_answer, assignment_id"
+STUDENT_WORK_COLUMNS = "student_id, assignment_id, content, work_id, submission_date"
+FEEDBACK_COLUMNS = "work_id, feedback_type, content, feedback_id, created_at, effort_rating"
+RESOURCE_LINK_COLUMNS = "topic, url, description, link_id"
+STATS_COLUMNS = "submissions, feedback_count, effort_count, effort_sum"
+
+
+@dataclass(slots=True)
 class Student:
     name: str
     student_id: Optional[int] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class AssessmentType:
     name: str
     assessment_type_id: int
 
 
-@dataclass
+@dataclass(slots=True)
 class Assignment:
     title: str
     description: str
@@ -96,7 +229,7 @@ class Assignment:
     assignment_id: Optional[int] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class StudentWork:
     student_id: int
     assignment_id: int
@@ -105,16 +238,17 @@ class StudentWork:
     submission_date: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Feedback:
     work_id: int
     feedback_type: str
     content: str
     feedback_id: Optional[int] = None
     created_at: Optional[str] = None
+    effort_rating: Optional[int] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ResourceLink:
     topic: str
     url: str
@@ -122,16 +256,34 @@ class ResourceLink:
     link_id: Optional[int] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class LLMRequest:
     prompt: str
     response: str
     model: str
     request_id: Optional[int] = None
     created_at: Optional[str] = None
+    prompt_tokens: Optional[int] = None
+    truncation_count: int = 0
+    template_id: Optional[str] = None
+
+
+@dataclass(slots=True)
+class SubmissionStats:
+    """Precomputed dashboard counts for one assignment or student."""
+
+    id: int
+    submissions: int = 0
+    feedback_count: int = 0
+    effort_count: int = 0
+    effort_sum: int = 0
+
+    @property
+    def average_effort(self) -> Optional[float]:
+        return self.effort_sum / self.effort_count if self.effort_count else None
 
 
-@dataclass
+@dataclass(slots=True)
 class AssessmentContent:
     student_work: str
     assessment_type: str
@@ -142,19 +294,30 @@ class AssessmentContent:
 
 
 class Database:
-    def __init__(self, db_path: Optional[Union[str, Path]] = None):
+    def __init__(
+        self,
+        db_path: Optional[Union[str, Path]] = None,
+        generation_check_interval: Optional[float] = None,
+    ):
+        """generation_check_interval enables cross-process cache invalidation:
+        the reference cache re-reads CacheGenerations at most this often.
+        """
         self.db_path = Path(db_path) if db_path else DB_PATH
+        self.cache = ReferenceCache(
+            REFERENCE_NAMESPACES,
+            self._cache_generations if generation_check_interval is not None else None,
+            generation_check_interval or 0.0,
+        )
         self._create_db_path()
         self._init_db()
         self._init_assessment_types()
-        logging.basicConfig(level=logging.INFO)
 
     def _create_db_path(self):
         """Create the directory for the database file if it doesn't exist.
         """
-        logging.debug(f"Creating database path: {self.db_path}")
+        logging.debug("Creating database path: %s", self.db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        logging.info(f"Database path created: {self.db_path}")
+        logging.info("Database path created: %s", self.db_path)
 
     @contextmanager
     def _db_connection(self, db_file):
@@ -183,6 +346,59 @@ class Database:
             self._create_table(conn, FEEDBACK_TABLE)
             self._create_table(conn, RESOURCE_LINKS_TABLE)
             self._create_table(conn, LLM_REQUESTS_TABLE)
+            self._add_missing_columns(conn, "LLMRequests", LLM_REQUESTS_MIGRATIONS)
+            self._add_missing_columns(conn, "Feedback", FEEDBACK_MIGRATIONS)
+            self._init_aggregates(conn)
+            self._create_table(conn, CACHE_GENERATIONS_TABLE)
+            conn.executemany(
+                "INSERT OR IGNORE INTO CacheGenerations (name) VALUES (?)",
+                [(table,) for table in CACHED_TABLES],
+            )
+            for trigger in GENERATION_TRIGGERS:
+                conn.execute(trigger)
+            conn.commit()
+
+    def _cache_generations(self) -> Dict[str, int]:
+        with self._db_connection(self.db_path) as conn:
+            return dict(conn.execute("SELECT name, generation FROM CacheGenerations"))
+
+    def _init_aggregates(self, conn: sqlite3.Connection) -> None:
+        """Create the aggregate tables and triggers, backfilling new tables."""
+        existing = {
+            row[0]
+            for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('AssignmentStats', 'StudentStats')"
+            )
+        }
+        self._create_table(conn, ASSIGNMENT_STATS_TABLE)
+        self._create_table(conn, STUDENT_STATS_TABLE)
+        for trigger in STATS_TRIGGERS:
+            conn.execute(trigger)
+        if len(existing) < 2:
+            self._rebuild_aggregates(conn)
+        conn.commit()
+
+    def _rebuild_aggregates(self, conn: sqlite3.Connection) -> None:
+        for table, key in (("AssignmentStats", "assignment_id"), ("StudentStats", "student_id")):
+            conn.execute(f"DELETE FROM {table}")
+            conn.execute(STATS_REBUILD.format(stats_table=table, key=key))
+
+    def rebuild_aggregates(self) -> None:
+        """Recompute the aggregate tables from StudentWork and Feedback."""
+        with self._db_connection(self.db_path) as conn:
+            self._rebuild_aggregates(conn)
+            conn.commit()
+
+    def _add_missing_columns(
+        self, conn: sqlite3.Connection, table: str, columns: dict
+    ) -> None:
+        """Add columns introduced after a table was first created."""
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        for name, definition in columns.items():
+            if name not in existing:
+                logging.info(f"Adding column {table}.{name}")
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+        conn.commit()
 
     def _init_assessment_types(self):
         """Initialize assessment types if they don't exist."""
@@ -200,6 +416,7 @@ class Database:
             """
             cursor.executemany(sql, assessment_types)
             conn.commit()
+        self.cache.invalidate_table("AssessmentTypes")
 
     def add_student(self, student: Student) -> Optional[int]:
         with self._db_connection(self.db_path) as conn:
@@ -212,7 +429,7 @@ class Database:
     def get_student(self, student_id: int) -> Optional[Student]:
         with self._db_connection(self.db_path) as conn:
             cursor = conn.cursor()
-            sql = "SELECT * FROM Students WHERE student_id = ?"
+            sql = f"SELECT {STUDENT_COLUMNS} FROM Students WHERE student_id = ?"
             cursor.execute(sql, (student_id,))
             result = cursor.fetchone()
             return Student(*result) if result else None
@@ -231,7 +448,8 @@ class Database:
                 ),
             )
             conn.commit()
-            return cursor.lastrowid
+        self.cache.invalidate("correct_answer", cursor.lastrowid)
+        return cursor.lastrowid
 
     def add_multiple_assignments(
         self, assignments_data: List[Tuple[str, str, str]]
@@ -255,25 +473,28 @@ class Database:
 
         return inserted_ids
 
-    def get_assessment_type_id(self, assessment_type_name: str) -> Optional[int]:
+    def _load_assessment_types(self) -> Dict[str, int]:
+        """Cache the whole AssessmentTypes table; it has a handful of rows."""
         with self._db_connection(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT assessment_type_id FROM AssessmentTypes WHERE name = ?",
-                (assessment_type_name,),
-            )
-            result = cursor.fetchone()
-            return result[0] if result else None
+            rows = conn.execute("SELECT assessment_type_id, name FROM AssessmentTypes").fetchall()
+        for type_id, name in rows:
+            self.cache.put("assessment_type_id", name, type_id)
+            self.cache.put("assessment_type_name", type_id, name)
+        return {name: type_id for type_id, name in rows}
+
+    def get_assessment_type_id(self, assessment_type_name: str) -> Optional[int]:
+        return self.cache.get(
+            "assessment_type_id",
+            assessment_type_name,
+            lambda: self._load_assessment_types().get(assessment_type_name),
+        )
 
     def get_assessment_type_by_id(self, assessment_type_id: int) -> Optional[str]:
-        with self._db_connection(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT name FROM AssessmentTypes WHERE assessment_type_id = ?",
-                (assessment_type_id,),
-            )
-            result = cursor.fetchone()
-            return result[0] if result else None
+        return self.cache.get(
+            "assessment_type_name",
+            assessment_type_id,
+            lambda: {v: k for k, v in self._load_assessment_types().items()}.get(assessment_type_id),
+        )
 
     def get_assignment_by_id(self, assignment_id: int) -> Optional[Assignment]:
         with self._db_connection(self.db_path) as conn:
@@ -299,7 +520,7 @@ class Database:
     def get_all_assignments(self) -> List[Assignment]:
         with self._db_connection(self.db_path) as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM Assignments")
+            cursor.execute(f"SELECT {ASSIGNMENT_COLUMNS} FROM Assignments")
             return [Assignment(*row) for row in cursor.fetchall()]
 
     def add_student_work(self, work: StudentWork) -> Optional[int]:
@@ -313,11 +534,7 @@ class Database:
     def get_student_work_by_id(self, work_id: int) -> Optional[StudentWork]:
         with self._db_connection(self.db_path) as conn:
             cursor = conn.cursor()
-            sql = """
-                SELECT student_id, assignment_id, content, work_id, submission_date
-                FROM StudentWork
-                WHERE work_id = ?
-            """
+            sql = f"SELECT {STUDENT_WORK_COLUMNS} FROM StudentWork WHERE work_id = ?"
             cursor.execute(sql, (work_id,))
             row = cursor.fetchone()
             return StudentWork(*row) if row else None
@@ -325,15 +542,16 @@ class Database:
     def get_all_student_work(self) -> List[StudentWork]:
         with self._db_connection(self.db_path) as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM StudentWork")
+            cursor.execute(f"SELECT {STUDENT_WORK_COLUMNS} FROM StudentWork")
             return [StudentWork(*row) for row in cursor.fetchall()]
 
     def add_feedback(self, feedback: Feedback) -> Optional[int]:
         with self._db_connection(self.db_path) as conn:
             cursor = conn.cursor()
-            sql = "INSERT INTO Feedback (work_id, feedback_type, content) VALUES (?, ?, ?)"
+            sql = "INSERT INTO Feedback (work_id, feedback_type, content, effort_rating) VALUES (?, ?, ?, ?)"
             cursor.execute(
-                sql, (feedback.work_id, feedback.feedback_type, feedback.content)
+                sql,
+                (feedback.work_id, feedback.feedback_type, feedback.content, feedback.effort_rating),
             )
             conn.commit()
             return cursor.lastrowid
@@ -344,10 +562,10 @@ class Database:
         with self._db_connection(self.db_path) as conn:
             cursor = conn.cursor()
             if feedback_type:
-                sql = "SELECT * FROM Feedback WHERE work_id = ? AND feedback_type = ?"
+                sql = f"SELECT {FEEDBACK_COLUMNS} FROM Feedback WHERE work_id = ? AND feedback_type = ?"
                 cursor.execute(sql, (work_id, feedback_type))
             else:
-                sql = "SELECT * FROM Feedback WHERE work_id = ?"
+                sql = f"SELECT {FEEDBACK_COLUMNS} FROM Feedback WHERE work_id = ?"
                 cursor.execute(sql, (work_id,))
             return [Feedback(*row) for row in cursor.fetchall()]
 
@@ -356,10 +574,56 @@ class Database:
     ) -> List[Feedback]:
         with self._db_connection(self.db_path) as conn:
             cursor = conn.cursor()
-            sql = "SELECT * FROM Feedback WHERE work_id = ? LIMIT ? OFFSET ?"
+            sql = f"SELECT {FEEDBACK_COLUMNS} FROM Feedback WHERE work_id = ? LIMIT ? OFFSET ?"
             cursor.execute(sql, (work_id, page_size, (page - 1) * page_size))
             return [Feedback(*row) for row in cursor.fetchall()]
 
+    def iter_all_feedback(self, batch_size: int = 10000) -> Iterator[Feedback]:
+        """Stream every Feedback row without holding the whole table in memory."""
+        with self._db_connection(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT {FEEDBACK_COLUMNS} FROM Feedback ORDER BY feedback_id")
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                for row in rows:
+                    yield Feedback(*row)
+
+    def set_effort_rating(self, feedback_id: int, rating: Optional[int]) -> bool:
+        with self._db_connection(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "UPDATE Feedback SET effort_rating = ? WHERE feedback_id = ?",
+                (rating, feedback_id),
+            )
+            conn.commit()
+            return cursor.rowcount > 0
+
+    def _get_stats(self, table: str, key: str, key_id: Optional[int] = None) -> List[SubmissionStats]:
+        with self._db_connection(self.db_path) as conn:
+            cursor = conn.cursor()
+            sql = f"SELECT {key}, {STATS_COLUMNS} FROM {table}"
+            if key_id is None:
+                cursor.execute(f"{sql} ORDER BY {key}")
+            else:
+                cursor.execute(f"{sql} WHERE {key} = ?", (key_id,))
+            return [SubmissionStats(*row) for row in cursor.fetchall()]
+
+    def get_assignment_stats(self, assignment_id: int) -> Optional[SubmissionStats]:
+        stats = self._get_stats("AssignmentStats", "assignment_id", assignment_id)
+        return stats[0] if stats else None
+
+    def get_student_stats(self, student_id: int) -> Optional[SubmissionStats]:
+        stats = self._get_stats("StudentStats", "student_id", student_id)
+        return stats[0] if stats else None
+
+    def get_all_assignment_stats(self) -> List[SubmissionStats]:
+        return self._get_stats("AssignmentStats", "assignment_id")
+
+    def get_all_student_stats(self) -> List[SubmissionStats]:
+        return self._get_stats("StudentStats", "student_id")
+
     def add_resource_link(self, resource: ResourceLink) -> Optional[int]:
         with self._db_connection(self.db_path) as conn:
             cursor = conn.cursor()
@@ -371,21 +635,35 @@ class Database:
     def get_resource_links_by_topic(self, topic: str) -> List[ResourceLink]:
         with self._db_connection(self.db_path) as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM ResourceLinks WHERE topic = ?", (topic,))
+            cursor.execute(f"SELECT {RESOURCE_LINK_COLUMNS} FROM ResourceLinks WHERE topic = ?", (topic,))
             return [ResourceLink(*row) for row in cursor.fetchall()]
 
     def log_llm_request(self, request: LLMRequest) -> Optional[int]:
         with self._db_connection(self.db_path) as conn:
             cursor = conn.cursor()
-            sql = "INSERT INTO LLMRequests (prompt, response, model) VALUES (?, ?, ?)"
-            cursor.execute(sql, (request.prompt, request.response, request.model))
+            sql = """
+                INSERT INTO LLMRequests
+                    (prompt, response, model, prompt_tokens, truncation_count, template_id)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """
+            cursor.execute(
+                sql,
+                (
+                    request.prompt,
+                    request.response,
+                    request.model,
+                    request.prompt_tokens,
+                    request.truncation_count,
+                    request.template_id,
+                ),
+            )
             conn.commit()
             return cursor.lastrowid
 
     def get_llm_request_by_id(self, request_id: int) -> Optional[LLMRequest]:
         with self._db_connection(self.db_path) as conn:
             cursor = conn.cursor()
-            sql = "SELECT * FROM LLMRequests WHERE request_id = ?"
+            sql = f"SELECT {LLM_REQUEST_COLUMNS} FROM LLMRequests WHERE request_id = ?"
             cursor.execute(sql, (request_id,))
             result = cursor.fetchone()
             return LLMRequest(*result) if result else None
@@ -393,10 +671,15 @@ class Database:
     def get_all_llm_requests(self) -> List[LLMRequest]:
         with self._db_connection(self.db_path) as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM LLMRequests")
+            cursor.execute(f"SELECT {LLM_REQUEST_COLUMNS} FROM LLMRequests")
             return [LLMRequest(*row) for row in cursor.fetchall()]
 
     def get_correct_answer(self, assignment_id: int) -> Optional[str]:
+        return self.cache.get(
+            "correct_answer", assignment_id, lambda: self._query_correct_answer(assignment_id)
+        )
+
+    def _query_correct_answer(self, assignment_id: int) -> Optional[str]:
         with self._db_connection(self.db_path) as conn:
             cursor = conn.cursor()
             sql = """
@@ -0,0 +1,353 @@
+"""
+Columnar bulk export of the feedback database.
+
+Tables are read in keyset-paginated chunks (`WHERE key > ? ORDER BY key
+LIMIT n`), so memory stays bounded by the chunk size whatever the table
+size. Each chunk is written as one record batch of an Arrow IPC file, one
+row group of a Parquet file, or one NumPy .npz file. pyarrow and numpy
+are optional and only imported for the format being written.
+
+A watermark file in the output directory records the last exported key
+and timestamp per table, so the next run only exports new rows. Files are
+named <table>-<first key>-<run time>, so a --full or --since-key run
+never overwrites files an earlier run delivered.
+
+    python app/server/export.py --db data/education_feedback.db --out data/export
+"""
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from database import DB_PATH, Database
+
+DEFAULT_CHUNK_ROWS = 50000
+WATERMARK_FILE = "_watermarks.json"
+FORMATS = ("parquet", "arrow", "npz")
+
+
+@dataclass(frozen=True)
+class ExportTable:
+    name: str
+    key: str
+    timestamp: str
+    # (column, "int" | "str")
+    columns: Tuple[Tuple[str, str], ...]
+
+
+EXPORT_TABLES: Dict[str, ExportTable] = {
+    table.name: table
+    for table in (
+        ExportTable(
+            "StudentWork",
+            "work_id",
+            "submission_date",
+            (
+                ("work_id", "int"),
+                ("student_id", "int"),
+                ("assignment_id", "int"),
+                ("content", "str"),
+                ("submission_date", "str"),
+            ),
+        ),
+        ExportTable(
+            "Feedback",
+            "feedback_id",
+            "created_at",
+            (
+                ("feedback_id", "int"),
+                ("work_id", "int"),
+                ("feedback_type", "str"),
+                ("content", "str"),
+                ("created_at", "str"),
+                ("effort_rating", "int"),
+            ),
+        ),
+        ExportTable(
+            "LLMRequests",
+            "request_id",
+            "created_at",
+            (
+                ("request_id", "int"),
+                ("prompt", "str"),
+                ("response", "str"),
+                ("model", "str"),
+                ("created_at", "str"),
+                ("prompt_tokens", "int"),
+                ("truncation_count", "int"),
+                ("template_id", "str"),
+            ),
+        ),
+    )
+}
+
+
+@dataclass(slots=True)
+class Watermark:
+    last_key: int = 0
+    last_timestamp: Optional[str] = None
+
+
+@dataclass(slots=True)
+class ExportResult:
+    table: str
+    rows: int = 0
+    chunks: int = 0
+    files: List[str] = field(default_factory=list)
+    watermark: Watermark = field(default_factory=Watermark)
+
+
+def iter_chunks(
+    conn: sqlite3.Connection,
+    table: ExportTable,
+    since_key: int = 0,
+    since_timestamp: Optional[str] = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> Iterator[Dict[str, list]]:
+    """Yield the table as column lists of at most chunk_rows rows each."""
+    names = [name for name, _ in table.columns]
+    key_index = names.index(table.key)
+    where = f"{table.key} > ?"
+    if since_timestamp is not None:
+        where += f" AND {table.timestamp} > ?"
+    sql = f"SELECT {', '.join(names)} FROM {table.name} WHERE {where} ORDER BY {table.key} LIMIT ?"
+
+    last_key = since_key
+    while True:
+        params = [last_key] + ([since_timestamp] if since_timestamp is not None else []) + [chunk_rows]
+        rows = conn.execute(sql, params).fetchall()
+        if not rows:
+            return
+        last_key = rows[-1][key_index]
+        yield {name: list(values) for name, values in zip(names, zip(*rows))}
+        if len(rows) < chunk_rows:
+            return
+
+
+class ArrowChunkWriter:
+    """One Arrow IPC file (or Parquet file) per export run, a batch per chunk."""
+
+    def __init__(self, path: Path, table: ExportTable, parquet: bool = False):
+        import pyarrow as pa
+
+        self.pa = pa
+        self.path = path
+        self.schema = pa.schema(
+            [(name, pa.int64() if kind == "int" else pa.string()) for name, kind in table.columns]
+        )
+        if parquet:
+            import pyarrow.parquet as pq
+
+            self.writer = pq.ParquetWriter(str(path), self.schema, compression="zstd")
+        else:
+            self.writer = pa.ipc.new_file(str(path), self.schema)
+        self.parquet = parquet
+
+    def write(self, chunk: Dict[str, list]) -> None:
+        batch = self.pa.record_batch(
+            [self.pa.array(chunk[name], type=self.schema.field(name).type) for name in self.schema.names],
+            schema=self.schema,
+        )
+        if self.parquet:
+            self.writer.write_batch(batch)
+        else:
+            self.writer.write(batch)
+
+    def close(self) -> List[Path]:
+        self.writer.close()
+        return [self.path]
+
+
+class NpzChunkWriter:
+    """One compressed .npz per chunk.
+
+    Integer columns are int64 with a `<column>__null` mask when the chunk
+    has NULLs. Text columns are stored Arrow-style, as the concatenated
+    UTF-8 bytes (uint8) plus `<column>__offsets` (int64, one more than the
+    rows), so row i is data[offsets[i]:offsets[i + 1]]. Fixed-width unicode
+    would cost rows x the longest value x 4 bytes, and object arrays need
+    pickle to load.
+    """
+
+    def __init__(self, path: Path, table: ExportTable):
+        import numpy as np
+
+        self.np = np
+        self.path = path
+        self.columns = table.columns
+        self.paths: List[Path] = []
+
+    def write(self, chunk: Dict[str, list]) -> None:
+        np = self.np
+        arrays = {}
+        for name, kind in self.columns:
+            values = chunk[name]
+            if kind == "int":
+                mask = np.array([value is None for value in values], dtype=bool)
+                arrays[name] = np.array([0 if value is None else value for value in values], dtype=np.int64)
+                if mask.any():
+                    arrays[f"{name}__null"] = mask
+            else:
+                encoded = [b"" if value is None else value.encode("utf-8") for value in values]
+                offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+                np.cumsum([len(value) for value in encoded], out=offsets[1:])
+                arrays[name] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+                arrays[f"{name}__offsets"] = offsets
+                if None in values:
+                    arrays[f"{name}__null"] = np.array([value is None for value in values], dtype=bool)
+        path = self.path.with_name(f"{self.path.stem}-{len(self.paths):05d}.npz")
+        np.savez_compressed(path, **arrays)
+        self.paths.append(path)
+
+    def close(self) -> List[Path]:
+        return self.paths
+
+
+def available_format(preferred: str = "auto") -> str:
+    """Resolve "auto" to the best format whose library is installed."""
+    candidates = FORMATS if preferred == "auto" else (preferred,)
+    for fmt in candidates:
+        try:
+            if fmt == "parquet":
+                import pyarrow.parquet  # noqa: F401
+            elif fmt == "arrow":
+                import pyarrow  # noqa: F401
+            elif fmt == "npz":
+                import numpy  # noqa: F401
+            else:
+                raise ValueError(f"Unknown export format '{fmt}'")
+            return fmt
+        except ImportError:
+            continue
+    raise RuntimeError(f"No library available for export format '{preferred}' (install pyarrow or numpy)")
+
+
+def load_watermarks(output_dir: Path) -> Dict[str, Watermark]:
+    path = output_dir / WATERMARK_FILE
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return {table: Watermark(**mark) for table, mark in json.load(f).items()}
+
+
+def save_watermarks(output_dir: Path, watermarks: Dict[str, Watermark]) -> None:
+    path = output_dir / WATERMARK_FILE
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(
+            {table: {"last_key": mark.last_key, "last_timestamp": mark.last_timestamp} for table, mark in watermarks.items()},
+            f,
+            indent=2,
+        )
+    os.replace(tmp, path)
+
+
+def export_table(
+    db: Database,
+    table_name: str,
+    output_dir: Union[str, Path],
+    fmt: str = "auto",
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    since_key: Optional[int] = None,
+    since_timestamp: Optional[str] = None,
+    incremental: bool = True,
+    run_stamp: Optional[str] = None,
+) -> ExportResult:
+    """Export the rows of one table added since the watermark.
+
+    since_key / since_timestamp override the stored watermark. With
+    incremental=False the stored watermark is ignored, and it is not
+    updated. run_stamp (default: now) goes into the file names; raises
+    FileExistsError rather than overwrite files from another run.
+    """
+    run_stamp = run_stamp or time.strftime("%Y%m%dT%H%M%S")
+    table = EXPORT_TABLES[table_name]
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    fmt = available_format(fmt)
+
+    watermarks = load_watermarks(output_dir) if incremental else {}
+    start = watermarks.get(table_name, Watermark())
+    if since_key is not None:
+        start = Watermark(since_key, start.last_timestamp)
+    if since_timestamp is not None:
+        start = Watermark(start.last_key, since_timestamp)
+
+    result = ExportResult(table_name, watermark=Watermark(start.last_key, start.last_timestamp))
+    writer = None
+    with db._db_connection(db.db_path) as conn:
+        for chunk in iter_chunks(conn, table, start.last_key, since_timestamp, chunk_rows):
+            if writer is None:
+                first = chunk[table.key][0]
+                stem = output_dir / f"{table_name}-{first}-{run_stamp}"
+                if any(output_dir.glob(f"{stem.name}[.-]*")):
+                    raise FileExistsError(f"Export files for {stem} already exist")
+                if fmt == "npz":
+                    writer = NpzChunkWriter(stem.with_suffix(".npz"), table)
+                else:
+                    writer = ArrowChunkWriter(
+                        stem.with_suffix(".parquet" if fmt == "parquet" else ".arrow"), table, fmt == "parquet"
+                    )
+            writer.write(chunk)
+            result.rows += len(chunk[table.key])
+            result.chunks += 1
+            result.watermark.last_key = chunk[table.key][-1]
+            timestamps = [value for value in chunk[table.timestamp] if value is not None]
+            if timestamps:
+                result.watermark.last_timestamp = max([result.watermark.last_timestamp or "", *timestamps])
+
+    if writer is not None:
+        result.files = [str(path) for path in writer.close()]
+    if incremental and result.rows:
+        watermarks[table_name] = result.watermark
+        save_watermarks(output_dir, watermarks)
+    logging.info("Exported %d %s rows in %d chunks to %s", result.rows, table_name, result.chunks, output_dir)
+    return result
+
+
+def export_tables(
+    db: Database,
+    output_dir: Union[str, Path],
+    tables: Optional[List[str]] = None,
+    **kwargs,
+) -> List[ExportResult]:
+    # One run stamp for every table of the run
+    kwargs.setdefault("run_stamp", time.strftime("%Y%m%dT%H%M%S"))
+    return [export_table(db, table, output_dir, **kwargs) for table in tables or list(EXPORT_TABLES)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=str(DB_PATH))
+    parser.add_argument("--out", default="data/export")
+    parser.add_argument("--tables", nargs="+", choices=list(EXPORT_TABLES), default=list(EXPORT_TABLES))
+    parser.add_argument("--format", choices=("auto",) + FORMATS, default="auto")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--since-key", type=int, help="export rows with a key above this, ignoring the watermark")
+    parser.add_argument("--since", help="export rows created after this timestamp")
+    parser.add_argument("--full", action="store_true", help="ignore and do not update the watermark")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db = Database(args.db)
+    for result in export_tables(
+        db,
+        args.out,
+        args.tables,
+        fmt=args.format,
+        chunk_rows=args.chunk_rows,
+        since_key=args.since_key,
+        since_timestamp=args.since,
+        incremental=not args.full,
+    ):
+        print(f"{result.table}: {result.rows} rows, {result.chunks} chunks -> {', '.join(result.files) or 'nothing new'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import threading
+from collections import deque
+from typing import Optional
+
+
+class HedgePolicy:
+    """Decide when to send a duplicate of a slow LLM request.
+
+    Successful call latencies are kept in a rolling window and a request
+    still running after their p95 is hedged. Hedges are paid for from a
+    token bucket that earns `budget_ratio` tokens per primary request, so
+    hedging adds at most that fraction of extra upstream volume (plus a
+    small burst).
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        budget_ratio: float = 0.05,
+        max_burst: float = 5.0,
+        window: int = 500,
+        min_samples: int = 20,
+        min_delay: float = 0.05,
+        max_delay: Optional[float] = None,
+        recompute_every: int = 20,
+    ):
+        if not 0 < percentile < 1:
+            raise ValueError("percentile must be between 0 and 1")
+        self.percentile = percentile
+        self.budget_ratio = budget_ratio
+        self.max_burst = max_burst
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.recompute_every = recompute_every
+
+        self._latencies = deque(maxlen=window)
+        self._since_recompute = 0
+        self._delay: Optional[float] = None
+        self._tokens = max_burst
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.denied = 0
+
+    def record(self, latency: float) -> None:
+        """Add the latency of a successful call to the window."""
+        with self._lock:
+            self._latencies.append(latency)
+            self._since_recompute += 1
+            if self._delay is None or self._since_recompute >= self.recompute_every:
+                self._recompute()
+
+    def on_request(self) -> None:
+        """Count a primary request and earn its share of hedge budget."""
+        with self._lock:
+            self.requests += 1
+            self._tokens = min(self.max_burst, self._tokens + self.budget_ratio)
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None while still warming up."""
+        return self._delay
+
+    def try_acquire(self) -> bool:
+        """Spend one hedge token if the budget allows it."""
+        with self._lock:
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                self.hedges += 1
+                return True
+            self.denied += 1
+            return False
+
+    def refund(self) -> None:
+        """Give back a token for a hedge that could not be sent."""
+        with self._lock:
+            self._tokens = min(self.max_burst, self._tokens + 1.0)
+            self.hedges -= 1
+
+    def record_win(self) -> None:
+        with self._lock:
+            self.hedge_wins += 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "delay": self._delay,
+                "samples": len(self._latencies),
+                "requests": self.requests,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "denied": self.denied,
+                "tokens": round(self._tokens, 3),
+            }
+
+    def _recompute(self) -> None:
+        self._since_recompute = 0
+        if len(self._latencies) < self.min_samples:
+            return
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(self.percentile * len(ordered)))
+        delay = max(self.min_delay, ordered[index])
+        if self.max_delay is not None:
+            delay = min(delay, self.max_delay)
+        self._delay = delay
@@ -1,6 +1,9 @@
 import logging
+import math
 import os
-from openai import OpenAI, OpenAIError
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import List, Optional
 from database import (
     Database,
     AssessmentContent,
@@ -11,27 +14,121 @@ from database import (
     ResourceLink,
     Assignment,
 )
+from hedging import HedgePolicy
+from metrics import METRICS
+from model_router import ModelRouter
+from prompt_budget import DEFAULT_MAX_PROMPT_TOKENS, BuiltPrompt, estimate_tokens
+from prompt_templates import PromptRegistry, feedback_template_name
+
+
+# Socket action -> LLMFeedback method
+FEEDBACK_ACTIONS = {
+    "get_feedback": "get_feedback",
+    "validate_answer": "validate_answer",
+    "suggest_enhancements": "generate_suggested_enhancements",
+    "peer_comparison": "provide_peer_comparison",
+    "resource_links": "generate_resource_links",
+    "evaluate_effort": "evaluate_effort",
+}
+
+CONTENT_FIELDS = set(AssessmentContent.__dataclass_fields__)
 
 
 class LLMFeedback:
-    def __init__(self, api_key, base_url, model, system_prompt, db: Database):
+    def __init__(
+        self,
+        api_key,
+        base_url,
+        model,
+        system_prompt,
+        db: Database,
+        router: Optional[ModelRouter] = None,
+        hedge_policy: Optional[HedgePolicy] = None,
+        max_prompt_tokens: int = DEFAULT_MAX_PROMPT_TOKENS,
+    ):
         self.api_key = api_key
         self.base_url = base_url
         self.model = model
         self.system_prompt = system_prompt
-        self.client = OpenAI(api_key=self.api_key, base_url=self.base_url)
+        self._client = None
         self.db = db
+        self.router = router
+        self.hedge_policy = hedge_policy
+        self.max_prompt_tokens = max_prompt_tokens
+        self.prompts = PromptRegistry(system_prompt)
+        self._hedge_executor = (
+            ThreadPoolExecutor(self._hedge_pool_size(), thread_name_prefix="llm-hedge") if hedge_policy else None
+        )
 
-        log_format = "%(levelname)s:%(name)s:%(asctime)s - %(message)s"
-        logging.getLogger(__file__)
-        logging.basicConfig(level=logging.DEBUG, format=log_format)
+    def _hedge_pool_size(self) -> int:
+        """Workers for hedged calls: every slot that can be in flight plus the hedge burst.
+
+        A running loser cannot be cancelled and keeps its worker until the
+        upstream call returns, so the pool must hold every call the router
+        admits or new primaries would queue behind stragglers. Without a
+        router, primaries are bounded by the socket server's default pool.
+        """
+        if self.router is not None:
+            calls = sum(stats.max_concurrency for stats in self.router.stats.values())
+        else:
+            calls = min(32, (os.cpu_count() or 1) + 4)
+        return calls + math.ceil(self.hedge_policy.max_burst)
+
+    @property
+    def client(self):
+        """OpenAI client, created on first use; importing openai is slow."""
+        if self._client is None:
+            from openai import OpenAI
+
+            self._client = OpenAI(api_key=self.api_key, base_url=self.base_url)
+        return self._client
+
+    def warm_up(self) -> None:
+        """Import openai and build the client ahead of the first request."""
+        self.client
+
+    def register_handlers(self, server) -> None:
+        """Register every feedback action on a SocketServer."""
+        for action, method_name in FEEDBACK_ACTIONS.items():
+            server.register_handler(action, self._socket_handler(getattr(self, method_name)))
+
+    def _socket_handler(self, method):
+        def handler(content):
+            assessment_content = self._load_content(content)
+            if assessment_content is None:
+                return {"error": "Invalid content: student_work or a known work_id is required"}
+            return method(assessment_content)
+
+        return handler
+
+    def _load_content(self, content) -> Optional[AssessmentContent]:
+        """Build AssessmentContent from a socket message payload.
+
+        A payload carrying only a work_id is loaded from the database.
+        """
+        if isinstance(content, AssessmentContent):
+            return content
+        if not isinstance(content, dict):
+            return None
+        if "student_work" in content:
+            fields = {key: value for key, value in content.items() if key in CONTENT_FIELDS}
+            fields.setdefault("assessment_type", "")
+            return AssessmentContent(**fields)
+        if content.get("work_id") is not None:
+            with METRICS.time("db_context_load"):
+                return self.db.get_assessment_content(int(content["work_id"]))
+        return None
 
     def get_feedback(self, content: AssessmentContent):
         if content.work_id is None:
             return {"error": "Invalid AssessmentContent: work_id is required"}
 
         prompt = self._generate_prompt(content)
-        response = self._make_request(prompt)
+        if prompt.truncated_sections:
+            logging.info(
+                "Truncated %s to fit %d tokens", prompt.truncated_sections, self.max_prompt_tokens
+            )
+        response = self._make_request(prompt, "get_feedback")
 
         if "response" in response:
             feedback = Feedback(
@@ -39,7 +136,7 @@ class LLMFeedback:
                 feedback_type="AI-generated",
                 content=response["response"],
             )
-            feedback_id = self.db.add_feedback(feedback)
+            feedback_id = self._save_feedback(feedback)
 
             if feedback_id is None:
                 return {
@@ -55,43 +152,57 @@ class LLMFeedback:
 
         student_answer = content.student_work
         correct_answer = content.correct_answer
-        prompt = f"Compare the student's answer '{student_answer}' with the correct answer '{correct_answer}'. Is the student's answer correct?"
-        validation_content = self._make_request(prompt)
-
-        feedback = Feedback(
-            work_id=content.work_id,
-            feedback_type="validation",
-            content=validation_content["reposnse"],
+        prompt = self._render(
+            "validate_answer",
+            student_answer=student_answer,
+            correct_answer=correct_answer,
         )
-        self.db.add_feedback(feedback)
+        validation_content = self._make_request(prompt, "validate_answer")
+
+        if "response" in validation_content:
+            feedback = Feedback(
+                work_id=content.work_id,
+                feedback_type="validation",
+                content=validation_content["response"],
+            )
+            self._save_feedback(feedback)
         return validation_content
 
     def generate_suggested_enhancements(self, content):
-        prompt = f"Suggest enhancements for the following student work: {content.student_work}."
-        enhancements_content = self._make_request(prompt)
+        prompt = self._render("suggest_enhancements", student_work=content.student_work)
+        enhancements_content = self._make_request(prompt, "suggest_enhancements")
 
-        feedback = Feedback(
-            work_id=content.work_id,
-            feedback_type="enhancements",
-            content=enhancements_content["reposnse"],
-        )
-        self.db.add_feedback(feedback)
+        if "response" in enhancements_content:
+            feedback = Feedback(
+                work_id=content.work_id,
+                feedback_type="enhancements",
+                content=enhancements_content["response"],
+            )
+            self._save_feedback(feedback)
         return enhancements_content
 
     def provide_peer_comparison(self, content):
-        prompt = f"Compare the following student work: {content.student_work} with the peer works: {content.peer_works}."
-        return self._make_request(prompt)
+        prompt = self._render(
+            "peer_comparison",
+            student_work=content.student_work,
+            peer_works=content.peer_works,
+        )
+        return self._make_request(prompt, "peer_comparison")
 
     def generate_resource_links(self, content):
-        prompt = f"Provide resource links for the topic: {content.topic}."
-        resources_content = self._make_request(prompt)
+        prompt = self._render("resource_links", topic=content.topic)
+        resources_content = self._make_request(prompt, "resource_links")
 
         if "response" in resources_content:
             # Assuming the response contains a list of resource links
             links = resources_content["response"].split("\n")
             for link in links:
-                topic, resource = link.split(": ")
-                url, description = resource.split(" - ")
+                try:
+                    topic, resource = link.split(": ", 1)
+                    url, description = resource.split(" - ", 1)
+                except ValueError:
+                    logging.debug(f"Skipping malformed resource link: {link}")
+                    continue
                 resource_link = ResourceLink(
                     topic=topic, url=url.strip(), description=description.strip()
                 )
@@ -100,15 +211,15 @@ class LLMFeedback:
         return resources_content
 
     def evaluate_effort(self, content):
-        prompt = f"Evaluate the effort put into the following student work: {content.student_work}. Rate the work on a scale of 1-5, where 1 is poor and 5 is excellent."
-        response = self._make_request(prompt)
+        prompt = self._render("evaluate_effort", student_work=content.student_work)
+        response = self._make_request(prompt, "evaluate_effort")
 
-        if response["response"] is None:
+        if response.get("response") is None:
             return {"response": "Failed to evaluate student work."}
 
         try:
-            rating = int(response["response"].split()[-1])
-        except ValueError:
+            rating = int(response["response"].split()[-1].strip(".*"))
+        except (ValueError, IndexError):
             return {"response": "Invalid rating received."}
 
         feedback_messages = {
@@ -127,62 +238,181 @@ class LLMFeedback:
             work_id=content.work_id,
             feedback_type="Effort Evaluation",
             content=feedback_content,
+            effort_rating=rating if rating in feedback_messages else None,
         )
-        self.db.add_feedback(feedback)
+        self._save_feedback(feedback)
 
         return {"response": feedback_content}
 
-    def _generate_prompt(self, content: AssessmentContent, focus: str = "general"):
-        prompt = f"Provide detailed feedback on the following student work. Be constructive and specific in your comments.\n\nStudent work: {content.student_work}\nAssessment type: {content.assessment_type}"
-
-        if content.correct_answer:
-            prompt += f"\n\nCorrect answer: {content.correct_answer}\nCompare the student's work to the correct answer and highlight any discrepancies."
-
-        if content.peer_works:
-            prompt += f"\n\nPeer works: {content.peer_works}\nCompare the student's work to these peer examples, noting strengths and areas for improvement relative to peers."
-
-        if content.topic:
-            prompt += f"\n\nTopic: {content.topic}\nEnsure the feedback is relevant to this specific topic."
-
-        prompt += "\n\nBased on all this information, provide a comprehensive feedback that includes:\n1. Strengths of the work\n2. Areas for improvement\n3. Specific suggestions for enhancement\n4. An overall assessment of the work"
+    def grade_open_answers(self, question: str, correct_answer: str, responses: List[str]):
+        """Grade several responses to one question with a single request.
+
+        Responses are numbered from 1 in the prompt. The model is asked for
+        a JSON array; parsing it is left to the caller.
+        """
+        prompt = self._render(
+            "grade_open_answers",
+            question=question,
+            correct_answer=correct_answer,
+            responses="".join(f"\n[{i}] {response}" for i, response in enumerate(responses, 1)),
+        )
+        return self._make_request(prompt, "grade_open_answers")
+
+    def _generate_prompt(
+        self, content: AssessmentContent, focus: str = "general"
+    ) -> BuiltPrompt:
+        return self._render(
+            feedback_template_name(focus),
+            assessment_type=content.assessment_type,
+            student_work=content.student_work,
+            correct_answer=content.correct_answer,
+            topic=content.topic,
+            peer_works=content.peer_works,
+        )
 
-        if focus == "grammar":
-            prompt += (
-                "\nPay special attention to grammar and language use in your feedback."
-            )
-        elif focus == "content":
-            prompt += (
-                "\nFocus primarily on the content and ideas presented in the work."
+    def _render(self, template_name: str, **values) -> BuiltPrompt:
+        with METRICS.time("prompt_build"):
+            return self.prompts.render(template_name, self.max_prompt_tokens, **values)
+
+    def _save_feedback(self, feedback: Feedback):
+        with METRICS.time("db_write"):
+            return self.db.add_feedback(feedback)
+
+    def _make_request(self, prompt, action: str = "default"):
+        """Send a prompt to the model chosen for this action.
+
+        `prompt` is a BuiltPrompt from a template, or a plain string sent
+        after the default system prompt. With a router configured, a failed
+        attempt is retried on another model, up to router.max_attempts
+        models per request.
+        """
+        from openai import OpenAIError
+
+        if isinstance(prompt, str):
+            prompt = BuiltPrompt(prompt, estimate_tokens(prompt))
+        messages = [
+            {"role": "system", "content": prompt.system or self.system_prompt},
+            {"role": "user", "content": prompt.text},
+        ]
+
+        attempts = self.router.max_attempts if self.router else 1
+        tried = []
+        error = "No model available"
+        if self.hedge_policy is not None:
+            self.hedge_policy.on_request()
+        for _ in range(attempts):
+            model = self._acquire_model(action, tried)
+            if model is None:
+                break
+            tried.append(model)
+            try:
+                with METRICS.time("llm", action):
+                    content, model = self._complete_hedged(action, model, messages, tried)
+            except OpenAIError as e:
+                logging.error(f"OpenAI error from {model}: {e}")
+                error = f"OpenAI error: {e}"
+                continue
+            except Exception as e:
+                logging.error(f"Error making request to {model}: {e}")
+                error = f"An error occurred: {e}"
+                continue
+
+            logging.info(
+                "LLM request completed",
+                extra={
+                    "action": action,
+                    "model": model,
+                    "template_id": prompt.template_id,
+                    "prompt_tokens": prompt.prompt_tokens,
+                    "truncations": prompt.truncation_count,
+                },
             )
-        elif focus == "structure":
-            prompt += "\nPay particular attention to the structure and organization of the work in your feedback."
-
-        return prompt
-
-    def _make_request(self, prompt):
+            if logging.getLogger().isEnabledFor(logging.DEBUG):
+                logging.debug("Request prompt: %s", prompt.text, extra={"payload": True})
+            try:
+                llm_request = LLMRequest(
+                    prompt=prompt.text,
+                    response=content,
+                    model=model,
+                    prompt_tokens=prompt.prompt_tokens,
+                    truncation_count=prompt.truncation_count,
+                    template_id=prompt.template_id,
+                )
+                with METRICS.time("db_write", action):
+                    self.db.log_llm_request(llm_request)
+            except Exception as e:
+                logging.error(f"Error logging LLM request: {e}")
+            return {"response": content}
+
+        return {"error": error}
+
+    def _acquire_model(self, action, tried, timeout=None):
+        if self.router is None:
+            return self.model
+        with METRICS.time("queue_wait", action):
+            return self.router.acquire(action, exclude=tried, timeout=timeout)
+
+    def _complete_hedged(self, action, model, messages, tried):
+        """Run a completion, hedging it if it outlives the current p95.
+
+        The hedge goes to an alternate model when the router has one free,
+        otherwise to the same model. The first successful response wins;
+        the other call is cancelled if it has not started yet and its
+        result is discarded otherwise. A discarded call still hands its
+        router slot back from _complete whenever it finishes.
+        """
+        if self.hedge_policy is None:
+            return self._complete(model, messages), model
+
+        primary = self._hedge_executor.submit(self._complete, model, messages)
+        delay = self.hedge_policy.hedge_delay()
+        if delay is None:
+            return primary.result(), model
+
+        models = {primary: model}
+        done, _ = wait([primary], timeout=delay)
+        if not done and self.hedge_policy.try_acquire():
+            hedge_model = self._acquire_model(action, tried, timeout=0)
+            if hedge_model is None and self.router is not None:
+                hedge_model = self.router.acquire(action, timeout=0)
+            if hedge_model is None:
+                self.hedge_policy.refund()
+            else:
+                logging.info("Hedging '%s' on %s after %.2fs", action, hedge_model, delay)
+                hedge = self._hedge_executor.submit(self._complete, hedge_model, messages)
+                models[hedge] = hedge_model
+
+        pending = set(models)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for loser in pending:
+                        # A call cancelled while still queued never reaches
+                        # _complete, so its router slot is handed back here
+                        if loser.cancel() and self.router is not None:
+                            self.router.cancel(models[loser])
+                    if future is not primary:
+                        self.hedge_policy.record_win()
+                    return future.result(), models[future]
+        raise primary.exception()
+
+    def _complete(self, model, messages):
+        start = time.perf_counter()
+        success = False
         try:
             response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": self.system_prompt},
-                    {"role": "user", "content": prompt},
-                ],
-            )
-            logging.info(f"Request prompt: {prompt}")
-
-            llm_request = LLMRequest(
-                prompt=prompt,
-                response=response.choices[0].message.content,
-                model=self.model,
+                model=model,
+                messages=messages,
             )
-            self.db.log_llm_request(llm_request)
-            return {"response": response.choices[0].message.content}
-        except OpenAIError as e:
-            logging.error(f"OpenAI error: {e}")
-            return {"error": f"OpenAI error: {e}"}
-        except Exception as e:
-            logging.error(f"Error making request: {e}")
-            return {"error": f"An error occurred: {e}"}
+            content = response.choices[0].message.content
+            success = True
+            if self.hedge_policy is not None:
+                self.hedge_policy.record(time.perf_counter() - start)
+            return content
+        finally:
+            if self.router is not None:
+                self.router.release(model, time.perf_counter() - start, success)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,108 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from typing import Optional, Union
+
+LOG_FORMAT = "%(levelname)s:%(name)s:%(asctime)s - %(message)s"
+
+# Attributes every LogRecord has; anything else came in through `extra`
+RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+class StructuredFormatter(logging.Formatter):
+    """Append fields passed through `extra` as key=value pairs.
+
+    Payload records (extra={"payload": True}) have their message cut to
+    max_payload_chars so a full essay never reaches the log sink.
+    """
+
+    def __init__(self, fmt: str = LOG_FORMAT, max_payload_chars: int = 500):
+        super().__init__(fmt)
+        self.max_payload_chars = max_payload_chars
+
+    def format(self, record: logging.LogRecord) -> str:
+        if getattr(record, "payload", False):
+            message = record.getMessage()
+            if len(message) > self.max_payload_chars:
+                record.msg = f"{message[:self.max_payload_chars]}... [{len(message)} chars]"
+                record.args = None
+        line = super().format(record)
+        fields = [
+            f"{key}={value}"
+            for key, value in record.__dict__.items()
+            if key not in RESERVED_ATTRS and key != "payload"
+        ]
+        return f"{line} {' '.join(fields)}" if fields else line
+
+
+class PayloadSampler(logging.Filter):
+    """Let through only a fraction of payload records."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "payload", False):
+            return True
+        return self.rate >= 1.0 or random.random() < self.rate
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queue records without formatting them.
+
+    The stock QueueHandler formats each record on the calling thread so it
+    can be pickled; the records here stay in-process, so message
+    formatting and all I/O happen on the listener thread instead.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configure_logging(
+    level: Union[int, str] = logging.INFO,
+    log_file: Optional[str] = None,
+    payload_sample_rate: float = 0.01,
+    max_payload_chars: int = 500,
+) -> None:
+    """Route all logging through a queue drained by a background thread.
+
+    Request threads only build the record and enqueue it. Payload records
+    are sampled before they are even queued.
+    """
+    global _listener
+    stop_logging()
+
+    sink = logging.FileHandler(log_file) if log_file else logging.StreamHandler(sys.stderr)
+    sink.setFormatter(StructuredFormatter(max_payload_chars=max_payload_chars))
+
+    log_queue = queue.SimpleQueue()
+    handler = DeferredQueueHandler(log_queue)
+    handler.addFilter(PayloadSampler(payload_sample_rate))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, sink, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,181 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Tuple
+
+# Upper bounds in seconds; the last bucket catches everything slower
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, float("inf"),
+)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; observe() is a bisect and three adds."""
+
+    __slots__ = ("buckets", "counts", "count", "sum", "lock")
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating inside its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for upper, count in zip(self.buckets, self.counts):
+            if count and seen + count >= rank:
+                if upper == float("inf"):
+                    return lower
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+            lower = upper
+        return lower
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                "count": self.count,
+                "sum": self.sum,
+                "p50": self.quantile(0.50),
+                "p95": self.quantile(0.95),
+                "p99": self.quantile(0.99),
+            }
+
+
+class MetricsRegistry:
+    """Per-stage, per-action latency histograms.
+
+    The action being served is kept in a thread-local set by the socket
+    server, so code deep in a handler can time a stage without threading
+    the action name through every call.
+    """
+
+    def __init__(self):
+        self.histograms: Dict[Tuple[str, str], Histogram] = {}
+        self.counters: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def action(self) -> str:
+        return getattr(self._local, "action", "none")
+
+    @action.setter
+    def action(self, action: str) -> None:
+        self._local.action = action
+
+    def observe(self, stage: str, seconds: float, action: Optional[str] = None) -> None:
+        key = (stage, action or self.action)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(key, Histogram())
+        histogram.observe(seconds)
+
+    def increment(self, name: str, action: Optional[str] = None, amount: int = 1) -> None:
+        key = (name, action or self.action)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    @contextmanager
+    def time(self, stage: str, action: Optional[str] = None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, action)
+
+    def snapshot(self) -> dict:
+        stages: Dict[str, Dict[str, dict]] = {}
+        for (stage, action), histogram in list(self.histograms.items()):
+            stages.setdefault(stage, {})[action] = histogram.snapshot()
+        counters: Dict[str, Dict[str, int]] = {}
+        for (name, action), value in list(self.counters.items()):
+            counters.setdefault(name, {})[action] = value
+        return {"stages": stages, "counters": counters}
+
+    def render_prometheus(self, prefix: str = "llm_feedback") -> str:
+        """Render the histograms in the Prometheus text exposition format."""
+        lines = [
+            f"# HELP {prefix}_stage_seconds Time spent per request stage.",
+            f"# TYPE {prefix}_stage_seconds histogram",
+        ]
+        for (stage, action), histogram in sorted(list(self.histograms.items())):
+            with histogram.lock:
+                counts = list(histogram.counts)
+                total, count = histogram.sum, histogram.count
+            labels = f'stage="{stage}",action="{action}"'
+            cumulative = 0
+            for upper, bucket_count in zip(histogram.buckets, counts):
+                cumulative += bucket_count
+                le = "+Inf" if upper == float("inf") else repr(upper)
+                lines.append(f'{prefix}_stage_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{prefix}_stage_seconds_sum{{{labels}}} {total}")
+            lines.append(f"{prefix}_stage_seconds_count{{{labels}}} {count}")
+        if self.counters:
+            lines.append(f"# TYPE {prefix}_events_total counter")
+            for (name, action), value in sorted(list(self.counters.items())):
+                lines.append(f'{prefix}_events_total{{event="{name}",action="{action}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+
+
+def stats_handler(sources: Optional[Dict[str, Callable[[], dict]]] = None, registry: MetricsRegistry = METRICS):
+    """Build a `stats` socket action handler.
+
+    Replies with a JSON snapshot plus the output of each extra source, or
+    with Prometheus text when the content is {"format": "prometheus"}.
+    """
+
+    def handler(content):
+        if isinstance(content, dict) and content.get("format") == "prometheus":
+            return registry.render_prometheus()
+        stats = registry.snapshot()
+        for name, source in (sources or {}).items():
+            stats[name] = source()
+        return stats
+
+    return handler
+
+
+def serve_prometheus(port: int, host: str = "0.0.0.0", registry: MetricsRegistry = METRICS):
+    """Serve GET /metrics from a daemon thread."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    logging.info(f"Serving metrics on http://{host}:{httpd.server_address[1]}/metrics")
+    return httpd
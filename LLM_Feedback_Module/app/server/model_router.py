@@ -0,0 +1,182 @@
+import logging
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Union
+
+
+@dataclass
+class ModelStats:
+    model: str
+    max_concurrency: int
+    latency_ewma: Optional[float] = None
+    error_ewma: float = 0.0
+    in_flight: int = 0
+    requests: int = 0
+    errors: int = 0
+    last_failure: float = 0.0
+
+
+class ModelRouter:
+    """Pick a model per request from live latency and error averages.
+
+    Each model has a concurrency cap. Candidates for an action are its
+    preferred models followed by every other configured model, so a
+    degraded or saturated preference fails over to the rest of the pool.
+    """
+
+    def __init__(
+        self,
+        models: Union[Dict[str, int], Iterable[str]],
+        action_preferences: Optional[Dict[str, List[str]]] = None,
+        default_concurrency: int = 8,
+        alpha: float = 0.2,
+        error_threshold: float = 0.5,
+        probe_interval: float = 30.0,
+        preference_weight: float = 0.5,
+        acquire_timeout: float = 30.0,
+        max_attempts: int = 2,
+    ):
+        if not isinstance(models, dict):
+            models = {model: default_concurrency for model in models}
+        if not models:
+            raise ValueError("At least one model must be configured")
+
+        self.stats = {
+            model: ModelStats(model=model, max_concurrency=cap)
+            for model, cap in models.items()
+        }
+        self.action_preferences = action_preferences or {}
+        for action, preferred in self.action_preferences.items():
+            unknown = [model for model in preferred if model not in self.stats]
+            if unknown:
+                raise ValueError(f"Unknown models for action '{action}': {unknown}")
+
+        self.alpha = alpha
+        self.error_threshold = error_threshold
+        self.probe_interval = probe_interval
+        self.preference_weight = preference_weight
+        self.acquire_timeout = acquire_timeout
+        self.max_attempts = max_attempts
+
+        self.decisions: Counter = Counter()
+        self.failovers: Counter = Counter()
+        self._condition = threading.Condition()
+
+    def candidates(self, action: str) -> List[str]:
+        """Models to consider for an action, most preferred first."""
+        preferred = self.action_preferences.get(action, [])
+        return preferred + [model for model in self.stats if model not in preferred]
+
+    def acquire(
+        self, action: str, exclude: Iterable[str] = (), timeout: Optional[float] = None
+    ) -> Optional[str]:
+        """Reserve a slot on the best model for an action.
+
+        Blocks until a candidate has free capacity or the timeout (default
+        acquire_timeout) expires, in which case None is returned. Every
+        model returned must be handed back through release().
+        """
+        exclude = set(exclude)
+        if timeout is None:
+            timeout = self.acquire_timeout
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                model = self._pick(action, exclude)
+                if model is not None:
+                    stats = self.stats[model]
+                    stats.in_flight += 1
+                    stats.requests += 1
+                    self.decisions[(action, model)] += 1
+                    preferred = self.candidates(action)[0]
+                    if model != preferred:
+                        self.failovers[(action, preferred, model)] += 1
+                    logging.debug("Routed '%s' to %s", action, model)
+                    return model
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logging.warning("No model available for '%s'", action)
+                    return None
+                self._condition.wait(remaining)
+
+    def release(self, model: str, latency: float, success: bool) -> None:
+        """Return a slot and fold the outcome into the model's averages."""
+        with self._condition:
+            stats = self.stats[model]
+            stats.in_flight -= 1
+            if success:
+                if stats.latency_ewma is None:
+                    stats.latency_ewma = latency
+                else:
+                    stats.latency_ewma += self.alpha * (latency - stats.latency_ewma)
+            else:
+                stats.errors += 1
+                stats.last_failure = time.monotonic()
+            stats.error_ewma += self.alpha * ((0.0 if success else 1.0) - stats.error_ewma)
+            self._condition.notify_all()
+
+    def cancel(self, model: str) -> None:
+        """Return a slot whose request never started, recording no outcome."""
+        with self._condition:
+            stats = self.stats[model]
+            stats.in_flight -= 1
+            stats.requests -= 1
+            self._condition.notify_all()
+
+    def is_degraded(self, model: str) -> bool:
+        return self.stats[model].error_ewma >= self.error_threshold
+
+    def metrics(self) -> dict:
+        """Snapshot of per-model health and routing decisions."""
+        with self._condition:
+            return {
+                "models": {
+                    model: {
+                        "latency_ewma": stats.latency_ewma,
+                        "error_ewma": round(stats.error_ewma, 4),
+                        "in_flight": stats.in_flight,
+                        "max_concurrency": stats.max_concurrency,
+                        "requests": stats.requests,
+                        "errors": stats.errors,
+                        "degraded": self.is_degraded(model),
+                    }
+                    for model, stats in self.stats.items()
+                },
+                "decisions": [
+                    {"action": action, "model": model, "count": count}
+                    for (action, model), count in self.decisions.items()
+                ],
+                "failovers": [
+                    {"action": action, "preferred": preferred, "model": model, "count": count}
+                    for (action, preferred, model), count in self.failovers.items()
+                ],
+            }
+
+    def _pick(self, action: str, exclude: set) -> Optional[str]:
+        now = time.monotonic()
+        best, best_cost = None, None
+        fallback = None
+        for rank, model in enumerate(self.candidates(action)):
+            stats = self.stats[model]
+            if model in exclude or stats.in_flight >= stats.max_concurrency:
+                continue
+            if self.is_degraded(model):
+                # Let a single probe through once the model has cooled down,
+                # otherwise keep it only as a last resort.
+                if now - stats.last_failure < self.probe_interval or stats.in_flight:
+                    fallback = fallback or model
+                    continue
+            latency = stats.latency_ewma
+            if latency is None:
+                # Untried models are explored first; models that have only
+                # ever failed rank behind everything that has succeeded.
+                # A first request still in flight has not failed yet.
+                completed = stats.requests - stats.in_flight
+                latency = 0.0 if completed == 0 else self.acquire_timeout
+            cost = latency * (1 + stats.error_ewma) * (1 + rank * self.preference_weight)
+            if best_cost is None or cost < best_cost:
+                best, best_cost = model, cost
+        return best or fallback
@@ -0,0 +1,205 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Optional, Tuple, Union
+
+DEFAULT_PROFILE_DIR = Path("data/profiles")
+
+
+class StackSampler:
+    """Periodically sample every thread's stack.
+
+    Stacks are counted in the collapsed format flamegraph.pl and speedscope
+    read: one "frame;frame;frame count" line per distinct stack, root first.
+    The sampler thread itself is skipped.
+    """
+
+    def __init__(self, interval: float = 0.01, path: Optional[Union[str, Path]] = None):
+        # Zero would make the sampler thread spin holding the GIL; NaN fails too
+        if not interval > 0:
+            raise ValueError(f"Sampling interval must be positive, got {interval}")
+        self.interval = interval
+        self.path = Path(path) if path else None
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Optional[Path]:
+        """Stop sampling and write the collapsed stacks if a path is set."""
+        if self._thread is None:
+            return None
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        return self.dump() if self.path else None
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, frame in frames.items():
+                    if thread_id != own_id:
+                        self.stacks[self._collapse(frame)] += 1
+                self.samples += 1
+
+    @staticmethod
+    def _collapse(frame) -> str:
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def collapsed(self) -> str:
+        with self._lock:
+            return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def dump(self, path: Optional[Union[str, Path]] = None) -> Path:
+        path = Path(path) if path else self.path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.collapsed())
+        logging.info("Wrote %d stack samples to %s", self.samples, path)
+        return path
+
+
+class Profiler:
+    """Opt-in profiling for the socket server.
+
+    Per-request cProfile capture runs only when enabled and the message
+    carries "profile": true. Only one request is profiled at a time; others
+    that ask while one is running are served unprofiled.
+    """
+
+    def __init__(
+        self,
+        output_dir: Union[str, Path] = DEFAULT_PROFILE_DIR,
+        request_profiling: bool = False,
+        top: int = 25,
+    ):
+        self.output_dir = Path(output_dir)
+        self.request_profiling = request_profiling
+        self.top = top
+        self.sampler: Optional[StackSampler] = None
+        self.profiled_requests = 0
+        self._busy = threading.Lock()
+
+    def profile_call(self, action: str, func: Callable, *args) -> Tuple[object, Optional[dict]]:
+        """Call func, profiling it when possible.
+
+        Returns the result and a summary with the top functions by
+        cumulative time and the path of the saved .prof file.
+        """
+        if not self.request_profiling or not self._busy.acquire(blocking=False):
+            return func(*args), None
+        try:
+            profile = cProfile.Profile()
+            start = time.perf_counter()
+            result = profile.runcall(func, *args)
+            elapsed = time.perf_counter() - start
+        finally:
+            self._busy.release()
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        path = self.output_dir / f"{action}-{time.strftime('%Y%m%d-%H%M%S')}-{self.profiled_requests}.prof"
+        profile.dump_stats(path)
+        self.profiled_requests += 1
+
+        text = io.StringIO()
+        pstats.Stats(profile, stream=text).sort_stats("cumulative").print_stats(self.top)
+        return result, {"seconds": elapsed, "path": str(path), "stats": text.getvalue()}
+
+    def start_sampling(self, interval: float = 0.01, path: Optional[Union[str, Path]] = None) -> Path:
+        """Start the stack sampler; path is a file name inside output_dir.
+
+        Raises ValueError for an interval that is not positive.
+        """
+        if self.sampler is not None and self.sampler.running:
+            return self.sampler.path
+        path = self._output_path(path) if path else self.output_dir / f"stacks-{time.strftime('%Y%m%d-%H%M%S')}.folded"
+        self.sampler = StackSampler(interval, path)
+        self.sampler.start()
+        logging.info("Sampling stacks every %.3fs to %s", interval, path)
+        return path
+
+    def _output_path(self, path: Union[str, Path]) -> Path:
+        # The path can come from any socket client, so it must not escape output_dir
+        output_dir = self.output_dir.resolve()
+        resolved = (output_dir / path).resolve()
+        if resolved.parent != output_dir:
+            raise ValueError(f"Sample path must be a file name inside {self.output_dir}")
+        return resolved
+
+    def stop_sampling(self) -> Optional[Path]:
+        if self.sampler is None:
+            return None
+        return self.sampler.stop()
+
+    def status(self) -> dict:
+        sampler = self.sampler
+        return {
+            "request_profiling": self.request_profiling,
+            "profiled_requests": self.profiled_requests,
+            "output_dir": str(self.output_dir),
+            "sampling": bool(sampler and sampler.running),
+            "samples": sampler.samples if sampler else 0,
+            "sample_path": str(sampler.path) if sampler else None,
+        }
+
+
+def profile_handler(profiler: Profiler):
+    """Build a `profile` admin action handler.
+
+    Content is {"command": ...} with one of status, enable_requests,
+    disable_requests, start_sampling (optional interval, and a path that
+    must name a file directly inside the profiler's output_dir),
+    stop_sampling or dump_sampling.
+    """
+
+    def handler(content):
+        content = content if isinstance(content, dict) else {}
+        command = content.get("command", "status")
+        if command == "enable_requests":
+            profiler.request_profiling = True
+        elif command == "disable_requests":
+            profiler.request_profiling = False
+        elif command == "start_sampling":
+            try:
+                profiler.start_sampling(float(content.get("interval", 0.01)), content.get("path"))
+            except (TypeError, ValueError) as e:
+                return {"error": f"Invalid start_sampling request: {e}"}
+        elif command == "stop_sampling":
+            path = profiler.stop_sampling()
+            return {**profiler.status(), "written": str(path) if path else None}
+        elif command == "dump_sampling":
+            if profiler.sampler is None:
+                return {"error": "Stack sampling has not been started"}
+            return {**profiler.status(), "written": str(profiler.sampler.dump())}
+        elif command != "status":
+            return {"error": f"Unknown profile command '{command}'"}
+        return profiler.status()
+
+    return handler
@@ -0,0 +1,129 @@
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+DEFAULT_MAX_PROMPT_TOKENS = 6000
+TRUNCATION_MARKER = " [...truncated]"
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Cheap token count approximation for English text.
+
+    BPE tokenizers average roughly four characters per token on prose,
+    and never produce fewer tokens than there are words. Both bounds are
+    O(1) or a single C-level scan, so this is safe to call on every
+    section of every prompt.
+    """
+    if not text:
+        return 0
+    return max(len(text) // 4 + 1, text.count(" ") + 1)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text so estimate_tokens of the result is at most max_tokens.
+
+    Both bounds of the estimate are respected: the result is kept under
+    4 * max_tokens characters and max_tokens - 1 spaces, marker included,
+    so text of short words is cut by its word count. The cut prefers a
+    word boundary; budgets too small for the marker get none.
+    """
+    if max_tokens <= 0:
+        return ""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    marker = TRUNCATION_MARKER if estimate_tokens(TRUNCATION_MARKER) < max_tokens else ""
+    limit = max(0, 4 * max_tokens - 1 - len(marker))
+    spaces = max_tokens - 1 - marker.count(" ")
+    head = text[:limit]
+    if head.count(" ") > spaces:
+        # End just before the first space over the allowance
+        limit = len(" ".join(head.split(" ", spaces + 1)[: spaces + 1]))
+    cut = text.rfind(" ", 0, limit)
+    if cut < limit // 2:
+        cut = limit
+    return text[:cut].rstrip() + marker
+
+
+@dataclass
+class PromptSection:
+    """A piece of a prompt.
+
+    Sections with a higher priority are truncated last. Fixed sections
+    (the instructions) are never truncated. max_tokens caps a section on
+    its own; min_tokens is the floor truncation stops at, and a section
+    with a floor of 0 may be dropped entirely.
+    """
+
+    name: str
+    text: str
+    priority: int = 0
+    min_tokens: int = 0
+    max_tokens: Optional[int] = None
+    fixed: bool = False
+    tokens: int = 0
+    truncated: bool = False
+
+
+@dataclass
+class BuiltPrompt:
+    text: str
+    prompt_tokens: int
+    truncated_sections: List[str] = field(default_factory=list)
+    system: Optional[str] = None
+    template_id: Optional[str] = None
+
+    @property
+    def truncation_count(self) -> int:
+        return len(self.truncated_sections)
+
+
+class PromptBuilder:
+    """Assemble prompt sections within a token budget."""
+
+    def __init__(self, max_tokens: int = DEFAULT_MAX_PROMPT_TOKENS, separator: str = "\n\n"):
+        self.max_tokens = max_tokens
+        self.separator = separator
+        self.sections: List[PromptSection] = []
+
+    def add(self, name: str, text: Optional[str], priority: int = 0, min_tokens: int = 0,
+            max_tokens: Optional[int] = None) -> "PromptBuilder":
+        if text:
+            self.sections.append(PromptSection(name, text, priority, min_tokens, max_tokens))
+        return self
+
+    def add_fixed(self, name: str, text: str) -> "PromptBuilder":
+        self.sections.append(PromptSection(name, text, fixed=True))
+        return self
+
+    def build(self) -> BuiltPrompt:
+        for section in self.sections:
+            if section.max_tokens is not None and not section.fixed:
+                self._shrink(section, section.max_tokens)
+            section.tokens = estimate_tokens(section.text)
+
+        overflow = sum(section.tokens for section in self.sections) - self.max_tokens
+        if overflow > 0:
+            flexible = sorted(
+                (section for section in self.sections if not section.fixed),
+                key=lambda section: section.priority,
+            )
+            for section in flexible:
+                if overflow <= 0:
+                    break
+                target = max(section.min_tokens, section.tokens - overflow)
+                before = section.tokens
+                self._shrink(section, target)
+                section.tokens = estimate_tokens(section.text)
+                overflow -= before - section.tokens
+
+        kept = [section.text for section in self.sections if section.text]
+        return BuiltPrompt(
+            text=self.separator.join(kept),
+            prompt_tokens=sum(section.tokens for section in self.sections),
+            truncated_sections=[section.name for section in self.sections if section.truncated],
+        )
+
+    def _shrink(self, section: PromptSection, max_tokens: int) -> None:
+        if estimate_tokens(section.text) <= max_tokens:
+            return
+        section.text = truncate_to_tokens(section.text, max_tokens)
+        section.truncated = True
@@ -0,0 +1,208 @@
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from prompt_budget import BuiltPrompt, PromptBuilder, estimate_tokens
+
+
+@dataclass(frozen=True)
+class TemplateField:
+    """A variable section of a prompt.
+
+    min_share is the fraction of the budget the field keeps when the
+    prompt has to be truncated.
+    """
+
+    name: str
+    label: str
+    priority: int = 50
+    min_share: float = 0.0
+    max_tokens: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """A versioned prompt for one feedback action.
+
+    The static instructions are sent in the system message, after the
+    system prompt, so every request for the same template shares a
+    byte-identical prefix that provider-side prompt caches can reuse. The
+    variable fields follow in the user message.
+    """
+
+    name: str
+    version: int
+    instructions: str
+    fields: Tuple[TemplateField, ...]
+
+    @property
+    def template_id(self) -> str:
+        return f"{self.name}@v{self.version}"
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    template: PromptTemplate
+    system: str
+    system_tokens: int
+
+    @property
+    def template_id(self) -> str:
+        return self.template.template_id
+
+    def render(self, max_tokens: int, **values) -> BuiltPrompt:
+        """Fill the fields, truncating them to fit what the prefix leaves."""
+        budget = max(0, max_tokens - self.system_tokens)
+        builder = PromptBuilder(budget)
+        for field in self.template.fields:
+            value = values.get(field.name)
+            builder.add(
+                field.name,
+                value and f"{field.label}: {value}",
+                priority=field.priority,
+                min_tokens=int(budget * field.min_share),
+                max_tokens=field.max_tokens,
+            )
+        built = builder.build()
+        built.prompt_tokens += self.system_tokens
+        built.system = self.system
+        built.template_id = self.template_id
+        return built
+
+
+FEEDBACK_INSTRUCTIONS = (
+    "Provide detailed feedback on the student work in the user message. "
+    "Be constructive and specific in your comments.\n"
+    "If a correct answer is given, compare the student's work to it and highlight any discrepancies.\n"
+    "If peer works are given, compare the student's work to these peer examples, "
+    "noting strengths and areas for improvement relative to peers.\n"
+    "If a topic is given, ensure the feedback is relevant to this specific topic.\n\n"
+    "Based on all this information, provide a comprehensive feedback that includes:\n"
+    "1. Strengths of the work\n2. Areas for improvement\n"
+    "3. Specific suggestions for enhancement\n4. An overall assessment of the work"
+)
+
+FEEDBACK_FOCUS = {
+    "grammar": "Pay special attention to grammar and language use in your feedback.",
+    "content": "Focus primarily on the content and ideas presented in the work.",
+    "structure": "Pay particular attention to the structure and organization of the work in your feedback.",
+}
+
+FEEDBACK_FIELDS = (
+    TemplateField("assessment_type", "Assessment type", priority=200, max_tokens=20),
+    TemplateField("student_work", "Student work", priority=100, min_share=0.5),
+    TemplateField("correct_answer", "Correct answer", priority=80, min_share=0.125),
+    TemplateField("topic", "Topic", priority=60, max_tokens=200),
+    TemplateField("peer_works", "Peer works", priority=20),
+)
+
+STUDENT_WORK_FIELD = TemplateField("student_work", "Student work", priority=100)
+
+TEMPLATES: Dict[str, PromptTemplate] = {}
+
+
+def register_template(template: PromptTemplate) -> None:
+    TEMPLATES[template.name] = template
+
+
+def feedback_template_name(focus: str = "general") -> str:
+    return "get_feedback" if focus == "general" else f"get_feedback.{focus}"
+
+
+register_template(PromptTemplate("get_feedback", 1, FEEDBACK_INSTRUCTIONS, FEEDBACK_FIELDS))
+for focus, instruction in FEEDBACK_FOCUS.items():
+    register_template(
+        PromptTemplate(
+            feedback_template_name(focus),
+            1,
+            f"{FEEDBACK_INSTRUCTIONS}\n{instruction}",
+            FEEDBACK_FIELDS,
+        )
+    )
+
+register_template(
+    PromptTemplate(
+        "validate_answer",
+        1,
+        "Compare the student's answer with the correct answer in the user message. "
+        "Is the student's answer correct?",
+        (
+            TemplateField("student_answer", "Student answer", priority=100, min_share=0.5),
+            TemplateField("correct_answer", "Correct answer", priority=80, min_share=0.25),
+        ),
+    )
+)
+register_template(
+    PromptTemplate(
+        "suggest_enhancements",
+        1,
+        "Suggest enhancements for the student work in the user message.",
+        (STUDENT_WORK_FIELD,),
+    )
+)
+register_template(
+    PromptTemplate(
+        "peer_comparison",
+        1,
+        "Compare the student work in the user message with the peer works.",
+        (
+            TemplateField("student_work", "Student work", priority=100, min_share=0.5),
+            TemplateField("peer_works", "Peer works", priority=20),
+        ),
+    )
+)
+register_template(
+    PromptTemplate(
+        "resource_links",
+        1,
+        "Provide resource links for the topic in the user message. "
+        "Put each link on its own line as 'topic: url - description'.",
+        (TemplateField("topic", "Topic", priority=100),),
+    )
+)
+register_template(
+    PromptTemplate(
+        "evaluate_effort",
+        1,
+        "Evaluate the effort put into the student work in the user message. "
+        "Rate the work on a scale of 1-5, where 1 is poor and 5 is excellent. "
+        "End your answer with the rating.",
+        (STUDENT_WORK_FIELD,),
+    )
+)
+
+register_template(
+    PromptTemplate(
+        "grade_open_answers",
+        1,
+        "Grade each numbered student response in the user message against the question and the "
+        "reference answer. A response is correct if it conveys the substance of the reference answer; "
+        "wording does not matter. Reply with only a JSON array holding one object per response, "
+        'in the form {"id": <number>, "correct": true or false, "feedback": "<one or two sentences '
+        'for the student>"}.',
+        (
+            TemplateField("question", "Question", priority=200, min_share=0.1),
+            TemplateField("correct_answer", "Reference answer", priority=150, min_share=0.1),
+            TemplateField("responses", "Student responses", priority=100, min_share=0.5),
+        ),
+    )
+)
+
+
+class PromptRegistry:
+    """Templates compiled against one system prompt."""
+
+    def __init__(self, system_prompt: str, templates: Optional[Dict[str, PromptTemplate]] = None):
+        self.system_prompt = system_prompt
+        self.compiled: Dict[str, CompiledTemplate] = {}
+        for name, template in (templates or TEMPLATES).items():
+            system = f"{system_prompt}\n\n{template.instructions}"
+            self.compiled[name] = CompiledTemplate(template, system, estimate_tokens(system))
+
+    def get(self, name: str) -> CompiledTemplate:
+        try:
+            return self.compiled[name]
+        except KeyError:
+            raise ValueError(f"No prompt template named '{name}'") from None
+
+    def render(self, name: str, max_tokens: int, **values) -> BuiltPrompt:
+        return self.get(name).render(max_tokens, **values)
@@ -0,0 +1,201 @@
+"""
+Background grading of open-ended quiz answers.
+
+Ungraded answers are read from the question bank in (question, answer)
+order and split into batches per question. Each batch is one LLM request
+carrying the question and reference answer once, followed by the numbered
+responses. Batches are sized to the prompt token budget. The reply's JSON
+array is written back as is_correct and feedback, one transaction per
+batch.
+
+All progress lives in the database: a graded answer is no longer
+selected, and a reply that leaves an answer ungraded bumps its
+grading_attempts. A request that fails outright (the model or network is
+down) ends the pass without counting against the answers, so an outage
+cannot use up their attempts. A grader that is stopped or crashes simply
+resumes from whatever is still ungraded.
+"""
+
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import groupby
+from typing import Dict, List, Optional, Tuple
+
+from prompt_budget import estimate_tokens, truncate_to_tokens
+import quiz_service  # noqa: F401  (puts the quiz client on sys.path)
+from quiz_db import Answer, QuizDB
+
+GRADE_TEMPLATE = "grade_open_answers"
+# Longer responses are truncated so one essay cannot crowd out a batch
+MAX_RESPONSE_TOKENS = 400
+# Room left in the budget for the numbering and the JSON reply
+PROMPT_MARGIN_TOKENS = 200
+
+
+@dataclass(slots=True)
+class GradingBatch:
+    question_id: int
+    question: str
+    correct_answer: str
+    answers: List[Answer]
+
+
+def parse_grades(text: str, count: int) -> Dict[int, Tuple[bool, Optional[str]]]:
+    """Map 1-based response numbers to (correct, feedback).
+
+    Tolerates prose or code fences around the JSON array; entries with a
+    missing or out-of-range id are skipped.
+    """
+    start, end = text.find("["), text.rfind("]")
+    if start == -1 or end <= start:
+        raise ValueError("No JSON array in grading response")
+    grades = {}
+    for entry in json.loads(text[start:end + 1]):
+        if not isinstance(entry, dict):
+            continue
+        try:
+            number = int(entry["id"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        correct = entry.get("correct")
+        if isinstance(correct, str):
+            correct = correct.strip().lower() in ("true", "yes", "correct")
+        if 1 <= number <= count and correct is not None:
+            grades[number] = (bool(correct), entry.get("feedback"))
+    return grades
+
+
+class QuizGrader:
+    def __init__(
+        self,
+        db: QuizDB,
+        llm,
+        concurrency: int = 4,
+        max_batch_size: int = 20,
+        max_attempts: int = 3,
+    ):
+        self.db = db
+        self.llm = llm
+        self.concurrency = concurrency
+        self.max_batch_size = max_batch_size
+        self.max_attempts = max_attempts
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._stats = {"graded": 0, "failed": 0, "requests": 0, "failed_requests": 0}
+
+    def start(self, interval: float = 60.0) -> None:
+        """Grade whatever is pending every `interval` seconds on a daemon thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name="quiz-grader", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self, interval: float) -> None:
+        while not self._stop.is_set():
+            try:
+                self.grade_pending()
+            except Exception as e:
+                logging.error(f"Quiz grading pass failed: {e}")
+            self._stop.wait(interval)
+
+    def grade_pending(self) -> int:
+        """Grade until nothing gradable is left; returns the answers graded."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.concurrency, thread_name_prefix="quiz-grade")
+        # Enough work to keep every worker busy with full batches
+        fetch = self.concurrency * self.max_batch_size * 2
+        graded = 0
+        while not self._stop.is_set():
+            answers = self.db.get_ungraded_answers(fetch, self.max_attempts)
+            if not answers:
+                break
+            results = list(self._executor.map(self._grade_batch, self._make_batches(answers)))
+            graded += sum(count for count in results if count is not None)
+            if None in results:
+                # Retry on the next pass rather than spin on a failing model
+                break
+        return graded
+
+    def _make_batches(self, answers: List[Answer]) -> List[GradingBatch]:
+        questions = {
+            question.question_id: question
+            for question in (self.db.get_question_by_id(question_id) for question_id in {a.question_id for a in answers})
+            if question is not None
+        }
+        system_tokens = self.llm.prompts.get(GRADE_TEMPLATE).system_tokens
+        batches = []
+        for question_id, group in groupby(answers, key=lambda answer: answer.question_id):
+            group = list(group)
+            question = questions.get(question_id)
+            if question is None:
+                self.db.record_grading_failures([answer.answer_id for answer in group])
+                continue
+            budget = (
+                self.llm.max_prompt_tokens
+                - system_tokens
+                - estimate_tokens(question.question_text)
+                - estimate_tokens(question.correct_answer)
+                - PROMPT_MARGIN_TOKENS
+            )
+            batch, used = [], 0
+            for answer in group:
+                tokens = min(estimate_tokens(answer.open_ended_response), MAX_RESPONSE_TOKENS) + 3
+                if batch and (len(batch) >= self.max_batch_size or used + tokens > budget):
+                    batches.append(GradingBatch(question_id, question.question_text, question.correct_answer, batch))
+                    batch, used = [], 0
+                batch.append(answer)
+                used += tokens
+            batches.append(GradingBatch(question_id, question.question_text, question.correct_answer, batch))
+        return batches
+
+    def _grade_batch(self, batch: GradingBatch) -> Optional[int]:
+        """Grade one batch; returns the answers graded, or None if the request failed."""
+        responses = [
+            truncate_to_tokens(" ".join(answer.open_ended_response.split()), MAX_RESPONSE_TOKENS)
+            for answer in batch.answers
+        ]
+        result = self.llm.grade_open_answers(batch.question, batch.correct_answer, responses)
+        if "response" not in result:
+            logging.warning(f"Grading request for question {batch.question_id} failed: {result.get('error')}")
+            with self._lock:
+                self._stats["requests"] += 1
+                self._stats["failed_requests"] += 1
+            return None
+        grades = {}
+        try:
+            grades = parse_grades(result["response"] or "", len(responses))
+        except ValueError as e:
+            logging.warning(f"Unparseable grades for question {batch.question_id}: {e}")
+
+        updates = [
+            (answer.answer_id, *grades[number])
+            for number, answer in enumerate(batch.answers, 1)
+            if number in grades
+        ]
+        failed = [answer.answer_id for number, answer in enumerate(batch.answers, 1) if number not in grades]
+        if updates:
+            self.db.save_grades(updates)
+        if failed:
+            self.db.record_grading_failures(failed)
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["graded"] += len(updates)
+            self._stats["failed"] += len(failed)
+        return len(updates)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["answers_per_request"] = stats["graded"] / stats["requests"] if stats["requests"] else 0.0
+        return stats
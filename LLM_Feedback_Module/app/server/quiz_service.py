@@ -0,0 +1,137 @@
+"""
+Quiz actions served from one shared question bank.
+
+The bank is a QuizDB (the Tk client's storage layer) opened by the
+server, so every exam taker reads the same indexed questions instead of
+a per-client data/quiz.db. Bundles are cached in memory. The cache drops
+everything whenever another connection commits to the bank file, which
+it detects by polling SQLite's PRAGMA data_version at most once a second.
+That pragma misses the server's own commits, so ingesting estimates
+drops the cached bundles, whose question params they change, directly.
+Answers arrive in the client's compressed outbox batches, are
+deduplicated by idempotency key, and are stored one transaction per batch.
+Items that fail validation or name an unknown question are rejected one
+by one, with a reason, instead of failing their whole batch.
+"""
+
+import logging
+import sys
+import zlib
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+# The quiz storage layer lives with the Tk client
+QUIZ_CLIENT_DIR = Path(__file__).resolve().parent.parent / "clients" / "04-quiz_tk"
+if str(QUIZ_CLIENT_DIR) not in sys.path:
+    sys.path.append(str(QUIZ_CLIENT_DIR))
+
+from metrics import METRICS  # noqa: E402
+from outbox import decode_batch  # noqa: E402
+from quiz_bundle import build_bundle  # noqa: E402
+from quiz_db import ESTIMATES_KIND, QuizDB  # noqa: E402
+from reference_cache import ReferenceCache  # noqa: E402
+
+QUIZ_BANK_PATH = Path("data") / "quiz_bank.db"
+
+QUIZ_ACTIONS = {
+    "list_quizzes": "list_quizzes",
+    "get_quiz_bundle": "get_quiz_bundle",
+    "submit_answers": "submit_answers",
+    "quiz_stats": "quiz_stats",
+    "student_ability": "student_ability",
+}
+
+
+class QuizService:
+    def __init__(self, db: Union[QuizDB, str, Path, None] = None, check_interval: float = 1.0):
+        self.db = db if isinstance(db, QuizDB) else QuizDB(db or QUIZ_BANK_PATH)
+        self.cache = ReferenceCache(
+            {"quizzes": "Quizzes", "quiz_bundles": "Questions"},
+            generation_source=self._data_version,
+            check_interval=check_interval,
+        )
+
+    def _data_version(self) -> Dict[str, int]:
+        # Changes whenever another connection commits to the file
+        with self.db._db_connection() as conn:
+            version = conn.execute("PRAGMA data_version").fetchone()[0]
+        return {"Quizzes": version, "Questions": version}
+
+    def register_handlers(self, server) -> None:
+        """Register every quiz action on a SocketServer."""
+        for action, method_name in QUIZ_ACTIONS.items():
+            server.register_handler(action, getattr(self, method_name))
+
+    def list_quizzes(self, content=None) -> dict:
+        quizzes = self.cache.get(
+            "quizzes",
+            "all",
+            lambda: [[quiz.quiz_id, quiz.title, quiz.description] for quiz in self.db.get_all_quizzes()],
+        )
+        return {"quizzes": quizzes}
+
+    def get_quiz_bundle(self, content) -> dict:
+        quiz_id = self._quiz_id(content)
+        if quiz_id is None:
+            return {"error": "Invalid content: quiz_id is required"}
+        bundle = self.cache.get("quiz_bundles", quiz_id, lambda: self._load_bundle(quiz_id))
+        if bundle is None:
+            return {"error": f"No quiz found with ID {quiz_id}"}
+        return {"bundle": bundle}
+
+    def _load_bundle(self, quiz_id: int) -> Optional[dict]:
+        try:
+            return build_bundle(self.db, quiz_id).to_dict()
+        except ValueError:
+            return None
+
+    def submit_answers(self, content) -> dict:
+        """Ingest one outbox batch and acknowledge its keys."""
+        if not isinstance(content, dict):
+            return {"error": "Invalid content: an answer batch is required"}
+        batch_id = content.get("batch_id")
+        try:
+            items, rejected = decode_batch(content)
+        except (ValueError, KeyError, TypeError, zlib.error) as e:
+            return {"batch_id": batch_id, "error": f"Invalid answer batch: {e}"}
+        with METRICS.time("quiz_ingest"):
+            acked, stored, unknown = self.db.ingest_outbox_items(items)
+        if any(item.kind == ESTIMATES_KIND for item in items):
+            self.cache.invalidate("quiz_bundles")
+        rejected += unknown
+        logging.debug("Batch %s: %d items, %d new answers, %d rejected", batch_id, len(items), stored, len(rejected))
+        return {"batch_id": batch_id, "acked": acked, "rejected": rejected, "stored": stored}
+
+    def quiz_stats(self, content) -> dict:
+        quiz_id = self._quiz_id(content)
+        if quiz_id is None:
+            return {"error": "Invalid content: quiz_id is required"}
+        total_questions, total_answers, percent_correct = self.db.get_quiz_statistics(quiz_id)
+        return {
+            "quiz_id": quiz_id,
+            "total_questions": total_questions,
+            "total_answers": total_answers,
+            "percent_correct": percent_correct,
+            "questions": [
+                [stats.question_id, stats.answers, stats.graded, stats.percent_correct, stats.discrimination]
+                for stats in self.db.get_question_report(quiz_id)
+            ],
+        }
+
+    def student_ability(self, content) -> dict:
+        """The bank's ability estimate for a student, None if it has none."""
+        try:
+            student_id = int(content["student_id"])
+        except (KeyError, TypeError, ValueError):
+            return {"error": "Invalid content: student_id is required"}
+        ability, answers = self.db.get_student_ability(student_id) or (None, 0)
+        return {"student_id": student_id, "ability": ability, "answers": answers}
+
+    @staticmethod
+    def _quiz_id(content) -> Optional[int]:
+        if isinstance(content, dict) and content.get("quiz_id") is not None:
+            try:
+                return int(content["quiz_id"])
+            except (TypeError, ValueError):
+                return None
+        return None
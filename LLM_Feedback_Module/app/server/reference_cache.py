@@ -0,0 +1,117 @@
+import threading
+import time
+from typing import Callable, Dict, Hashable, Optional
+
+_MISSING = object()
+
+
+class ReferenceCache:
+    """In-process read-through cache for rarely changing reference data.
+
+    Entries live in namespaces that map to the table they come from, so a
+    write to a table invalidates everything read from it. None results are
+    cached too. Stats count hits, misses and invalidations per namespace.
+
+    With a generation source, the cache also polls a per-table generation
+    counter at most once every check_interval seconds, and drops namespaces
+    whose table changed. This keeps several server processes on the same
+    database consistent within that interval.
+
+    Loaders run outside the lock. A value loaded while its namespace was
+    invalidated is returned but not stored, since it may predate the write.
+    """
+
+    def __init__(
+        self,
+        namespaces: Dict[str, str],
+        generation_source: Optional[Callable[[], Dict[str, int]]] = None,
+        check_interval: float = 1.0,
+    ):
+        # namespace -> source table
+        self.namespaces = dict(namespaces)
+        self.generation_source = generation_source
+        self.check_interval = check_interval
+        self._data: Dict[str, Dict[Hashable, object]] = {name: {} for name in namespaces}
+        self._stats = {name: {"hits": 0, "misses": 0, "invalidations": 0} for name in namespaces}
+        # Bumped by every invalidation, to spot loads that raced one
+        self._versions = {name: 0 for name in namespaces}
+        self._generations: Dict[str, int] = {}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: Hashable, loader: Callable[[], object]):
+        self._check_generations()
+        with self._lock:
+            value = self._data[namespace].get(key, _MISSING)
+            if value is not _MISSING:
+                self._stats[namespace]["hits"] += 1
+                return value
+            self._stats[namespace]["misses"] += 1
+            version = self._versions[namespace]
+        value = loader()
+        with self._lock:
+            if self._versions[namespace] == version:
+                self._data[namespace][key] = value
+        return value
+
+    def put(self, namespace: str, key: Hashable, value: object) -> None:
+        with self._lock:
+            self._data[namespace][key] = value
+
+    def invalidate(self, namespace: Optional[str] = None, key: Hashable = _MISSING) -> None:
+        """Drop one key, one namespace, or everything."""
+        with self._lock:
+            for name in [namespace] if namespace else list(self._data):
+                self._invalidate(name, key)
+
+    def _invalidate(self, namespace: str, key: Hashable = _MISSING) -> None:
+        # Caller holds the lock
+        if key is _MISSING:
+            self._data[namespace] = {}
+        else:
+            self._data[namespace].pop(key, None)
+        self._versions[namespace] += 1
+        self._stats[namespace]["invalidations"] += 1
+
+    def invalidate_table(self, table: str) -> None:
+        with self._lock:
+            self._invalidate_table(table)
+
+    def _invalidate_table(self, table: str) -> None:
+        # Caller holds the lock
+        for namespace, source in self.namespaces.items():
+            if source == table:
+                self._invalidate(namespace)
+
+    def _check_generations(self) -> None:
+        if self.generation_source is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at < self.check_interval:
+                return
+            self._checked_at = now
+        # Queried outside the lock so hits never wait on the database
+        generations = self.generation_source()
+        with self._lock:
+            changed = [
+                table
+                for table, generation in generations.items()
+                if self._generations.get(table, generation) != generation
+            ]
+            self._generations = generations
+            for table in changed:
+                self._invalidate_table(table)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {
+                name: {**counts, "size": len(self._data[name])}
+                for name, counts in self._stats.items()
+            }
+        for counts in stats.values():
+            lookups = counts["hits"] + counts["misses"]
+            counts["hit_ratio"] = counts["hits"] / lookups if lookups else 0.0
+        if self.generation_source is not None:
+            stats["generations"] = dict(self._generations)
+        return stats
@@ -1,13 +1,25 @@
+import codecs
 import concurrent.futures
 import json
 import logging
+import re
 import socket
 import sys
+import threading
+import time
 from typing import Callable
 
+from metrics import METRICS
+
+MAX_MESSAGE_SIZE = 4 * 1024 * 1024
+
+# Tails that raw_decode rejects but that more data could still complete
+_PARTIAL_LITERALS = ("true", "false", "null", "NaN", "Infinity", "-Infinity")
+_PARTIAL_NUMBER = re.compile(r"\.|[eE][-+]?")
+
 class SocketServer:
 
-    def __init__(self, host='localhost', port=8765):
+    def __init__(self, host='localhost', port=8765, profiler=None):
         self.host = host
         self.port = port
         self.server_socket = None
@@ -15,24 +27,29 @@ class SocketServer:
         self.handlers = {}
         self.executor = concurrent.futures.ThreadPoolExecutor()
         self.running = True
-
-        logger = logging.getLogger(__file__)
-        log_format = "%(levelname)s:%(name)s:%(asctime)s - %(message)s"
-        logging.basicConfig(level=logging.DEBUG, format=log_format)
+        self.ready = threading.Event()
+        self.decoder = json.JSONDecoder()
+        # Opt-in profiling.Profiler; requests with "profile": true are captured
+        self.profiler = profiler
 
     def start(self):
         self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.server_socket.bind((self.host, self.port))
+        # Report the real port when binding to port 0
+        self.port = self.server_socket.getsockname()[1]
         self.server_socket.listen(5)
         self.server_socket.settimeout(1.0)
         logging.info(f"Server listening on {self.host}:{self.port}")
+        self.ready.set()
 
         try:
             while self.running:
                 try:
                     client_socket, addr = self.server_socket.accept()
-                    logging.info(f"Accepted connection from {addr}")
-                    self.executor.submit(self.handle_client, client_socket, addr)
+                    logging.info("Accepted connection from %s", addr)
+                    self.executor.submit(
+                        self.handle_client, client_socket, addr, time.perf_counter()
+                    )
                 except socket.timeout:
                     continue
                 except Exception as e:
@@ -40,15 +57,31 @@ class SocketServer:
         finally:
             self.stop()
 
-    def handle_client(self, client_socket, addr):
+    def handle_client(self, client_socket, addr, accepted_at=None):
+        if accepted_at is not None:
+            METRICS.observe("queue_wait", time.perf_counter() - accepted_at, "connection")
         self.clients.append(client_socket)
+        buffer = ""
+        # Incremental so a multi-byte character split across reads survives
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        debug = logging.getLogger().isEnabledFor(logging.DEBUG)
         try:
             while True:
-                data = client_socket.recv(1024).decode('utf-8')
-                logging.debug(f"Received data from {addr}: {data}")
-                if not data:
+                raw = client_socket.recv(4096)
+                if not raw:
                     break
-                self.process_message(client_socket, data)
+                data = decoder.decode(raw)
+                if debug:
+                    logging.debug("Received %d bytes from %s", len(raw), addr)
+                    logging.debug("Payload from %s: %s", addr, data, extra={"payload": True})
+                buffer += data
+                if (buffer.lstrip().startswith("{") and not buffer.rstrip().endswith("}")
+                        and len(buffer) <= MAX_MESSAGE_SIZE):
+                    # Mid-message; skip re-parsing the whole buffer
+                    continue
+                messages, buffer = self.split_messages(buffer)
+                for message in messages:
+                    self.process_message(client_socket, message)
         except socket.error as e:
             logging.error(f"Socket error: {e}")
         except Exception as e:
@@ -56,27 +89,86 @@ class SocketServer:
         finally:
             self.disconnect_client(client_socket, addr)
 
+    def split_messages(self, buffer):
+        """Split a receive buffer into complete JSON messages.
+
+        Messages are not delimited on the wire, so a large message can span
+        several reads and several small ones can arrive in one. Returns the
+        parsed messages and the unparsed remainder. A remainder that cannot
+        be the start of a message is returned as a raw string in the message
+        list so it gets an 'Invalid JSON' reply, as is a message that fails
+        to parse before the end of the buffer.
+        """
+        messages = []
+        index = 0
+        while True:
+            while index < len(buffer) and buffer[index].isspace():
+                index += 1
+            if index == len(buffer):
+                return messages, ""
+            if buffer[index] != "{" or len(buffer) - index > MAX_MESSAGE_SIZE:
+                messages.append(buffer[index:])
+                return messages, ""
+            try:
+                message, index = self.decoder.raw_decode(buffer, index)
+            except json.JSONDecodeError as e:
+                if self._truncated(buffer, e):
+                    return messages, buffer[index:]
+                messages.append(buffer[index:])
+                return messages, ""
+            messages.append(message)
+
+    @staticmethod
+    def _truncated(buffer, error):
+        """Whether a decode error means the message has not fully arrived yet."""
+        if error.pos >= len(buffer) or error.msg.startswith("Unterminated string"):
+            return True
+        tail = buffer[error.pos:]
+        if error.msg.startswith("Invalid \\uXXXX escape"):
+            return len(tail) < 6
+        if any(literal.startswith(tail) for literal in _PARTIAL_LITERALS):
+            return True
+        return buffer[error.pos - 1].isdigit() and _PARTIAL_NUMBER.fullmatch(tail) is not None
+
     def process_message(self, client_socket, data):
         try:
-            message = json.loads(data)
+            message = json.loads(data) if isinstance(data, str) else data
             action = message['action']
-            content = message['content']
+            content = message.get('content')
 
             if action in self.handlers:
-                response = self.handlers[action](content)
-                self.send_response(client_socket, action, response)
+                METRICS.action = action
+                start = time.perf_counter()
+                profile = None
+                try:
+                    if self.profiler is not None and message.get('profile'):
+                        response, profile = self.profiler.profile_call(action, self.handlers[action], content)
+                    else:
+                        response = self.handlers[action](content)
+                except Exception as e:
+                    logging.error(f"Error handling '{action}': {e}")
+                    METRICS.increment("handler_error")
+                    response = {"error": f"An error occurred: {e}"}
+                self.send_response(client_socket, action, response, profile)
+                METRICS.observe("total", time.perf_counter() - start)
             else:
                 self.send_response(client_socket, 'error', 'Invalid action')
         except json.JSONDecodeError:
             self.send_response(client_socket, 'error', 'Invalid JSON')
+        except (KeyError, TypeError, AttributeError):
+            self.send_response(client_socket, 'error', 'Invalid message')
 
-    def create_message(self, action, response):
-        return json.dumps({'action': action, 'response': response})
+    def create_message(self, action, response, profile=None):
+        message = {'action': action, 'response': response}
+        if profile is not None:
+            message['profile'] = profile
+        return json.dumps(message)
 
-    def send_response(self, client_socket, action, response):
-        message = self.create_message(action, response)
+    def send_response(self, client_socket, action, response, profile=None):
+        message = self.create_message(action, response, profile)
         try:
-            client_socket.send(message.encode('utf-8'))
+            with METRICS.time("socket_send"):
+                client_socket.sendall(message.encode('utf-8'))
         except socket.error as e:
             logging.error(f"Error sending response to client: {e}")
 
@@ -107,13 +199,15 @@ class SocketServer:
     def disconnect_client(self, client_socket, addr):
         self.clients.remove(client_socket)
         client_socket.close()
-        logging.info(f"Client {addr} disconnected")
+        logging.info("Client %s disconnected", addr)
 
     def stop(self):
         self.running = False
         if self.server_socket:
             self.server_socket.close()
         self.executor.shutdown(wait=True)
+        if self.profiler is not None:
+            self.profiler.stop_sampling()
         logging.info("Server stopped")
 
 if __name__ == "__main__":
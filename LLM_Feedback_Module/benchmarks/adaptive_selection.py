@@ -0,0 +1,116 @@
+"""
+Cost of adaptive question selection on a large question bank.
+
+Builds an AdaptiveEngine over N questions with simulated true
+difficulties, then runs simulated students through it: each step picks
+the next question, draws a Rasch-model answer from the true parameters,
+and applies the update. It reports the time per selection and per update,
+compares selection with a linear scan over the bank, and shows how close
+the estimated abilities end up to the true ones.
+
+    python benchmarks/adaptive_selection.py --questions 100000 --students 200 --answers 30
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+QUIZ_DIR = Path(__file__).resolve().parent.parent / "app" / "clients" / "04-quiz_tk"
+sys.path.insert(0, str(QUIZ_DIR))
+
+from adaptive import AdaptiveEngine, success_probability  # noqa: E402
+
+
+def linear_next_question(engine, difficulties, student, asked):
+    """Selection without the index: scan every question."""
+    target = engine.ability(student) - engine.target_offset
+    best, best_gap = None, math.inf
+    for question_id, difficulty in enumerate(difficulties):
+        gap = abs(difficulty - target)
+        if gap < best_gap and question_id not in asked:
+            best, best_gap = question_id, gap
+    return best
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=100_000)
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--answers", type=int, default=30, help="questions answered per student")
+    parser.add_argument("--linear-samples", type=int, default=50, help="selections timed with a linear scan")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    true_difficulty = [rng.gauss(0.0, 1.5) for _ in range(args.questions)]
+    true_ability = [rng.gauss(0.0, 1.0) for _ in range(args.students)]
+
+    # Estimates start from a noisy calibration, as after a nightly refit
+    tracemalloc.start()
+    start = time.perf_counter()
+    engine = AdaptiveEngine()
+    engine.add_questions([(i, d + rng.gauss(0.0, 0.5), 20) for i, d in enumerate(true_difficulty)])
+    build_seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    select_times, update_times = [], []
+    for student, ability in enumerate(true_ability):
+        asked = set()
+        for _ in range(args.answers):
+            start = time.perf_counter()
+            question_id = engine.next_question(student, asked)
+            select_times.append(time.perf_counter() - start)
+            asked.add(question_id)
+            correct = rng.random() < success_probability(ability, true_difficulty[question_id])
+            start = time.perf_counter()
+            engine.update(student, question_id, correct)
+            update_times.append(time.perf_counter() - start)
+
+    estimated = {student: engine.ability(student) for student in range(args.students)}
+    rmse = math.sqrt(sum((estimated[s] - a) ** 2 for s, a in enumerate(true_ability)) / args.students)
+
+    difficulties = [engine.difficulty(i) for i in range(args.questions)]
+    linear_times = []
+    for i in range(args.linear_samples):
+        start = time.perf_counter()
+        linear_next_question(engine, difficulties, i % args.students, set())
+        linear_times.append(time.perf_counter() - start)
+
+    select_times.sort()
+    update_times.sort()
+    linear_times.sort()
+    result = {
+        "questions": args.questions,
+        "build_seconds": build_seconds,
+        "build_peak_mb": peak / 1e6,
+        "select_us_p50": percentile(select_times, 0.5) * 1e6,
+        "select_us_p99": percentile(select_times, 0.99) * 1e6,
+        "update_us_p50": percentile(update_times, 0.5) * 1e6,
+        "update_us_p99": percentile(update_times, 0.99) * 1e6,
+        "linear_select_us_p50": percentile(linear_times, 0.5) * 1e6,
+        "ability_rmse": rmse,
+    }
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"{args.questions} questions, {args.students} students x {args.answers} answers")
+    print(f"build            {result['build_seconds']:.2f} s, peak {result['build_peak_mb']:.1f} MB")
+    print(f"select           p50 {result['select_us_p50']:8.1f} us   p99 {result['select_us_p99']:8.1f} us")
+    print(f"update           p50 {result['update_us_p50']:8.1f} us   p99 {result['update_us_p99']:8.1f} us")
+    print(f"linear select    p50 {result['linear_select_us_p50']:8.1f} us")
+    print(f"ability RMSE     {rmse:.2f} logits after {args.answers} answers")
+
+
+if __name__ == "__main__":
+    main()
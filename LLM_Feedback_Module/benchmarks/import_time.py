@@ -0,0 +1,145 @@
+"""
+Cold-start import benchmark for the server and quiz client entry points.
+
+Each target runs in a fresh interpreter under `python -X importtime`, in
+an empty working directory. The script reports the import time that the
+target adds on top of a bare interpreter, along with the slowest modules.
+It exits non-zero if a target goes over its budget, imports a module that
+should stay lazy, or creates files (e.g. a database) while starting up.
+
+    python benchmarks/import_time.py --repeat 5
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+SERVER_DIR = ROOT / "app" / "server"
+QUIZ_DIR = ROOT / "app" / "clients" / "04-quiz_tk"
+
+
+@dataclass
+class Target:
+    name: str
+    path: Path
+    code: str
+    max_ms: float
+    # Modules that must only be imported on first use
+    lazy: Tuple[str, ...]
+
+
+TARGETS = (
+    Target(
+        "server",
+        SERVER_DIR,
+        # Load __main__.py without running main()
+        "import importlib.util as u; "
+        f"s = u.spec_from_file_location('server_main', {str(SERVER_DIR / '__main__.py')!r}); "
+        "s.loader.exec_module(u.module_from_spec(s))",
+        max_ms=150,
+        lazy=("openai", "httpx", "http.server", "cProfile", "pstats"),
+    ),
+    Target(
+        "quiz_app",
+        QUIZ_DIR,
+        "import quiz_app; quiz_app.QuizApp()",
+        max_ms=100,
+        lazy=("tkinter",),
+    ),
+)
+
+
+def import_times(code: str, path: Path, cwd: str) -> Dict[str, Tuple[int, int]]:
+    """Map each imported module to (nesting depth, cumulative microseconds)."""
+    env = dict(os.environ, PYTHONPATH=str(path), PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=cwd, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        module = name.strip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        times[module] = (depth, int(cumulative))
+    return times
+
+
+def measure(target: Target, baseline: set, repeat: int) -> dict:
+    runs: List[Dict[str, Tuple[int, int]]] = []
+    leftovers: List[str] = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as cwd:
+            runs.append(import_times(target.code, target.path, cwd))
+            leftovers = sorted(os.listdir(cwd))
+
+    totals = [
+        sum(us for module, (depth, us) in run.items() if depth == 0 and module not in baseline)
+        for run in runs
+    ]
+    # Report the fastest run; slower ones are mostly scheduling noise
+    best = runs[totals.index(min(totals))]
+    slowest = sorted(
+        ((module, us) for module, (depth, us) in best.items() if module not in baseline),
+        key=lambda item: item[1],
+        reverse=True,
+    )[:8]
+    eager = [module for module in target.lazy if module in best]
+    ms = min(totals) / 1000
+    return {
+        "target": target.name,
+        "ms": ms,
+        "max_ms": target.max_ms,
+        "modules": len(best) - len(baseline & best.keys()),
+        "slowest": [{"module": module, "ms": us / 1000} for module, us in slowest],
+        "eager_imports": eager,
+        "created_files": leftovers,
+        "ok": ms <= target.max_ms and not eager and not leftovers,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget, for slow machines")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cwd:
+        baseline = set(import_times("pass", ROOT, cwd))
+
+    rows = []
+    for target in TARGETS:
+        target.max_ms *= args.scale
+        rows.append(measure(target, baseline, args.repeat))
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        for row in rows:
+            status = "ok" if row["ok"] else "FAIL"
+            print(f"{row['target']:<10}{row['ms']:>8.1f} ms  (budget {row['max_ms']:.0f} ms, {row['modules']} modules)  {status}")
+            for item in row["slowest"]:
+                print(f"    {item['module']:<40}{item['ms']:>8.1f} ms")
+            if row["eager_imports"]:
+                print(f"    imported eagerly: {', '.join(row['eager_imports'])}")
+            if row["created_files"]:
+                print(f"    created at startup: {', '.join(row['created_files'])}")
+
+    if not all(row["ok"] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
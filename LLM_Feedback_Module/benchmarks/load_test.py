@@ -0,0 +1,308 @@
+"""
+End-to-end load benchmark for the feedback socket server.
+
+Starts the mock LLM server, a throwaway database seeded with students,
+assignments and essays, and a SocketServer wired exactly like
+app/server/__main__.py, then drives it with concurrent clients sending a
+weighted mix of feedback and quiz actions. Reports throughput and p50/p95/p99
+latency per action. No network access or API key is needed.
+
+    python benchmarks/load_test.py --clients 16 --requests 50 --latency lognormal:0.2,0.5
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+SERVER_DIR = BENCHMARKS_DIR.parent / "app" / "server"
+sys.path.insert(0, str(SERVER_DIR))
+sys.path.insert(0, str(BENCHMARKS_DIR))
+
+from database import Assignment, Database, Student, StudentWork  # noqa: E402
+from hedging import HedgePolicy  # noqa: E402
+from llm_feedback import LLMFeedback  # noqa: E402
+from metrics import METRICS  # noqa: E402
+from mock_llm_server import MOCK_MODELS, MockLLMConfig, MockLLMServer  # noqa: E402
+from model_router import ModelRouter  # noqa: E402
+from quiz_service import QuizService  # noqa: E402
+from socket_server import SocketServer  # noqa: E402
+
+# Importable once quiz_service has put the quiz client on sys.path
+from outbox import BANK_SOURCE, encode_batch  # noqa: E402
+from quiz_db import OutboxItem, Question, Quiz, QuizDB  # noqa: E402
+
+DEFAULT_MIX = {
+    "get_feedback": 35,
+    "evaluate_effort": 20,
+    "validate_answer": 15,
+    "suggest_enhancements": 10,
+    "peer_comparison": 10,
+    "resource_links": 5,
+    "list_quizzes": 5,
+    "get_quiz_bundle": 10,
+    "submit_answers": 10,
+    "quiz_stats": 5,
+}
+
+QUIZ_ACTIONS = {"list_quizzes", "get_quiz_bundle", "submit_answers", "quiz_stats"}
+
+SYSTEM_PROMPT = "You are an AI assistant who knows everything about education and can provide feedback on student work."
+
+ESSAY_WORDS = (
+    "suffering growth resilience character adversity learning reflection "
+    "perspective courage empathy struggle hope change insight purpose"
+).split()
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def parse_mix(spec):
+    mix = {}
+    for part in spec.split(","):
+        action, _, weight = part.partition("=")
+        mix[action.strip()] = float(weight or 1)
+    return mix
+
+
+def seed_database(db, rng, works, essay_words):
+    """Create students, assignments and essays; return the work ids."""
+    essay_type = db.get_assessment_type_id("Essay")
+    assignment_ids = [
+        db.add_assignment(
+            Assignment(
+                title=f"Essay {i}",
+                description="Reflect on the role of suffering in personal growth.",
+                assessment_type_id=essay_type,
+                correct_answer="Adversity builds resilience when it is reflected on.",
+            )
+        )
+        for i in range(max(1, works // 20))
+    ]
+    work_ids = []
+    for i in range(works):
+        student_id = db.add_student(Student(name=f"Student {i}"))
+        content = " ".join(rng.choice(ESSAY_WORDS) for _ in range(rng.randint(essay_words // 2, essay_words)))
+        work_ids.append(
+            db.add_student_work(
+                StudentWork(student_id=student_id, assignment_id=rng.choice(assignment_ids), content=content)
+            )
+        )
+    return work_ids
+
+
+def seed_quiz_bank(db, rng, quizzes, questions_per_quiz):
+    """Create quizzes of multiple-choice questions; return {quiz_id: [(question_id, answer)]}."""
+    bank = {}
+    for i in range(quizzes):
+        quiz_id = db.add_quiz(Quiz(f"Quiz {i}", "Load test quiz"))
+        bank[quiz_id] = []
+        for j in range(questions_per_quiz):
+            choices = [f"Choice {k}" for k in range(4)]
+            answer = rng.choice(choices)
+            bank[quiz_id].append((db.add_question(Question(quiz_id, f"Question {i}.{j}", answer, choices)), answer))
+    return bank
+
+
+def make_content(action, rng, work_ids, quiz_bank):
+    if action not in QUIZ_ACTIONS:
+        return {"work_id": rng.choice(work_ids)}
+    quiz_id = rng.choice(list(quiz_bank))
+    if action != "submit_answers":
+        return {"quiz_id": quiz_id}
+    # One attempt's answers, as a client outbox batch
+    items = [
+        OutboxItem(
+            f"{rng.getrandbits(64):016x}",
+            "answer",
+            {
+                "source": BANK_SOURCE,
+                "quiz_id": quiz_id,
+                "question_id": question_id,
+                "selected_choice": answer if rng.random() < 0.7 else "Choice 0",
+            },
+        )
+        for question_id, answer in quiz_bank[quiz_id]
+    ]
+    return encode_batch(items)
+
+
+class Client:
+    def __init__(self, host, port):
+        self.sock = socket.create_connection((host, port))
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+
+    def request(self, action, content):
+        self.sock.sendall(json.dumps({"action": action, "content": content}).encode("utf-8"))
+        while True:
+            try:
+                message, end = self.decoder.raw_decode(self.buffer)
+                self.buffer = self.buffer[end:].lstrip()
+                return message
+            except json.JSONDecodeError:
+                data = self.sock.recv(65536)
+                if not data:
+                    raise ConnectionError("Server closed the connection")
+                self.buffer += data.decode("utf-8")
+
+    def close(self):
+        self.sock.close()
+
+
+def run_client(host, port, requests, mix, work_ids, quiz_bank, seed, results, lock):
+    rng = random.Random(seed)
+    actions, weights = zip(*mix.items())
+    client = Client(host, port)
+    try:
+        for _ in range(requests):
+            action = rng.choices(actions, weights)[0]
+            content = make_content(action, rng, work_ids, quiz_bank)
+            start = time.perf_counter()
+            try:
+                reply = client.request(action, content)
+                response = reply.get("response")
+                failed = reply.get("action") == "error" or (isinstance(response, dict) and "error" in response)
+            except (OSError, ConnectionError, ValueError):
+                failed = True
+                client.close()
+                client = Client(host, port)
+            elapsed = time.perf_counter() - start
+            with lock:
+                results[action].append((elapsed, failed))
+    finally:
+        client.close()
+
+
+def report(results, wall_time, as_json=False):
+    rows = []
+    for action in sorted(results):
+        samples = results[action]
+        ordered = sorted(latency for latency, _ in samples)
+        rows.append(
+            {
+                "action": action,
+                "requests": len(samples),
+                "errors": sum(1 for _, failed in samples if failed),
+                "throughput": len(samples) / wall_time if wall_time else 0.0,
+                "p50": percentile(ordered, 0.50),
+                "p95": percentile(ordered, 0.95),
+                "p99": percentile(ordered, 0.99),
+            }
+        )
+    total = sum(row["requests"] for row in rows)
+    errors = sum(row["errors"] for row in rows)
+    summary = {"requests": total, "errors": errors, "wall_time": wall_time, "throughput": total / wall_time if wall_time else 0.0}
+
+    if as_json:
+        print(json.dumps({"summary": summary, "actions": rows}, indent=2))
+        return summary
+
+    print(f"{'action':<22}{'reqs':>7}{'errs':>6}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for row in rows:
+        print(
+            f"{row['action']:<22}{row['requests']:>7}{row['errors']:>6}{row['throughput']:>9.1f}"
+            f"{row['p50'] * 1000:>10.1f}{row['p95'] * 1000:>10.1f}{row['p99'] * 1000:>10.1f}"
+        )
+    print(f"\n{total} requests, {errors} errors in {wall_time:.2f}s ({summary['throughput']:.1f} req/s)")
+
+    print(f"\n{'server stage':<18}{'action':<22}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage, by_action in sorted(METRICS.snapshot()["stages"].items()):
+        for action, stats in sorted(by_action.items()):
+            print(
+                f"{stage:<18}{action:<22}{stats['count']:>7}{stats['p50'] * 1000:>10.2f}"
+                f"{stats['p95'] * 1000:>10.2f}{stats['p99'] * 1000:>10.2f}"
+            )
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=25, help="requests per client")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="e.g. get_feedback=3,evaluate_effort=1")
+    parser.add_argument("--works", type=int, default=200, help="student works to seed")
+    parser.add_argument("--essay-words", type=int, default=400)
+    parser.add_argument("--quizzes", type=int, default=20, help="quizzes to seed in the question bank")
+    parser.add_argument("--questions", type=int, default=25, help="questions per quiz")
+    parser.add_argument("--latency", default="lognormal:0.05,0.5", help="mock LLM latency spec")
+    parser.add_argument("--stall-rate", type=float, default=0.0)
+    parser.add_argument("--stall-seconds", type=float, default=5.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--route", action="store_true", help="route across the mock models")
+    parser.add_argument("--hedge", action="store_true", help="enable request hedging")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--max-error-rate", type=float, default=None, help="exit non-zero above this error rate")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    rng = random.Random(args.seed)
+
+    config = MockLLMConfig(
+        latency=args.latency,
+        stall_rate=args.stall_rate,
+        stall_seconds=args.stall_seconds,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    with MockLLMServer(config) as mock, tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "load_test.db"))
+        work_ids = seed_database(db, rng, args.works, args.essay_words)
+        quiz_service = QuizService(QuizDB(os.path.join(tmp, "quiz_bank.db")))
+        quiz_bank = seed_quiz_bank(quiz_service.db, rng, args.quizzes, args.questions)
+
+        model = next(iter(MOCK_MODELS))
+        router = ModelRouter(list(MOCK_MODELS)) if args.route else None
+        hedge_policy = HedgePolicy() if args.hedge else None
+        llm_feedback = LLMFeedback("mock-key", mock.base_url, model, SYSTEM_PROMPT, db, router, hedge_policy)
+
+        server = SocketServer(host="127.0.0.1", port=0)
+        llm_feedback.register_handlers(server)
+        quiz_service.register_handlers(server)
+        server_thread = threading.Thread(target=server.start, daemon=True)
+        server_thread.start()
+        server.ready.wait(5)
+
+        results = defaultdict(list)
+        lock = threading.Lock()
+        threads = [
+            threading.Thread(
+                target=run_client,
+                args=(server.host, server.port, args.requests, args.mix, work_ids, quiz_bank, args.seed + i, results, lock),
+            )
+            for i in range(args.clients)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall_time = time.perf_counter() - start
+
+        server.running = False
+        server_thread.join()
+        quiz_service.db.close()
+        summary = report(results, wall_time, args.json)
+
+    if args.max_error_rate is not None and summary["requests"]:
+        if summary["errors"] / summary["requests"] > args.max_error_rate:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Per-request logging cost on the request thread, before and after log_config.
+
+"before" replays what a feedback request used to log: basicConfig(DEBUG)
+with a synchronous file handler, the received payload at DEBUG and the
+whole prompt at INFO, both as f-strings. "after" replays the current calls
+through configure_logging(): a structured INFO line, payload records
+sampled and formatted on the listener thread.
+
+    python benchmarks/logging_overhead.py --requests 20000 --essay-words 800
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SERVER_DIR = Path(__file__).resolve().parent.parent / "app" / "server"
+sys.path.insert(0, str(SERVER_DIR))
+
+import log_config  # noqa: E402
+
+ESSAY_WORD = "resilience "
+
+
+def reset_logging():
+    log_config.stop_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+
+def before(requests, data, prompt, addr):
+    for _ in range(requests):
+        logging.debug(f"Received data from {addr}: {data}")
+        logging.info(f"Request prompt: {prompt}")
+
+
+def after(requests, data, prompt, addr):
+    debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+    for _ in range(requests):
+        if debug:
+            logging.debug("Received %d bytes from %s", len(data), addr)
+            logging.debug("Payload from %s: %s", addr, data, extra={"payload": True})
+        logging.info(
+            "LLM request completed",
+            extra={"action": "get_feedback", "model": "mock", "template_id": "get_feedback@v1", "prompt_tokens": 1200},
+        )
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug("Request prompt: %s", prompt, extra={"payload": True})
+
+
+def measure(name, setup, run, requests, data, prompt, log_path):
+    reset_logging()
+    setup(log_path)
+    start = time.perf_counter()
+    run(requests, data, prompt, ("127.0.0.1", 50000))
+    elapsed = time.perf_counter() - start
+    reset_logging()
+    return {
+        "mode": name,
+        "us_per_request": elapsed / requests * 1e6,
+        "log_bytes": os.path.getsize(log_path) if os.path.exists(log_path) else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--essay-words", type=int, default=800)
+    parser.add_argument("--sample-rate", type=float, default=0.01)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    essay = ESSAY_WORD * args.essay_words
+    data = json.dumps({"action": "get_feedback", "content": {"student_work": essay}})
+    prompt = f"Assessment type: Essay\nStudent work: {essay}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rows = [
+            measure(
+                "before",
+                lambda path: logging.basicConfig(level=logging.DEBUG, filename=path, format=log_config.LOG_FORMAT),
+                before, args.requests, data, prompt, os.path.join(tmp, "before.log"),
+            ),
+            measure(
+                "after (INFO)",
+                lambda path: log_config.configure_logging(logging.INFO, path, args.sample_rate),
+                after, args.requests, data, prompt, os.path.join(tmp, "after_info.log"),
+            ),
+            measure(
+                "after (DEBUG)",
+                lambda path: log_config.configure_logging(logging.DEBUG, path, args.sample_rate),
+                after, args.requests, data, prompt, os.path.join(tmp, "after_debug.log"),
+            ),
+        ]
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"{'mode':<16}{'us/request':>12}{'log MB':>10}")
+    for row in rows:
+        print(f"{row['mode']:<16}{row['us_per_request']:>12.1f}{row['log_bytes'] / 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
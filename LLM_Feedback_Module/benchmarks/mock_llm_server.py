@@ -0,0 +1,299 @@
+"""
+Local OpenAI-compatible stub server for offline benchmarks.
+
+Serves /models and /chat/completions (with or without the /v1 prefix),
+including streamed completions, with configurable latency, upstream stalls
+and injected errors. Nothing leaves the machine, so the feedback server can
+be load tested without an API key.
+
+    python benchmarks/mock_llm_server.py --port 8000 --latency lognormal:0.4,0.5 --error-rate 0.02
+"""
+
+import argparse
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+
+MOCK_MODELS = {
+    "mistralai/Mistral-7B-Instruct-v0.2": "mistralai",
+    "meta-llama/Llama-3-8b-chat-hf": "meta",
+    "meta-llama/Llama-3-70b-chat-hf": "meta",
+}
+
+LOREM = (
+    "The work shows a clear understanding of the main ideas and supports its "
+    "argument with relevant examples although the structure could be tightened "
+    "and several claims would benefit from more precise evidence"
+).split()
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Parse a latency distribution spec into a sampler.
+
+    constant:S, uniform:LO,HI, normal:MEAN,STD, exponential:MEAN and
+    lognormal:MEDIAN,SIGMA are supported. All values are seconds.
+    """
+    kind, _, params = spec.partition(":")
+    values = [float(value) for value in params.split(",") if value]
+    if kind == "constant" and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "normal" and len(values) == 2:
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if kind == "exponential" and len(values) == 1:
+        return lambda rng: rng.expovariate(1 / values[0])
+    if kind == "lognormal" and len(values) == 2:
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(f"Invalid latency spec: {spec}")
+
+
+class MockLLMConfig:
+    def __init__(
+        self,
+        latency: str = "constant:0.05",
+        stall_rate: float = 0.0,
+        stall_seconds: float = 30.0,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        completion_words: int = 60,
+        token_delay: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        self.latency = parse_latency(latency)
+        self.stall_rate = stall_rate
+        self.stall_seconds = stall_seconds
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.completion_words = completion_words
+        self.token_delay = token_delay
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def sample(self):
+        """Draw (delay, fail) for one request."""
+        with self.lock:
+            self.requests += 1
+            delay = self.latency(self.rng)
+            if self.rng.random() < self.stall_rate:
+                delay += self.stall_seconds
+            fail = self.rng.random() < self.error_rate
+            if fail:
+                self.errors += 1
+            return delay, fail
+
+    def completion_text(self, messages) -> str:
+        prompt = " ".join(str(message.get("content", "")) for message in messages)
+        if "Student responses:" in prompt:
+            # Batch grading: one JSON entry per numbered response
+            numbers = [int(number) for number in re.findall(r"(?:^|\n)\[(\d+)\] ", prompt)]
+            with self.lock:
+                grades = [
+                    {
+                        "id": number,
+                        "correct": self.rng.random() < 0.6,
+                        "feedback": " ".join(self.rng.choice(LOREM) for _ in range(12)).capitalize() + ".",
+                    }
+                    for number in numbers
+                ]
+            return json.dumps(grades)
+        if "resource links" in prompt:
+            return "\n".join(
+                f"Topic {i}: https://example.com/resource-{i} - Example resource {i}"
+                for i in range(1, 4)
+            )
+        with self.lock:
+            words = [self.rng.choice(LOREM) for _ in range(self.completion_words)]
+            rating = self.rng.randint(1, 5)
+        return " ".join(words).capitalize() + f". Rating: {rating}"
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config: MockLLMConfig = MockLLMConfig()
+
+    def log_message(self, format, *args):
+        logging.debug("mock-llm: " + format, *args)
+
+    def do_GET(self):
+        if self.path.rstrip("/") in ("/models", "/v1/models"):
+            data = [
+                {"id": model, "object": "model", "owned_by": vendor}
+                for model, vendor in MOCK_MODELS.items()
+            ]
+            self._send_json(200, {"object": "list", "data": data}, {"ETag": '"mock-models-v1"'})
+        else:
+            self._send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "Invalid JSON"}})
+            return
+
+        if self.path.rstrip("/") not in ("/chat/completions", "/v1/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+
+        delay, fail = self.config.sample()
+        time.sleep(delay)
+        if fail:
+            self._send_json(
+                self.config.error_status,
+                {"error": {"message": "Injected failure", "type": "server_error"}},
+            )
+            return
+
+        messages = body.get("messages", [])
+        text = self.config.completion_text(messages)
+        model = body.get("model", "mock")
+        prompt_tokens = sum(len(str(m.get("content", ""))) // 4 + 1 for m in messages)
+        completion_tokens = len(text.split())
+        if body.get("stream"):
+            self._stream(model, text)
+            return
+        if self.config.token_delay:
+            # Generation time grows with the completion length
+            time.sleep(self.config.token_delay * completion_tokens)
+
+        self._send_json(
+            200,
+            {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": text},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            },
+        )
+
+    def _stream(self, model, text):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        for i, word in enumerate(text.split(" ")):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [
+                    {"index": 0, "delta": {"content": word if i == 0 else " " + word}, "finish_reason": None}
+                ],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            if self.config.token_delay:
+                time.sleep(self.config.token_delay)
+        done = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+        }
+        self.wfile.write(f"data: {json.dumps(done)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+        self.wfile.flush()
+        self.close_connection = True
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MockLLMServer:
+    """Run the stub in a background thread; port 0 picks a free port."""
+
+    def __init__(self, config: Optional[MockLLMConfig] = None, host="127.0.0.1", port=0):
+        handler = type("ConfiguredMockLLMHandler", (MockLLMHandler,), {"config": config or MockLLMConfig()})
+        self.config = handler.config
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockLLMServer":
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", default="lognormal:0.4,0.5", help="latency distribution spec")
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="fraction of requests that stall")
+    parser.add_argument("--stall-seconds", type=float, default=30.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--completion-words", type=int, default=60)
+    parser.add_argument("--token-delay", type=float, default=0.0, help="seconds per generated token")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    config = MockLLMConfig(
+        latency=args.latency,
+        stall_rate=args.stall_rate,
+        stall_seconds=args.stall_seconds,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        completion_words=args.completion_words,
+        token_delay=args.token_delay,
+        seed=args.seed,
+    )
+    server = MockLLMServer(config, args.host, args.port)
+    logging.info(f"Mock LLM server listening on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Cost of saving a quiz attempt in QuizDB.
+
+Compares three ways of writing the answers of one attempt:
+
+- the old pattern: a new connection and a commit for every answer
+- add_answer() on the shared WAL connection, still one commit per answer
+- add_answers(), which writes the whole attempt in one transaction
+
+    python benchmarks/quiz_answers.py --questions 100 --attempts 20
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+QUIZ_DIR = Path(__file__).resolve().parent.parent / "app" / "clients" / "04-quiz_tk"
+sys.path.insert(0, str(QUIZ_DIR))
+
+from quiz_db import ANSWERS_TABLE, Answer, Question, Quiz, QuizDB  # noqa: E402
+
+
+def make_attempt(question_ids):
+    return [
+        Answer(question_id=question_id, selected_choice="B", is_correct=i % 3 != 0)
+        for i, question_id in enumerate(question_ids)
+    ]
+
+
+def per_answer_connection(db_path, answers):
+    """The pre-pooling QuizDB.add_answer, called once per answer."""
+    for answer in answers:
+        conn = sqlite3.connect(db_path)
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """INSERT INTO Answers (question_id, selected_choice, is_correct, open_ended_response)
+                   VALUES (?, ?, ?, ?)""",
+                (answer.question_id, answer.selected_choice, answer.is_correct, answer.open_ended_response),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+
+def time_attempts(save, attempts):
+    samples = []
+    for _ in range(attempts):
+        start = time.perf_counter()
+        save()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=100)
+    parser.add_argument("--attempts", type=int, default=20)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = QuizDB(os.path.join(tmp, "quiz.db"))
+        quiz_id = db.add_quiz(Quiz(title="Benchmark quiz"))
+        question_ids = [
+            db.add_question(Question(quiz_id, f"Question {i}?", "B", ["A", "B", "C", "D"]))
+            for i in range(args.questions)
+        ]
+        attempt = make_attempt(question_ids)
+
+        # The old code never enabled WAL, so give it its own rollback-journal file
+        legacy_path = os.path.join(tmp, "legacy.db")
+        with sqlite3.connect(legacy_path) as conn:
+            conn.execute(ANSWERS_TABLE)
+
+        modes = {
+            "connection per answer": lambda: per_answer_connection(legacy_path, attempt),
+            "add_answer (shared)": lambda: [db.add_answer(answer) for answer in attempt],
+            "add_answers (bulk)": lambda: db.add_answers(attempt),
+        }
+        rows = []
+        for name, save in modes.items():
+            samples = time_attempts(save, args.attempts)
+            rows.append(
+                {
+                    "mode": name,
+                    "median_ms": statistics.median(samples) * 1000,
+                    "max_ms": max(samples) * 1000,
+                    "us_per_answer": statistics.median(samples) / args.questions * 1e6,
+                }
+            )
+        db.close()
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"{args.questions}-question attempt, {args.attempts} attempts")
+    print(f"{'mode':<24}{'median ms':>11}{'max ms':>9}{'us/answer':>11}")
+    for row in rows:
+        print(f"{row['mode']:<24}{row['median_ms']:>11.2f}{row['max_ms']:>9.2f}{row['us_per_answer']:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Throughput of the open-ended answer grader against the stub LLM.
+
+Seeds a throwaway question bank with open-ended questions and ungraded
+answers, then grades them all with QuizGrader at the given model
+concurrency, once per batch size. A batch size of 1 is one request per
+answer, the way answers would be graded without batching. Reports answers
+graded per minute and the number of LLM requests.
+
+    python benchmarks/quiz_grading.py --answers 2000 --concurrency 4 --batch-sizes 1,20
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+SERVER_DIR = BENCHMARKS_DIR.parent / "app" / "server"
+sys.path.insert(0, str(SERVER_DIR))
+sys.path.insert(0, str(BENCHMARKS_DIR))
+
+from database import Database  # noqa: E402
+from llm_feedback import LLMFeedback  # noqa: E402
+from mock_llm_server import LOREM, MOCK_MODELS, MockLLMConfig, MockLLMServer  # noqa: E402
+from quiz_grader import QuizGrader  # noqa: E402
+from quiz_db import Answer, Question, Quiz, QuizDB  # noqa: E402
+
+SYSTEM_PROMPT = "You are an AI assistant who knows everything about education and can provide feedback on student work."
+
+
+def seed(db, rng, questions, answers, response_words):
+    quiz_id = db.add_quiz(Quiz("Grading benchmark"))
+    question_ids = [
+        db.add_question(
+            Question(quiz_id, f"Explain concept {i} in your own words.", f"Concept {i} means ...", [], True)
+        )
+        for i in range(questions)
+    ]
+    db.add_answers(
+        [
+            Answer(
+                question_id=rng.choice(question_ids),
+                open_ended_response=" ".join(rng.choice(LOREM) for _ in range(response_words)),
+            )
+            for _ in range(answers)
+        ]
+    )
+
+
+def run(args, batch_size, base_url, tmp):
+    rng = random.Random(args.seed)
+    quiz_db = QuizDB(os.path.join(tmp, f"quiz-{batch_size}.db"))
+    seed(quiz_db, rng, args.questions, args.answers, args.response_words)
+    db = Database(os.path.join(tmp, f"feedback-{batch_size}.db"))
+    llm = LLMFeedback("mock-key", base_url, next(iter(MOCK_MODELS)), SYSTEM_PROMPT, db)
+    grader = QuizGrader(quiz_db, llm, concurrency=args.concurrency, max_batch_size=batch_size)
+
+    start = time.perf_counter()
+    graded = grader.grade_pending()
+    elapsed = time.perf_counter() - start
+    stats = grader.stats()
+    quiz_db.close()
+    return {
+        "batch_size": batch_size,
+        "graded": graded,
+        "requests": stats["requests"],
+        "failed": stats["failed"],
+        "seconds": elapsed,
+        "answers_per_minute": graded / elapsed * 60 if elapsed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--answers", type=int, default=2000)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--response-words", type=int, default=60)
+    parser.add_argument("--concurrency", type=int, default=4, help="concurrent grading requests")
+    parser.add_argument("--batch-sizes", default="1,20", help="comma-separated max answers per request")
+    parser.add_argument("--latency", default="constant:0.2", help="mock LLM latency spec")
+    parser.add_argument("--token-delay", type=float, default=0.002, help="mock seconds per generated token")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    config = MockLLMConfig(latency=args.latency, token_delay=args.token_delay, seed=args.seed)
+    with MockLLMServer(config) as mock, tempfile.TemporaryDirectory() as tmp:
+        rows = [run(args, int(size), mock.base_url, tmp) for size in args.batch_sizes.split(",")]
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"{args.answers} answers to {args.questions} questions, concurrency {args.concurrency}")
+    print(f"{'batch':>6}{'graded':>8}{'requests':>10}{'failed':>8}{'seconds':>9}{'answers/min':>13}")
+    for row in rows:
+        print(
+            f"{row['batch_size']:>6}{row['graded']:>8}{row['requests']:>10}{row['failed']:>8}"
+            f"{row['seconds']:>9.1f}{row['answers_per_minute']:>13.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Nightly Rasch calibration on a simulated answer history.
+
+Seeds a throwaway question bank with simulated students answering
+questions under a Rasch model with known parameters, then runs the
+calibration job: load the answers into arrays, fit, write the estimates
+back. It reports the time per stage and how well the true parameters are
+recovered. For comparison it also times one fitting iteration written as
+a plain Python loop over the responses.
+
+    python benchmarks/rasch_calibration.py --responses 2000000 --students 20000 --questions 5000
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+SERVER_DIR = Path(__file__).resolve().parent.parent / "app" / "server"
+sys.path.insert(0, str(SERVER_DIR))
+
+from calibration import fit_rasch, load_responses, write_back  # noqa: E402
+from quiz_db import Question, Quiz, QuizDB  # noqa: E402
+
+
+def seed(db, rng, students, questions, responses):
+    quiz_id = db.add_quiz(Quiz("Calibration benchmark"))
+    with db._db_connection() as conn:
+        conn.executemany(
+            "INSERT INTO Questions (quiz_id, question_text, correct_answer, choices) VALUES (?, ?, 'A', '[]')",
+            ((quiz_id, f"Question {i}") for i in range(questions)),
+        )
+        conn.commit()
+        first_question = conn.execute("SELECT MIN(question_id) FROM Questions").fetchone()[0]
+
+    true_ability = rng.normal(0.0, 1.0, students)
+    true_difficulty = rng.normal(0.0, 1.5, questions)
+    student = rng.integers(0, students, responses)
+    question = rng.integers(0, questions, responses)
+    p = 1.0 / (1.0 + np.exp(true_difficulty[question] - true_ability[student]))
+    correct = rng.random(responses) < p
+    with db._db_connection() as conn:
+        conn.executemany(
+            "INSERT INTO Answers (question_id, selected_choice, is_correct, student_id) VALUES (?, 'A', ?, ?)",
+            zip((question + first_question).tolist(), correct.tolist(), (student + 1).tolist()),
+        )
+        conn.commit()
+    return true_ability, true_difficulty
+
+
+def python_iteration(data, ability, difficulty):
+    """One ability and difficulty Newton step as a loop over responses."""
+    students, questions, correct = data.students.tolist(), data.questions.tolist(), data.correct.tolist()
+    gradient, information = [0.0] * len(ability), [0.0] * len(ability)
+    for s, q, y in zip(students, questions, correct):
+        p = 1.0 / (1.0 + math.exp(difficulty[q] - ability[s]))
+        gradient[s] += y - p
+        information[s] += p * (1.0 - p)
+    ability = [a + g / (h + 1e-9) for a, g, h in zip(ability, gradient, information)]
+    gradient, information = [0.0] * len(difficulty), [0.0] * len(difficulty)
+    for s, q, y in zip(students, questions, correct):
+        p = 1.0 / (1.0 + math.exp(difficulty[q] - ability[s]))
+        gradient[q] += p - y
+        information[q] += p * (1.0 - p)
+    return ability, [d + g / (h + 1e-9) for d, g, h in zip(difficulty, gradient, information)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--responses", type=int, default=2_000_000)
+    parser.add_argument("--students", type=int, default=20_000)
+    parser.add_argument("--questions", type=int, default=5_000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = QuizDB(os.path.join(tmp, "calibration.db"))
+        true_ability, true_difficulty = seed(db, rng, args.students, args.questions, args.responses)
+
+        start = time.perf_counter()
+        data = load_responses(db)
+        loaded = time.perf_counter()
+        result = fit_rasch(data)
+        fitted = time.perf_counter()
+        write_back(db, result)
+        written = time.perf_counter()
+
+        start_python = time.perf_counter()
+        python_iteration(data, [0.0] * len(data.student_ids), [0.0] * len(data.question_ids))
+        python_seconds = time.perf_counter() - start_python
+        db.close()
+
+    # Ids were assigned in order, so index i is the i-th simulated parameter
+    row = {
+        "responses": len(data),
+        "load_seconds": loaded - start,
+        "fit_seconds": fitted - loaded,
+        "write_seconds": written - fitted,
+        "iterations": result.iterations,
+        "converged": result.converged,
+        "numpy_iteration_ms": (fitted - loaded) / result.iterations * 1000,
+        "python_iteration_ms": python_seconds * 1000,
+        "difficulty_corr": float(np.corrcoef(result.difficulties, true_difficulty[: len(result.difficulties)])[0, 1]),
+        "ability_corr": float(np.corrcoef(result.abilities, true_ability[: len(result.abilities)])[0, 1]),
+    }
+    if args.json:
+        print(json.dumps(row, indent=2))
+        return
+    print(f"{row['responses']} responses, {len(result.student_ids)} students, {len(result.question_ids)} questions")
+    print(f"load   {row['load_seconds']:6.2f} s")
+    print(f"fit    {row['fit_seconds']:6.2f} s  ({row['iterations']} iterations, converged={row['converged']})")
+    print(f"write  {row['write_seconds']:6.2f} s")
+    print(f"one iteration: numpy {row['numpy_iteration_ms']:.1f} ms, python loop {row['python_iteration_ms']:.1f} ms")
+    print(f"correlation with true parameters: difficulty {row['difficulty_corr']:.3f}, ability {row['ability_corr']:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Memory and construction time of the record dataclasses for bulk reads.
+
+Seeds a throwaway database with N Feedback rows, then reads them all
+three ways:
+
+- a plain __dict__ dataclass with the same fields, as the records used to be
+- the slotted Feedback record
+- Database.iter_all_feedback(), which streams rows in batches
+
+It reports the peak traced memory and the construction time per row.
+
+    python benchmarks/record_memory.py --rows 1000000
+"""
+
+import argparse
+import dataclasses
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+SERVER_DIR = Path(__file__).resolve().parent.parent / "app" / "server"
+sys.path.insert(0, str(SERVER_DIR))
+
+from database import FEEDBACK_COLUMNS, Database, Feedback  # noqa: E402
+
+# The pre-slots Feedback record, for comparison
+DictFeedback = dataclasses.make_dataclass(
+    "DictFeedback", [(field.name, field.type, field) for field in dataclasses.fields(Feedback)]
+)
+
+
+def seed(db, rows):
+    with db._db_connection(db.db_path) as conn:
+        conn.executemany(
+            "INSERT INTO Feedback (work_id, feedback_type, content) VALUES (?, ?, ?)",
+            ((i % 5000, "general", f"Feedback text {i}") for i in range(rows)),
+        )
+        conn.commit()
+
+
+def read_all(db, record):
+    with db._db_connection(db.db_path) as conn:
+        rows = conn.execute(f"SELECT {FEEDBACK_COLUMNS} FROM Feedback").fetchall()
+    return [record(*row) for row in rows]
+
+
+def stream(db):
+    count = 0
+    for _ in db.iter_all_feedback():
+        count += 1
+    return count
+
+
+def measure(name, func, rows):
+    gc.collect()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    del result
+    gc.collect()
+
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {"mode": name, "seconds": elapsed, "ns_per_row": elapsed / rows * 1e9, "peak_mb": peak / 1e6}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "records.db"))
+        seed(db, args.rows)
+        rows = [
+            measure("dict dataclass", lambda: read_all(db, DictFeedback), args.rows),
+            measure("slots dataclass", lambda: read_all(db, Feedback), args.rows),
+            measure("iter_all_feedback", lambda: stream(db), args.rows),
+        ]
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"{args.rows} Feedback rows")
+    print(f"{'mode':<20}{'seconds':>9}{'ns/row':>9}{'peak MB':>10}")
+    for row in rows:
+        print(f"{row['mode']:<20}{row['seconds']:>9.2f}{row['ns_per_row']:>9.0f}{row['peak_mb']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import requests
+from utils.config import BASE_URL, get_api_key
+
+CATALOG_CACHE_PATH = Path("data") / "model_catalog.json"
+CATALOG_TTL = 6 * 60 * 60
+CATALOG_RETRY_INTERVAL = 60
+
+
+class ModelCatalog:
+
+    def __init__(
+        self,
+        base_url: str = BASE_URL,
+        cache_path: Optional[Union[str, Path]] = CATALOG_CACHE_PATH,
+        ttl: float = CATALOG_TTL,
+        retry_interval: float = CATALOG_RETRY_INTERVAL,
+    ):
+        """
+        Initializes the ModelCatalog and loads any catalog cached on disk.
+
+        Args:
+        - base_url (str): The base URL of the API.
+        - cache_path (str | Path | None): Where the catalog is persisted.
+                                          None keeps it in memory only.
+        - ttl (float): Seconds before the catalog is revalidated.
+        - retry_interval (float): Seconds to wait after a failed fetch
+                                  before trying again.
+        """
+        self.base_url = base_url
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.ttl = ttl
+        self.retry_interval = retry_interval
+        self.headers = {"Authorization": f"Bearer {get_api_key()}"}
+        self._lock = threading.Lock()
+        self._vendor_by_model: Dict[str, str] = {}
+        self._etag: Optional[str] = None
+        self._last_modified: Optional[str] = None
+        self._fetched_at = 0.0
+        self._retry_at = 0.0
+        self._load()
+
+    def get_models(self, force_refresh: bool = False) -> Dict[str, str]:
+        """
+        Returns the catalog as a model -> vendor mapping, refreshing it
+        first if the TTL has expired.
+
+        Args:
+        - force_refresh (bool): Revalidate even if the TTL has not expired.
+
+        Returns:
+        - dict: A copy of the model -> vendor mapping.
+        """
+        if force_refresh or self.is_stale():
+            self.refresh(force=force_refresh)
+        return dict(self._vendor_by_model)
+
+    def is_available(self, model: str) -> bool:
+        """
+        Checks whether a model is in the catalog.
+
+        Args:
+        - model (str): The model name.
+        """
+        if self.is_stale():
+            self.refresh()
+        return model in self._vendor_by_model
+
+    def get_vendor(self, model: str) -> Optional[str]:
+        """
+        Returns the vendor of a model, or None if the model is unknown.
+
+        Args:
+        - model (str): The model name.
+        """
+        if self.is_stale():
+            self.refresh()
+        return self._vendor_by_model.get(model)
+
+    def is_stale(self) -> bool:
+        """Checks whether the catalog is older than its TTL."""
+        return time.time() - self._fetched_at >= self.ttl
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Revalidates the catalog against the API.
+
+        A conditional request is sent when an ETag or Last-Modified value
+        is known, so an unchanged catalog costs a 304 and no parsing. On
+        failure the cached catalog is kept, still stale, and the fetch is
+        retried once retry_interval has passed.
+
+        Args:
+        - force (bool): Fetch even if the catalog is fresh or a failed
+                        fetch is still backing off.
+
+        Returns:
+        - bool: True if the catalog is fresh after the call.
+        """
+        with self._lock:
+            if not force:
+                if not self.is_stale() and self._vendor_by_model:
+                    return True
+                if time.time() < self._retry_at:
+                    return False
+
+            headers = dict(self.headers)
+            if self._etag:
+                headers["If-None-Match"] = self._etag
+            if self._last_modified:
+                headers["If-Modified-Since"] = self._last_modified
+
+            try:
+                response = requests.get(f"{self.base_url}/models",
+                                        headers=headers)
+                if response.status_code != 304:
+                    response.raise_for_status()
+                    self._vendor_by_model = self._index(
+                        json.loads(response.text))
+                    self._etag = response.headers.get("ETag")
+                    self._last_modified = response.headers.get(
+                        "Last-Modified")
+            except (requests.RequestException, ValueError) as e:
+                print(f"Error retrieving available models: {e}")
+                self._retry_at = time.time() + self.retry_interval
+                return False
+
+            self._fetched_at = time.time()
+            self._retry_at = 0.0
+            self._save()
+            return True
+
+    def invalidate(self) -> None:
+        """Marks the catalog stale so the next lookup revalidates it."""
+        self._fetched_at = 0.0
+        self._retry_at = 0.0
+
+    def _index(self, payload) -> Dict[str, str]:
+        """
+        Builds the model -> vendor index from a /models response.
+
+        Both a plain mapping and an OpenAI style {"data": [...]} listing
+        are accepted.
+        """
+        if isinstance(payload, dict) and isinstance(payload.get("data"),
+                                                    list):
+            return {
+                entry["id"]: entry.get("owned_by", "")
+                for entry in payload["data"] if "id" in entry
+            }
+        if isinstance(payload, dict):
+            return {str(model): vendor for model, vendor in payload.items()}
+        if isinstance(payload, list):
+            return {str(model): "" for model in payload}
+        return {}
+
+    def _load(self) -> None:
+        """Loads the catalog persisted by a previous run, if any."""
+        if not self.cache_path or not self.cache_path.exists():
+            return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as file:
+                cached = json.load(file)
+            self._vendor_by_model = cached["models"]
+            self._etag = cached.get("etag")
+            self._last_modified = cached.get("last_modified")
+            self._fetched_at = cached.get("fetched_at", 0.0)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring unreadable model catalog cache: {e}")
+
+    def _save(self) -> None:
+        """Persists the catalog atomically next to the configured path."""
+        if not self.cache_path:
+            return
+        cached = {
+            "models": self._vendor_by_model,
+            "etag": self._etag,
+            "last_modified": self._last_modified,
+            "fetched_at": self._fetched_at,
+        }
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(cached, file)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"Error saving model catalog cache: {e}")
+
+
+# Example usage
+if __name__ == "__main__":
+    catalog = ModelCatalog()
+    models = catalog.get_models()
+    print(f"{len(models)} models available")
+    model = "mistralai/Mistral-7B-Instruct-v0.2"
+    print(f"{model} available: {catalog.is_available(model)}")
+    print(f"{model} vendor: {catalog.get_vendor(model)}")
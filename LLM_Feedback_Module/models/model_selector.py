@@ -1,40 +1,55 @@
-import json
 import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional
 
-import requests
+from models.model_catalog import ModelCatalog
 from openai import OpenAI
 from utils.config import BASE_URL, DEFAULT_SYSTEM_PROMPT, get_api_key
 
 
+@dataclass
+class ModelComparison:
+    model: str
+    response: Optional[str] = None
+    latency: Optional[float] = None
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    total_tokens: Optional[int] = None
+    error: Optional[str] = None
+
+
 class ModelSelector:
 
-    def __init__(self, base_url: str = BASE_URL):
+    def __init__(self,
+                 base_url: str = BASE_URL,
+                 catalog: Optional[ModelCatalog] = None):
         """
         Initializes the ModelSelector with the base URL and API key.
 
         Args:
         - base_url (str): The base URL of the API.
+        - catalog (ModelCatalog): The model catalog to use. A disk backed
+                                  catalog for base_url is created if omitted.
         """
         self.api_key = get_api_key()
         self.base_url = base_url
         self.headers = {"Authorization": f"Bearer {self.api_key}"}
         self.client = OpenAI(api_key=self.api_key, base_url=self.base_url)
+        self.catalog = catalog or ModelCatalog(self.base_url)
 
-    def get_available_models(self) -> dict:
+    def get_available_models(self, force_refresh: bool = False) -> dict:
         """
-        Retrieves the available models from the API.
+        Retrieves the available models from the cached model catalog.
+
+        Args:
+        - force_refresh (bool): Revalidate the catalog against the API.
 
         Returns:
         - dict: A dictionary of available models.
         """
-        try:
-            response = requests.get(f"{self.base_url}/models",
-                                    headers=self.headers)
-            response.raise_for_status()
-            return json.loads(response.text)
-        except requests.RequestException as e:
-            print(f"Error retrieving available models: {e}")
-            return {}
+        return self.catalog.get_models(force_refresh)
 
     def compare_models(
         self,
@@ -42,11 +57,15 @@ class ModelSelector:
         system_prompt: str = DEFAULT_SYSTEM_PROMPT,
         num_models: int = 2,
         model_selection: str = "random",
-        selected_models: list = [],
-    ) -> None:
+        selected_models: Optional[list] = None,
+        max_concurrency: int = 4,
+    ) -> List[ModelComparison]:
         """
         Compares the responses of multiple models to a given prompt.
 
+        The selected models are queried concurrently, with at most
+        `max_concurrency` requests in flight at a time.
+
         Args:
         - prompt (str): The user prompt.
         - system_prompt (str): The system prompt.
@@ -55,11 +74,13 @@ class ModelSelector:
                                  Can be "random" or "manual".
         - selected_models (list): A list of model names to compare.
                                  Required if model_selection is "manual".
-        """
-        vendor_by_model = self.get_available_models()
-        models = list(vendor_by_model.keys())
+        - max_concurrency (int): The maximum number of concurrent requests.
 
+        Returns:
+        - list: A ModelComparison per model, in selection order.
+        """
         if model_selection == "random":
+            models = list(self.get_available_models().keys())
             random.shuffle(models)
             selected_models = models[:num_models]
         elif model_selection == "manual":
@@ -67,35 +88,92 @@ class ModelSelector:
                 raise ValueError(
                     "models must be provided for manual model selection")
             selected_models = [
-                model for model in selected_models if model in models
+                model for model in selected_models
+                if self.catalog.is_available(model)
             ]
         else:
             raise ValueError("Invalid model selection method")
 
-        for model in selected_models:
-            try:
-                completion = self.client.chat.completions.create(
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": system_prompt
-                        },
-                        {
-                            "role": "user",
-                            "content": prompt
-                        },
-                    ],
-                    model=model,
-                )
-
-                if completion.choices and completion.choices[0].message:
-                    message = completion.choices[0].message.content
-                    self._print_model_response(model, system_prompt, prompt,
-                                               message)
-                else:
-                    print(f"No response from model {model}")
-            except Exception as e:
-                print(f"Error getting response from model {model}: {e}")
+        if not selected_models:
+            return []
+
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        workers = min(max_concurrency, len(selected_models))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(
+                executor.map(
+                    lambda model: self._query_model(model, system_prompt,
+                                                    prompt),
+                    selected_models,
+                ))
+
+    def _query_model(self, model: str, system_prompt: str,
+                     prompt: str) -> ModelComparison:
+        """
+        Queries a single model and records its latency and token usage.
+
+        Args:
+        - model (str): The model name.
+        - system_prompt (str): The system prompt.
+        - prompt (str): The user prompt.
+
+        Returns:
+        - ModelComparison: The model response, or the error it raised.
+        """
+        result = ModelComparison(model=model)
+        start = time.perf_counter()
+        try:
+            completion = self.client.chat.completions.create(
+                messages=[
+                    {
+                        "role": "system",
+                        "content": system_prompt
+                    },
+                    {
+                        "role": "user",
+                        "content": prompt
+                    },
+                ],
+                model=model,
+            )
+        except Exception as e:
+            result.error = f"Error getting response from model {model}: {e}"
+            return result
+        finally:
+            result.latency = time.perf_counter() - start
+
+        if completion.choices and completion.choices[0].message:
+            result.response = completion.choices[0].message.content
+        else:
+            result.error = f"No response from model {model}"
+
+        usage = getattr(completion, "usage", None)
+        if usage is not None:
+            result.prompt_tokens = usage.prompt_tokens
+            result.completion_tokens = usage.completion_tokens
+            result.total_tokens = usage.total_tokens
+        return result
+
+    def print_comparisons(self, comparisons: List[ModelComparison],
+                          system_prompt: str, prompt: str) -> None:
+        """
+        Prints the results returned by compare_models.
+
+        Args:
+        - comparisons (list): The ModelComparison results.
+        - system_prompt (str): The system prompt.
+        - prompt (str): The user prompt.
+        """
+        for result in comparisons:
+            if result.error:
+                print(f"{result.error}\n")
+            else:
+                self._print_model_response(result.model, system_prompt,
+                                           prompt, result.response)
+            print(f"Latency: {result.latency:.2f}s, "
+                  f"Tokens: {result.total_tokens}\n")
 
     def _print_model_response(self, model: str, system_prompt: str,
                               prompt: str, response: str) -> None:
@@ -130,8 +208,11 @@ if __name__ == "__main__":
         selected_models = input("Enter model names (comma-separated): ").split(
             ",")
         selected_models = [model.strip() for model in selected_models]
-        model_selector.compare_models(prompt,
-                                      model_selection="manual",
-                                      selected_models=selected_models)
+        comparisons = model_selector.compare_models(
+            prompt,
+            model_selection="manual",
+            selected_models=selected_models)
     else:
-        model_selector.compare_models(prompt)
+        comparisons = model_selector.compare_models(prompt)
+    model_selector.print_comparisons(comparisons, DEFAULT_SYSTEM_PROMPT,
+                                     prompt)